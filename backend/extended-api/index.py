@@ -1,15 +1,111 @@
 '''
-Business: Расширенный API для управления историей удалений, парковками и VIN-проверкой
+Business: Расширенный API для управления историей удалений, парковками, проверкой пропусков и VIN-проверкой
 Args: event - dict с httpMethod, body, queryStringParameters, pathParameters
       context - object с attributes: request_id, function_name
 Returns: HTTP response dict с данными
 '''
 import json
 import os
-import psycopg2
+import sys
 from typing import Dict, Any
 from datetime import datetime
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from shared.db import get_connection, release_connection, pool_stats, PoolTimeout
+from shared.analytics import fetch_analytics, ANALYTICS_SOURCES, MAX_DAYS, MAX_TOP
+from shared.changes import fetch_changes, CHANGE_SOURCES, DEFAULT_CHANGES_LIMIT, MAX_CHANGES_LIMIT
+from shared.notifications import NOTIFICATION_LEVELS
+from shared.export import export_response, EXPORT_FORMATS
+from shared.batch import parse_keys
+from shared.cache import get_cache, cache_stats, MISSING
+from shared.schema import require_tables, SchemaMissing
+from shared.pagination import encode_cursor, decode_cursor, parse_date_filter
+from shared.parking import get_pass_cache, parse_zones, REVOKED_STATUS
+from shared.serialize import RowEncoder, iso, float_or_zero, as_list, dumps
+from shared.instrument import instrumented, metrics_snapshot, prometheus_response
+from shared.compress import compressed, compression_stats
+from shared.conditional import dataset_version, cached_response, versioned_response
+
+HISTORY_PAGE_SIZE = 100
+MAX_HISTORY_PAGE_SIZE = 500
+
+ACTION_TABLES = {
+    'history': ['deleted_fines_history'],
+    'changes': ['deleted_fines_history'],
+    'notifications': ['fine_notifications'],
+    'parking': ['parking_passes'],
+    'vin': ['vehicle_info']
+}
+
+HISTORY_ENCODER = RowEncoder([
+    ('id', None),
+    ('fineId', None),
+    ('violationNumber', None),
+    ('driverName', None),
+    ('licensePlate', None),
+    ('violationType', None),
+    ('violationDate', iso),
+    ('amount', float_or_zero),
+    ('status', None),
+    ('location', None),
+    ('description', None),
+    ('deletedBy', None),
+    ('deletedAt', iso),
+    ('reason', None),
+    ('source', None)
+])
+
+NOTIFICATION_ENCODER = RowEncoder([
+    ('id', None),
+    ('fineId', None),
+    ('kind', None),
+    ('type', NOTIFICATION_LEVELS.get),
+    ('title', None),
+    ('message', None),
+    ('deadline', iso),
+    ('date', iso),
+    ('fine', None)
+])
+
+PASS_ENCODER = RowEncoder([
+    ('id', None),
+    ('passNumber', None),
+    ('licensePlate', None),
+    ('driverName', None),
+    ('driverPhone', None),
+    ('validFrom', iso),
+    ('validUntil', iso),
+    ('parkingZones', None),
+    ('zones', as_list),
+    ('status', None),
+    ('issuedBy', None),
+    ('issuedAt', iso),
+    ('notes', None)
+])
+
+VEHICLE_INFO_QUERY = '''
+    SELECT vin_code, license_plate, brand, model, year, color, owner_name,
+           registration_date, last_inspection, insurance_valid_until
+    FROM vehicle_info
+'''
+
+def vehicle_info_to_dict(row: tuple) -> Dict[str, Any]:
+    return {
+        'found': True,
+        'vinCode': row[0],
+        'licensePlate': row[1],
+        'brand': row[2],
+        'model': row[3],
+        'year': row[4],
+        'color': row[5],
+        'ownerName': row[6],
+        'registrationDate': row[7].isoformat() if row[7] else None,
+        'lastInspection': row[8].isoformat() if row[8] else None,
+        'insuranceValidUntil': row[9].isoformat() if row[9] else None
+    }
+
+@instrumented('extended-api')
+@compressed
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     method: str = event.get('httpMethod', 'GET')
     query_params = event.get('queryStringParameters', {})
@@ -20,117 +116,265 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'statusCode': 200,
             'headers': {
                 'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type, X-User-Id',
+                'Access-Control-Allow-Methods': 'GET, POST, DELETE, OPTIONS',
+                'Access-Control-Allow-Headers': 'Content-Type, X-User-Id, If-None-Match, If-Modified-Since',
                 'Access-Control-Max-Age': '86400'
             },
             'body': ''
         }
     
-    database_url = os.environ.get('DATABASE_URL')
+    if action == 'metrics' and method == 'GET':
+        if query_params.get('format') == 'prometheus':
+            return prometheus_response()
+        return {
+            'statusCode': 200,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'isBase64Encoded': False,
+            'body': json.dumps({
+                'pool': pool_stats(),
+                'caches': cache_stats(),
+                'parking': get_pass_cache().stats(),
+                'handlers': metrics_snapshot(),
+                'compression': compression_stats()
+            })
+        }
+    
+    conn = None
+    cur = None
     
     try:
-        conn = psycopg2.connect(database_url)
+        if action == 'parking-check' and method in ('GET', 'POST'):
+            if method == 'POST':
+                try:
+                    body_data = json.loads(event.get('body') or '{}')
+                except ValueError:
+                    body_data = None
+                if not isinstance(body_data, dict):
+                    return {
+                        'statusCode': 400,
+                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                        'isBase64Encoded': False,
+                        'body': json.dumps({'error': 'Некорректный JSON в теле запроса'})
+                    }
+            else:
+                body_data = query_params
+            
+            try:
+                plates = parse_keys(body_data.get('licensePlates') or body_data.get('licensePlate'))
+            except ValueError as e:
+                return {
+                    'statusCode': 400,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'isBase64Encoded': False,
+                    'body': json.dumps({'error': str(e)})
+                }
+            
+            results = get_pass_cache().check(plates, body_data.get('zone'))
+            
+            return {
+                'statusCode': 200,
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                'isBase64Encoded': False,
+                'body': json.dumps({'results': results, 'zone': body_data.get('zone'), 'checkedAt': datetime.now().isoformat()})
+            }
+        
+        conn = get_connection()
         cur = conn.cursor()
+        require_tables(cur, ACTION_TABLES.get(action, []))
         
-        if action == 'history' and method == 'GET':
+        if action == 'analytics' and method == 'GET':
+            source = query_params.get('source', 'gibdd_fines')
+            
+            if source not in ANALYTICS_SOURCES:
+                return {
+                    'statusCode': 400,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'isBase64Encoded': False,
+                    'body': json.dumps({'error': 'Неизвестный источник данных'})
+                }
+            
             try:
-                cur.execute("""
-                    SELECT id, fine_id, violation_number, driver_name, license_plate,
-                           violation_type, violation_date, amount, status, location,
-                           description, deleted_by, deleted_at, reason
-                    FROM deleted_fines_history
-                    ORDER BY deleted_at DESC
-                    LIMIT 100
-                """)
-            except:
-                cur.execute("CREATE TABLE IF NOT EXISTS deleted_fines_history (id SERIAL PRIMARY KEY, fine_id INTEGER, violation_number VARCHAR(50), driver_name VARCHAR(255), license_plate VARCHAR(20), violation_type VARCHAR(100), violation_date TIMESTAMP, amount DECIMAL(10, 2), status VARCHAR(50), location VARCHAR(255), description TEXT, deleted_by VARCHAR(100) DEFAULT 'admin', deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, reason VARCHAR(255) DEFAULT 'Удалено через систему')")
-                conn.commit()
-                cur.execute("SELECT id, fine_id, violation_number, driver_name, license_plate, violation_type, violation_date, amount, status, location, description, deleted_by, deleted_at, reason FROM deleted_fines_history ORDER BY deleted_at DESC LIMIT 100")
+                days = min(max(int(query_params.get('days') or 0), 0), MAX_DAYS)
+                top = min(max(int(query_params.get('top') or 0), 0), MAX_TOP)
+                filters = dict(query_params, dateFrom=parse_date_filter(query_params.get('dateFrom')),
+                               dateTo=parse_date_filter(query_params.get('dateTo')))
+            except (ValueError, TypeError):
+                return {
+                    'statusCode': 400,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'isBase64Encoded': False,
+                    'body': json.dumps({'error': 'Некорректные параметры days, top, dateFrom или dateTo'})
+                }
             
-            rows = cur.fetchall()
-            history = []
-            for row in rows:
-                history.append({
-                    'id': row[0],
-                    'fineId': row[1],
-                    'violationNumber': row[2],
-                    'driverName': row[3],
-                    'licensePlate': row[4],
-                    'violationType': row[5],
-                    'violationDate': row[6].isoformat() if row[6] else None,
-                    'amount': float(row[7]) if row[7] else 0,
-                    'status': row[8],
-                    'location': row[9],
-                    'description': row[10],
-                    'deletedBy': row[11],
-                    'deletedAt': row[12].isoformat() if row[12] else None,
-                    'reason': row[13]
-                })
+            analytics = fetch_analytics(cur, source, filters, days, top)
             
-            cur.close()
-            conn.close()
+            return {
+                'statusCode': 200,
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                'isBase64Encoded': False,
+                'body': json.dumps(analytics)
+            }
+        
+        if action == 'changes' and method == 'GET':
+            source = query_params.get('source', 'gibdd_fines')
+            
+            if source not in CHANGE_SOURCES:
+                return {
+                    'statusCode': 400,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'isBase64Encoded': False,
+                    'body': json.dumps({'error': 'Неизвестный источник данных'})
+                }
+            
+            try:
+                limit = min(max(int(query_params.get('limit', DEFAULT_CHANGES_LIMIT)), 1), MAX_CHANGES_LIMIT)
+            except (ValueError, TypeError):
+                return {
+                    'statusCode': 400,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'isBase64Encoded': False,
+                    'body': json.dumps({'error': 'Некорректные параметры пагинации'})
+                }
+            
+            try:
+                changes = fetch_changes(cur, source, query_params.get('since'), limit)
+            except ValueError as e:
+                return {
+                    'statusCode': 400,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'isBase64Encoded': False,
+                    'body': json.dumps({'error': str(e)})
+                }
             
             return {
                 'statusCode': 200,
                 'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
                 'isBase64Encoded': False,
-                'body': json.dumps({'history': history, 'total': len(history)})
+                'body': dumps(changes)
             }
         
-        if action == 'parking' and method == 'GET':
+        if action == 'history' and method == 'GET' and query_params.get('export') in EXPORT_FORMATS:
+            return export_response(conn, 'deleted_fines_history', query_params['export'], query_params.get('gzip') == '1')
+        
+        if action == 'history' and method == 'GET':
             try:
-                cur.execute("""
-                    SELECT id, pass_number, license_plate, driver_name, driver_phone,
-                           valid_from, valid_until, parking_zones, status, issued_by, issued_at, notes
-                    FROM parking_passes
-                    ORDER BY issued_at DESC
-                """)
-            except:
-                cur.execute("CREATE TABLE IF NOT EXISTS parking_passes (id SERIAL PRIMARY KEY, pass_number VARCHAR(50) UNIQUE NOT NULL, license_plate VARCHAR(20) NOT NULL, driver_name VARCHAR(255) NOT NULL, driver_phone VARCHAR(20), valid_from TIMESTAMP DEFAULT CURRENT_TIMESTAMP, valid_until TIMESTAMP NOT NULL, parking_zones TEXT, status VARCHAR(50) DEFAULT 'Активен', issued_by VARCHAR(100) DEFAULT 'admin', issued_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, notes TEXT)")
-                conn.commit()
-                cur.execute("SELECT id, pass_number, license_plate, driver_name, driver_phone, valid_from, valid_until, parking_zones, status, issued_by, issued_at, notes FROM parking_passes ORDER BY issued_at DESC")
+                page_size = min(max(int(query_params.get('limit', HISTORY_PAGE_SIZE)), 1), MAX_HISTORY_PAGE_SIZE)
+                cursor = decode_cursor(query_params['cursor']) if query_params.get('cursor') else None
+            except (ValueError, TypeError):
+                return {
+                    'statusCode': 400,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'isBase64Encoded': False,
+                    'body': json.dumps({'error': 'Некорректные параметры пагинации'})
+                }
+            
+            version = dataset_version(cur, 'deleted_fines_history', query_params)
+            cached = cached_response(event, version)
+            if cached is not None:
+                return cached
             
+            query = """
+                SELECT id, fine_id, violation_number, driver_name, license_plate,
+                       violation_type, violation_date, amount, status, location,
+                       description, deleted_by, deleted_at, reason, source
+                FROM deleted_fines_history
+            """
+            history_params = []
+            if cursor:
+                query += ' WHERE (deleted_at, id) < (%s::timestamp, %s)'
+                history_params.extend(cursor)
+            query += ' ORDER BY deleted_at DESC, id DESC LIMIT %s'
+            history_params.append(page_size + 1)
+            
+            cur.execute(query, history_params)
             rows = cur.fetchall()
-            passes = []
-            for row in rows:
-                passes.append({
-                    'id': row[0],
-                    'passNumber': row[1],
-                    'licensePlate': row[2],
-                    'driverName': row[3],
-                    'driverPhone': row[4],
-                    'validFrom': row[5].isoformat() if row[5] else None,
-                    'validUntil': row[6].isoformat() if row[6] else None,
-                    'parkingZones': row[7],
-                    'status': row[8],
-                    'issuedBy': row[9],
-                    'issuedAt': row[10].isoformat() if row[10] else None,
-                    'notes': row[11]
-                })
+            has_more = len(rows) > page_size
+            rows = rows[:page_size]
+            next_cursor = encode_cursor(rows[-1][12], rows[-1][0]) if has_more else None
             
-            cur.close()
-            conn.close()
+            return versioned_response(version, dumps({'history': HISTORY_ENCODER.rows(rows), 'total': len(rows), 'nextCursor': next_cursor, 'hasMore': has_more}))
+        
+        if action == 'notifications' and method == 'GET':
+            try:
+                page_size = min(max(int(query_params.get('limit', HISTORY_PAGE_SIZE)), 1), MAX_HISTORY_PAGE_SIZE)
+                cursor = decode_cursor(query_params['cursor']) if query_params.get('cursor') else None
+            except (ValueError, TypeError):
+                return {
+                    'statusCode': 400,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'isBase64Encoded': False,
+                    'body': json.dumps({'error': 'Некорректные параметры пагинации'})
+                }
+            
+            query = """
+                SELECT id, fine_id, kind, kind, title, message, deadline, sent_at, payload
+                FROM fine_notifications
+                WHERE status = 'sent'
+            """
+            notification_params = []
+            if cursor:
+                query += ' AND (sent_at, id) < (%s::timestamptz, %s)'
+                notification_params.extend(cursor)
+            query += ' ORDER BY sent_at DESC, id DESC LIMIT %s'
+            notification_params.append(page_size + 1)
+            
+            cur.execute(query, notification_params)
+            rows = cur.fetchall()
+            has_more = len(rows) > page_size
+            rows = rows[:page_size]
+            next_cursor = encode_cursor(rows[-1][7], rows[-1][0]) if has_more else None
             
             return {
                 'statusCode': 200,
                 'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
                 'isBase64Encoded': False,
-                'body': json.dumps({'passes': passes, 'total': len(passes)})
+                'body': dumps({'notifications': NOTIFICATION_ENCODER.rows(rows), 'nextCursor': next_cursor, 'hasMore': has_more})
             }
         
+        if action == 'parking' and method == 'GET':
+            try:
+                page_size = min(max(int(query_params.get('limit', HISTORY_PAGE_SIZE)), 1), MAX_HISTORY_PAGE_SIZE)
+                cursor = decode_cursor(query_params['cursor']) if query_params.get('cursor') else None
+            except (ValueError, TypeError):
+                return {
+                    'statusCode': 400,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'isBase64Encoded': False,
+                    'body': json.dumps({'error': 'Некорректные параметры пагинации'})
+                }
+            
+            version = dataset_version(cur, 'parking_passes', query_params)
+            cached = cached_response(event, version)
+            if cached is not None:
+                return cached
+            
+            query = """
+                SELECT id, pass_number, license_plate, driver_name, driver_phone,
+                       valid_from, valid_until, array_to_string(parking_zones, ', '), parking_zones,
+                       status, issued_by, issued_at, notes
+                FROM parking_passes
+            """
+            pass_params = []
+            if cursor:
+                query += ' WHERE (issued_at, id) < (%s::timestamp, %s)'
+                pass_params.extend(cursor)
+            query += ' ORDER BY issued_at DESC, id DESC LIMIT %s'
+            pass_params.append(page_size + 1)
+            
+            cur.execute(query, pass_params)
+            rows = cur.fetchall()
+            has_more = len(rows) > page_size
+            rows = rows[:page_size]
+            next_cursor = encode_cursor(rows[-1][11], rows[-1][0]) if has_more else None
+            
+            return versioned_response(version, dumps({'passes': PASS_ENCODER.rows(rows), 'total': len(rows), 'nextCursor': next_cursor, 'hasMore': has_more}))
+        
         if action == 'parking' and method == 'POST':
             body_str = event.get('body', '{}')
             if not body_str or body_str.strip() == '':
                 body_str = '{}'
             body_data = json.loads(body_str)
             
-            try:
-                cur.execute("SELECT 1 FROM parking_passes LIMIT 1")
-            except:
-                cur.execute("CREATE TABLE IF NOT EXISTS parking_passes (id SERIAL PRIMARY KEY, pass_number VARCHAR(50) UNIQUE NOT NULL, license_plate VARCHAR(20) NOT NULL, driver_name VARCHAR(255) NOT NULL, driver_phone VARCHAR(20), valid_from TIMESTAMP DEFAULT CURRENT_TIMESTAMP, valid_until TIMESTAMP NOT NULL, parking_zones TEXT, status VARCHAR(50) DEFAULT 'Активен', issued_by VARCHAR(100) DEFAULT 'admin', issued_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, notes TEXT)")
-                conn.commit()
-            
             pass_number = body_data.get('passNumber', f"PP{datetime.now().strftime('%Y%m%d%H%M%S')}")
             cur.execute("""
                 INSERT INTO parking_passes (pass_number, license_plate, driver_name, driver_phone, valid_until, parking_zones, notes)
@@ -142,14 +386,13 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 body_data.get('driverName'),
                 body_data.get('driverPhone', ''),
                 body_data.get('validUntil'),
-                body_data.get('parkingZones', 'Все зоны'),
+                parse_zones(body_data.get('parkingZones')),
                 body_data.get('notes', '')
             ))
             
             new_id = cur.fetchone()[0]
             conn.commit()
-            cur.close()
-            conn.close()
+            get_pass_cache().mark_stale()
             
             return {
                 'statusCode': 200,
@@ -158,49 +401,106 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 'body': json.dumps({'success': True, 'id': new_id, 'passNumber': pass_number})
             }
         
+        if action == 'parking' and method == 'DELETE':
+            pass_id = query_params.get('id')
+            if not pass_id or not pass_id.isdigit():
+                return {
+                    'statusCode': 400,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'isBase64Encoded': False,
+                    'body': json.dumps({'error': 'ID пропуска не указан'})
+                }
+            
+            cur.execute("""
+                UPDATE parking_passes
+                SET status = %s, updated_at = CURRENT_TIMESTAMP
+                WHERE id = %s
+                RETURNING id
+            """, (REVOKED_STATUS, int(pass_id)))
+            revoked = cur.fetchone()
+            conn.commit()
+            get_pass_cache().mark_stale()
+            
+            if not revoked:
+                return {
+                    'statusCode': 404,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'isBase64Encoded': False,
+                    'body': json.dumps({'error': 'Пропуск не найден'})
+                }
+            
+            return {
+                'statusCode': 200,
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                'isBase64Encoded': False,
+                'body': json.dumps({'success': True, 'id': revoked[0], 'status': REVOKED_STATUS})
+            }
+        
         if action == 'vin' and method == 'POST':
             body_str = event.get('body', '{}')
             if not body_str or body_str.strip() == '':
                 body_str = '{}'
             body_data = json.loads(body_str)
             vin_code = body_data.get('vinCode', '')
+            vin_cache = get_cache('vin')
             
-            try:
-                cur.execute("SELECT 1 FROM vehicle_info LIMIT 1")
-            except:
-                cur.execute("CREATE TABLE IF NOT EXISTS vehicle_info (id SERIAL PRIMARY KEY, vin_code VARCHAR(17) UNIQUE NOT NULL, license_plate VARCHAR(20) NOT NULL, brand VARCHAR(100), model VARCHAR(100), year INTEGER, color VARCHAR(50), owner_name VARCHAR(255), registration_date TIMESTAMP, last_inspection TIMESTAMP, insurance_valid_until TIMESTAMP, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)")
-                conn.commit()
-                cur.execute("INSERT INTO vehicle_info (vin_code, license_plate, brand, model, year, color, owner_name, registration_date, last_inspection, insurance_valid_until) VALUES ('XTA21703050123456', 'А123ВВ777', 'LADA', 'Vesta', 2023, 'Синий', 'Петров Петр Петрович', '2023-03-15', '2024-09-20', '2025-03-15'), ('Z8T4DNFVC8S123789', 'В456СС199', 'Toyota', 'Camry', 2022, 'Черный', 'Иванов Иван Иванович', '2022-05-20', '2024-08-15', '2025-05-20')")
-                conn.commit()
+            if 'vinCodes' not in body_data:
+                cached = vin_cache.get(vin_code)
+                if cached is not MISSING:
+                    return {
+                        'statusCode': 200,
+                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                        'isBase64Encoded': False,
+                        'body': json.dumps(cached or {'found': False, 'message': 'Автомобиль не найден'})
+                    }
             
-            cur.execute("""
-                SELECT vin_code, license_plate, brand, model, year, color, owner_name,
-                       registration_date, last_inspection, insurance_valid_until
-                FROM vehicle_info
-                WHERE vin_code = %s
-            """, (vin_code,))
+            if 'vinCodes' in body_data:
+                try:
+                    vin_codes = parse_keys(body_data['vinCodes'])
+                except ValueError as e:
+                    return {
+                        'statusCode': 400,
+                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                        'isBase64Encoded': False,
+                        'body': json.dumps({'error': str(e)})
+                    }
+                
+                found = {}
+                missing = []
+                for vin in vin_codes:
+                    cached = vin_cache.get(vin)
+                    if cached is MISSING:
+                        missing.append(vin)
+                    elif cached:
+                        found[vin] = cached
+                
+                if missing:
+                    cur.execute(VEHICLE_INFO_QUERY + ' WHERE vin_code = ANY(%s)', (missing,))
+                    loaded = {row[0]: vehicle_info_to_dict(row) for row in cur.fetchall()}
+                    for vin in missing:
+                        vin_cache.set(vin, loaded.get(vin))
+                    found.update(loaded)
+                
+                return {
+                    'statusCode': 200,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'isBase64Encoded': False,
+                    'body': json.dumps({
+                        'found': found,
+                        'notFound': [vin for vin in vin_codes if vin not in found],
+                        'total': len(vin_codes)
+                    })
+                }
+            
+            cur.execute(VEHICLE_INFO_QUERY + ' WHERE vin_code = %s', (vin_code,))
             
             row = cur.fetchone()
             
-            if row:
-                vehicle = {
-                    'found': True,
-                    'vinCode': row[0],
-                    'licensePlate': row[1],
-                    'brand': row[2],
-                    'model': row[3],
-                    'year': row[4],
-                    'color': row[5],
-                    'ownerName': row[6],
-                    'registrationDate': row[7].isoformat() if row[7] else None,
-                    'lastInspection': row[8].isoformat() if row[8] else None,
-                    'insuranceValidUntil': row[9].isoformat() if row[9] else None
-                }
-            else:
-                vehicle = {'found': False, 'message': 'Автомобиль не найден'}
+            vehicle = vehicle_info_to_dict(row) if row else None
+            vin_cache.set(vin_code, vehicle)
             
-            cur.close()
-            conn.close()
+            if not vehicle:
+                vehicle = {'found': False, 'message': 'Автомобиль не найден'}
             
             return {
                 'statusCode': 200,
@@ -216,10 +516,23 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'body': json.dumps({'error': 'Invalid action or method'})
         }
         
+    except (SchemaMissing, PoolTimeout) as e:
+        return {
+            'statusCode': 503,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'isBase64Encoded': False,
+            'body': json.dumps({'error': str(e)})
+        }
+    
     except Exception as e:
         return {
             'statusCode': 500,
             'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
             'isBase64Encoded': False,
             'body': json.dumps({'error': str(e)})
-        }
\ No newline at end of file
+        }
+    
+    finally:
+        if cur is not None:
+            cur.close()
+        release_connection(conn)
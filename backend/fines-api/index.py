@@ -1,14 +1,50 @@
 '''
-Business: API для управления штрафами ГИБДД (получение, удаление)
+Business: API для управления штрафами ГИБДД (получение, удаление с архивацией в историю, пакетное удаление)
 Args: event - dict с httpMethod, body, queryStringParameters
       context - object с attributes: request_id, function_name
 Returns: HTTP response dict с данными штрафов
 '''
 import json
 import os
-import psycopg2
+import sys
 from typing import Dict, Any
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from shared.db import get_connection, release_connection, PoolTimeout
+from shared.batch import parse_ids
+from shared.export import export_response, EXPORT_FORMATS
+from shared.pagination import encode_cursor, decode_cursor, parse_date_filter
+from shared.archive import archive_fines
+from shared.serialize import RowEncoder, iso, as_float, dumps
+from shared.instrument import instrumented
+from shared.compress import compressed
+from shared.conditional import dataset_version, cached_response, versioned_response
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+FILTER_COLUMNS = [
+    ('status', 'status'),
+    ('violationType', 'violation_type'),
+    ('licensePlate', 'license_plate')
+]
+
+FINE_ENCODER = RowEncoder([
+    ('id', None),
+    ('violationNumber', None),
+    ('driverName', None),
+    ('licensePlate', None),
+    ('violationType', None),
+    ('violationDate', iso),
+    ('amount', as_float),
+    ('status', None),
+    ('location', None),
+    ('description', None),
+    ('createdAt', iso)
+])
+
+@instrumented('fines-api')
+@compressed
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     method: str = event.get('httpMethod', 'GET')
     
@@ -18,60 +54,123 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'headers': {
                 'Access-Control-Allow-Origin': '*',
                 'Access-Control-Allow-Methods': 'GET, DELETE, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type, X-User-Id',
+                'Access-Control-Allow-Headers': 'Content-Type, X-User-Id, If-None-Match, If-Modified-Since',
                 'Access-Control-Max-Age': '86400'
             },
             'body': ''
         }
     
-    database_url = os.environ.get('DATABASE_URL')
+    conn = None
+    cur = None
     
     try:
-        conn = psycopg2.connect(database_url)
+        conn = get_connection()
         cur = conn.cursor()
         
         if method == 'GET':
-            cur.execute("""
+            params = event.get('queryStringParameters', {}) or {}
+            
+            if params.get('export') in EXPORT_FORMATS:
+                return export_response(conn, 'fines', params['export'], params.get('gzip') == '1')
+            
+            try:
+                page_size = min(max(int(params.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+                cursor = decode_cursor(params['cursor']) if params.get('cursor') else None
+                date_from = parse_date_filter(params.get('dateFrom'))
+                date_to = parse_date_filter(params.get('dateTo'))
+            except (ValueError, TypeError):
+                return {
+                    'statusCode': 400,
+                    'headers': {
+                        'Content-Type': 'application/json',
+                        'Access-Control-Allow-Origin': '*'
+                    },
+                    'isBase64Encoded': False,
+                    'body': json.dumps({'error': 'Некорректные параметры пагинации'})
+                }
+            
+            version = dataset_version(cur, 'fines', params)
+            cached = cached_response(event, version)
+            if cached is not None:
+                return cached
+            
+            query = """
                 SELECT id, violation_number, driver_name, license_plate, 
                        violation_type, violation_date, amount, status, 
                        location, description, created_at
                 FROM fines
-                ORDER BY violation_date DESC
-            """)
+                WHERE 1=1
+            """
+            query_params = []
+            
+            for param, column in FILTER_COLUMNS:
+                if params.get(param):
+                    query += f' AND {column} = %s'
+                    query_params.append(params[param])
+            
+            if date_from:
+                query += ' AND violation_date >= %s'
+                query_params.append(date_from)
+            
+            if date_to:
+                query += ' AND violation_date <= %s'
+                query_params.append(date_to)
             
+            if cursor:
+                query += ' AND (violation_date, id) < (%s::timestamp, %s)'
+                query_params.extend(cursor)
+            
+            query += ' ORDER BY violation_date DESC, id DESC LIMIT %s'
+            query_params.append(page_size + 1)
+            
+            cur.execute(query, query_params)
             rows = cur.fetchall()
-            fines = []
-            for row in rows:
-                fines.append({
-                    'id': row[0],
-                    'violationNumber': row[1],
-                    'driverName': row[2],
-                    'licensePlate': row[3],
-                    'violationType': row[4],
-                    'violationDate': row[5].isoformat() if row[5] else None,
-                    'amount': float(row[6]),
-                    'status': row[7],
-                    'location': row[8],
-                    'description': row[9],
-                    'createdAt': row[10].isoformat() if row[10] else None
-                })
+            has_more = len(rows) > page_size
+            rows = rows[:page_size]
             
-            cur.close()
-            conn.close()
+            next_cursor = encode_cursor(rows[-1][5], rows[-1][0]) if has_more else None
             
-            return {
-                'statusCode': 200,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'isBase64Encoded': False,
-                'body': json.dumps({'fines': fines})
-            }
+            return versioned_response(version, dumps({'fines': FINE_ENCODER.rows(rows), 'nextCursor': next_cursor, 'hasMore': has_more}))
         
         if method == 'DELETE':
-            params = event.get('queryStringParameters', {})
+            params = event.get('queryStringParameters', {}) or {}
+            body_data = json.loads(event.get('body') or '{}')
             fine_id = params.get('id')
+            deleted_by = (event.get('headers') or {}).get('X-User-Id')
+            reason = params.get('reason') or body_data.get('reason')
+            
+            if params.get('ids') or 'ids' in body_data:
+                try:
+                    ids = parse_ids(params.get('ids') or body_data.get('ids'))
+                except ValueError as e:
+                    return {
+                        'statusCode': 400,
+                        'headers': {
+                            'Content-Type': 'application/json',
+                            'Access-Control-Allow-Origin': '*'
+                        },
+                        'isBase64Encoded': False,
+                        'body': json.dumps({'error': str(e)})
+                    }
+                
+                deleted = {row[0] for row in archive_fines(cur, 'fines', ids, deleted_by, reason)}
+                conn.commit()
+                
+                results = [{'id': i, 'result': 'deleted' if i in deleted else 'not_found'} for i in ids]
+                
+                return {
+                    'statusCode': 200,
+                    'headers': {
+                        'Content-Type': 'application/json',
+                        'Access-Control-Allow-Origin': '*'
+                    },
+                    'isBase64Encoded': False,
+                    'body': json.dumps({
+                        'success': True,
+                        'results': results,
+                        'counts': {'deleted': len(deleted), 'not_found': len(ids) - len(deleted)}
+                    })
+                }
             
             if not fine_id:
                 return {
@@ -84,11 +183,21 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                     'body': json.dumps({'error': 'ID штрафа обязателен'})
                 }
             
-            cur.execute("DELETE FROM fines WHERE id = %s", (fine_id,))
-            conn.commit()
+            try:
+                ids = parse_ids([fine_id])
+            except ValueError as e:
+                return {
+                    'statusCode': 400,
+                    'headers': {
+                        'Content-Type': 'application/json',
+                        'Access-Control-Allow-Origin': '*'
+                    },
+                    'isBase64Encoded': False,
+                    'body': json.dumps({'error': str(e)})
+                }
             
-            cur.close()
-            conn.close()
+            archive_fines(cur, 'fines', ids, deleted_by, reason)
+            conn.commit()
             
             return {
                 'statusCode': 200,
@@ -109,6 +218,17 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'isBase64Encoded': False,
             'body': json.dumps({'error': 'Метод не поддерживается'})
         }
+    
+    except PoolTimeout as e:
+        return {
+            'statusCode': 503,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            },
+            'isBase64Encoded': False,
+            'body': json.dumps({'error': str(e)})
+        }
         
     except Exception as e:
         return {
@@ -120,3 +240,8 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'isBase64Encoded': False,
             'body': json.dumps({'error': str(e)})
         }
+    
+    finally:
+        if cur is not None:
+            cur.close()
+        release_connection(conn)
@@ -1,14 +1,224 @@
 '''
 Business: Проверка штрафов через API ГИБДД по номеру водительского удостоверения и СТС
-Args: event - dict с httpMethod, body, queryStringParameters
+Args: event - dict с httpMethod, body (licenseNumber и stsNumber либо pairs/source=fleet для пакетной проверки), queryStringParameters
       context - object с attributes: request_id, function_name
 Returns: HTTP response dict с данными о штрафах из ГИБДД
 '''
 import json
-import random
-from typing import Dict, Any
-from datetime import datetime, timedelta
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, List, Optional
+from datetime import datetime, date
 
+from psycopg2.extras import execute_values
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from shared.gibdd_client import get_client, UpstreamUnavailable
+from shared.batch import MAX_BATCH_SIZE
+from shared.db import connection, PoolTimeout
+from shared.plates import normalize_plate
+from shared.cache import invalidate_vehicles
+from shared.partitions import maintain_partitions
+from shared.instrument import instrumented
+from shared.compress import compressed
+from shared.notifications import DISCOUNT_DAYS
+
+BATCH_CONCURRENCY = int(os.environ.get('GIBDD_BATCH_CONCURRENCY', '8'))
+
+def with_discounts(fines: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    today = date.today()
+    result = []
+    for fine in fines:
+        days_ago = (today - datetime.strptime(fine['violationDate'][:10], '%Y-%m-%d').date()).days
+        discount = days_ago <= DISCOUNT_DAYS
+        result.append(dict(fine, discount=discount, discountAmount=fine['amount'] // 2 if discount else 0))
+    return result
+
+def build_check_result(license_number: str, sts_number: str, check: Dict[str, Any]) -> Dict[str, Any]:
+    fines = with_discounts(check['fines'])
+    return {
+        'success': True,
+        'licenseNumber': license_number,
+        'stsNumber': sts_number,
+        'foundFines': len(fines),
+        'totalAmount': sum(f['amount'] for f in fines),
+        'totalWithDiscount': sum(f['discountAmount'] if f['discount'] else f['amount'] for f in fines),
+        'fines': fines,
+        'checkedAt': check['checkedAt'],
+        'source': check['source'],
+        'cached': check['cached'],
+        'stale': check['stale']
+    }
+
+def failed_pair(pair: Dict[str, Any], error: str) -> Dict[str, Any]:
+    return {'success': False, 'licenseNumber': str(pair.get('licenseNumber') or ''),
+            'stsNumber': str(pair.get('stsNumber') or ''), 'error': error}
+
+def check_pair(pair: Dict[str, Any]) -> Dict[str, Any]:
+    license_number = str(pair.get('licenseNumber') or '')
+    sts_number = str(pair.get('stsNumber') or '')
+    if not license_number or not sts_number:
+        return failed_pair(pair, 'Необходимо указать номер ВУ и СТС')
+    try:
+        result = build_check_result(license_number, sts_number, get_client().check(license_number, sts_number))
+    except UpstreamUnavailable as e:
+        return failed_pair(pair, str(e))
+    for field in ('driverId', 'driverName', 'vehicleId', 'licensePlate'):
+        if pair.get(field) is not None:
+            result[field] = pair[field]
+    return result
+
+def load_fleet_pairs(cur, limit: int) -> List[Dict[str, Any]]:
+    cur.execute('''
+        SELECT d.id, d.name, d.license_number, v.id, v.license_plate, v.sts_number
+        FROM vehicles v
+        JOIN drivers d ON d.id = v.owner_id
+        WHERE v.sts_number IS NOT NULL AND v.sts_number <> ''
+        ORDER BY v.id
+        LIMIT %s
+    ''', (limit,))
+    return [
+        {'driverId': row[0], 'driverName': row[1], 'licenseNumber': row[2],
+         'vehicleId': row[3], 'licensePlate': row[4], 'stsNumber': row[5]}
+        for row in cur.fetchall()
+    ]
+
+def persist_found_fines(cur, results: List[Dict[str, Any]]) -> int:
+    rows = []
+    for result in results:
+        if not result['success']:
+            continue
+        for fine in result['fines']:
+            rows.append((
+                fine['uinNumber'],
+                result.get('driverId'),
+                result.get('vehicleId'),
+                result.get('driverName') or 'Не указан',
+                normalize_plate(result.get('licensePlate')) or 'Не указан',
+                fine['violationType'],
+                fine['violationDate'],
+                fine['amount'],
+                fine.get('status', 'Не оплачен'),
+                fine.get('location') or 'Не указано'
+            ))
+    if not rows:
+        return 0
+    
+    inserted = execute_values(cur, '''
+        INSERT INTO gibdd_fines (
+            violation_number, driver_id, vehicle_id, driver_name, license_plate,
+            violation_type, violation_date, amount, status, location
+        ) VALUES %s
+        RETURNING id
+    ''', rows, page_size=len(rows), fetch=True)
+    return len(inserted)
+
+def check_fleet(pairs: List[Dict[str, Any]], concurrency: int) -> List[Dict[str, Any]]:
+    results: List[Optional[Dict[str, Any]]] = [None] * len(pairs)
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(pairs)))) as pool:
+        futures = {pool.submit(check_pair, pair): index for index, pair in enumerate(pairs)}
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                results[index] = future.result()
+            except Exception as e:
+                results[index] = failed_pair(pairs[index], f'Ошибка проверки: {e}')
+    return results
+
+def fleet_totals(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    succeeded = [r for r in results if r['success']]
+    return {
+        'pairs': len(results),
+        'succeeded': len(succeeded),
+        'failed': len(results) - len(succeeded),
+        'foundFines': sum(r['foundFines'] for r in succeeded),
+        'totalAmount': sum(r['totalAmount'] for r in succeeded),
+        'totalWithDiscount': sum(r['totalWithDiscount'] for r in succeeded)
+    }
+
+def handle_batch(body_data: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        concurrency = min(max(int(body_data.get('concurrency') or BATCH_CONCURRENCY), 1), 32)
+    except (ValueError, TypeError):
+        return {
+            'statusCode': 400,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'isBase64Encoded': False,
+            'body': json.dumps({'error': 'Некорректное значение concurrency'})
+        }
+    persist = bool(body_data.get('persist'))
+    use_fleet = body_data.get('source') == 'fleet'
+    truncated = False
+    
+    try:
+        if use_fleet:
+            with connection() as conn:
+                with conn.cursor() as cur:
+                    pairs = load_fleet_pairs(cur, MAX_BATCH_SIZE + 1)
+                conn.rollback()
+            truncated = len(pairs) > MAX_BATCH_SIZE
+            pairs = pairs[:MAX_BATCH_SIZE]
+        else:
+            pairs = body_data.get('pairs')
+        if not isinstance(pairs, list) or not pairs or len(pairs) > MAX_BATCH_SIZE:
+            return {
+                'statusCode': 400,
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                'isBase64Encoded': False,
+                'body': json.dumps({'error': f'Укажите от 1 до {MAX_BATCH_SIZE} пар ВУ и СТС'})
+            }
+        
+        results = check_fleet([p if isinstance(p, dict) else {} for p in pairs], concurrency)
+        totals = fleet_totals(results)
+        if use_fleet:
+            totals['truncated'] = truncated
+            totals['fleetLimit'] = MAX_BATCH_SIZE
+        
+        if persist:
+            maintain_partitions()
+            with connection() as conn:
+                with conn.cursor() as cur:
+                    totals['persisted'] = persist_found_fines(cur, results)
+                conn.commit()
+            if totals['persisted']:
+                touched = [r for r in results if r['success'] and r['fines']]
+                invalidate_vehicles([r.get('vehicleId') for r in touched],
+                                    [normalize_plate(r.get('licensePlate')) for r in touched])
+    except PoolTimeout as e:
+        return {
+            'statusCode': 503,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'isBase64Encoded': False,
+            'body': json.dumps({'error': str(e)})
+        }
+    except Exception as e:
+        return {
+            'statusCode': 500,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'isBase64Encoded': False,
+            'body': json.dumps({'error': str(e)})
+        }
+    
+    if body_data.get('format') == 'ndjson':
+        lines = [json.dumps(r, ensure_ascii=False) for r in results]
+        lines.append(json.dumps({'totals': totals}, ensure_ascii=False))
+        return {
+            'statusCode': 200,
+            'headers': {'Content-Type': 'application/x-ndjson', 'Access-Control-Allow-Origin': '*'},
+            'isBase64Encoded': False,
+            'body': '\n'.join(lines) + '\n'
+        }
+    
+    return {
+        'statusCode': 200,
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+        'isBase64Encoded': False,
+        'body': json.dumps({'success': True, 'results': results, 'totals': totals})
+    }
+
+@instrumented('gibdd-api-check')
+@compressed
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     method: str = event.get('httpMethod', 'GET')
     
@@ -17,18 +227,48 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'statusCode': 200,
             'headers': {
                 'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'POST, OPTIONS',
+                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
                 'Access-Control-Allow-Headers': 'Content-Type, X-User-Id',
                 'Access-Control-Max-Age': '86400'
             },
             'body': ''
         }
     
+    if method == 'GET':
+        params = event.get('queryStringParameters', {}) or {}
+        if params.get('action') == 'metrics':
+            return {
+                'statusCode': 200,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'isBase64Encoded': False,
+                'body': json.dumps({'gibdd': get_client().metrics()})
+            }
+    
     if method == 'POST':
         body_str = event.get('body', '{}')
         if not body_str or body_str.strip() == '':
             body_str = '{}'
-        body_data = json.loads(body_str)
+        try:
+            body_data = json.loads(body_str)
+        except ValueError:
+            body_data = None
+        if not isinstance(body_data, dict):
+            return {
+                'statusCode': 400,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'isBase64Encoded': False,
+                'body': json.dumps({'error': 'Некорректный JSON в теле запроса'})
+            }
+        
+        if 'pairs' in body_data or body_data.get('source') == 'fleet':
+            return handle_batch(body_data)
+        
         license_number = body_data.get('licenseNumber', '')
         sts_number = body_data.get('stsNumber', '')
         
@@ -43,48 +283,20 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 'body': json.dumps({'error': 'Необходимо указать номер ВУ и СТС'})
             }
         
-        mock_fines = []
-        num_fines = random.randint(0, 3)
-        
-        violation_types = [
-            'Превышение скорости',
-            'Нарушение правил парковки',
-            'Проезд на красный свет',
-            'Непредоставление преимущества пешеходу',
-            'Использование телефона за рулем'
-        ]
-        
-        for i in range(num_fines):
-            days_ago = random.randint(1, 180)
-            violation_date = datetime.now() - timedelta(days=days_ago)
-            
-            mock_fines.append({
-                'uinNumber': f'188{random.randint(10000000, 99999999)}',
-                'violationType': random.choice(violation_types),
-                'violationDate': violation_date.strftime('%Y-%m-%d'),
-                'amount': random.choice([1500, 3000, 5000, 15000, 20000, 25000, 30000]),
-                'discount': days_ago <= 20,
-                'discountAmount': 0,
-                'status': random.choice(['Не оплачен', 'Не оплачен', 'В обработке']),
-                'location': f'МКАД {random.randint(1, 109)}км',
-                'canPay': True
-            })
-        
-        for fine in mock_fines:
-            if fine['discount']:
-                fine['discountAmount'] = fine['amount'] // 2
+        try:
+            check = get_client().check(license_number, sts_number)
+        except UpstreamUnavailable as e:
+            return {
+                'statusCode': 503,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'isBase64Encoded': False,
+                'body': json.dumps({'error': str(e)})
+            }
         
-        result = {
-            'success': True,
-            'licenseNumber': license_number,
-            'stsNumber': sts_number,
-            'foundFines': len(mock_fines),
-            'totalAmount': sum(f['amount'] for f in mock_fines),
-            'totalWithDiscount': sum(f['discountAmount'] if f['discount'] else f['amount'] for f in mock_fines),
-            'fines': mock_fines,
-            'checkedAt': datetime.now().isoformat(),
-            'source': 'ГИБДД API (тестовый режим)'
-        }
+        result = build_check_result(license_number, sts_number, check)
         
         return {
             'statusCode': 200,
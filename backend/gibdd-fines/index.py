@@ -5,17 +5,143 @@ Args: event - dict с httpMethod, body, queryStringParameters, pathParams
 Returns: HTTP response dict с данными штрафов
 '''
 
+import base64
+import io
 import json
 import os
-from typing import Dict, Any
+import sys
+from typing import Dict, Any, List, Tuple, Optional
 from datetime import datetime
-import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 
-def get_db_connection():
-    database_url = os.environ.get('DATABASE_URL')
-    return psycopg2.connect(database_url, cursor_factory=RealDictCursor)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from shared.db import get_connection, release_connection, PoolTimeout
+from shared.plates import normalize_plate, is_plate
+from shared.batch import parse_ids, MAX_BATCH_SIZE
+from shared.pagination import parse_date_filter
+from shared.fines_import import import_fines
+from shared.cache import get_cache, invalidate_vehicles
+from shared.archive import archive_fines
+from shared.analytics import DELETED_STATUS
+from shared.partitions import maintain_partitions, FINE_ID_DATE_FILTER, FINE_IDS_DATE_FILTER
+from shared.serialize import RowEncoder, as_str, dumps
+from shared.instrument import instrumented
+from shared.compress import compressed
 
+FINE_FIELDS = [
+    'violation_number', 'driver_id', 'vehicle_id', 'driver_name',
+    'license_plate', 'violation_type', 'violation_date', 'amount',
+    'status', 'location', 'description'
+]
+REQUIRED_FINE_FIELDS = [
+    'violation_number', 'driver_name', 'license_plate',
+    'violation_type', 'violation_date', 'amount', 'location'
+]
+UPDATABLE_FIELDS = ['status', 'amount', 'description', 'payment_date']
+
+TouchedFine = Tuple[int, str, Optional[int]]
+
+FINE_ENCODER = RowEncoder([
+    ('id', None),
+    ('violation_number', None),
+    ('driver_id', None),
+    ('vehicle_id', None),
+    ('driver_name', None),
+    ('license_plate', None),
+    ('violation_type', None),
+    ('violation_date', as_str),
+    ('amount', as_str),
+    ('status', None),
+    ('location', None),
+    ('description', None),
+    ('payment_date', as_str),
+    ('created_at', as_str)
+])
+RANKED_FINE_ENCODER = RowEncoder(FINE_ENCODER.columns + [('rank', None)])
+FINE_COLUMNS = ', '.join(FINE_ENCODER.keys)
+
+def fine_values(body_data: Dict[str, Any]) -> tuple:
+    return (
+        body_data.get('violation_number'),
+        body_data.get('driver_id'),
+        body_data.get('vehicle_id'),
+        body_data.get('driver_name'),
+        normalize_plate(body_data.get('license_plate')),
+        body_data.get('violation_type'),
+        body_data.get('violation_date'),
+        body_data.get('amount'),
+        body_data.get('status', 'Не оплачен'),
+        body_data.get('location'),
+        body_data.get('description')
+    )
+
+def insert_fines_batch(cur, items: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], List[TouchedFine]]:
+    results: List[Dict[str, Any]] = []
+    rows = []
+    pending = []
+    
+    for index, item in enumerate(items):
+        missing = [field for field in REQUIRED_FINE_FIELDS if not isinstance(item, dict) or item.get(field) in (None, '')]
+        if missing:
+            results.append({'index': index, 'result': 'rejected', 'error': f"Не заполнены поля: {', '.join(missing)}"})
+            continue
+        rows.append(fine_values(item))
+        pending.append(index)
+    
+    created_ids: Dict[str, int] = {}
+    inserted = []
+    if rows:
+        inserted = execute_values(cur, f'''
+            INSERT INTO gibdd_fines ({', '.join(FINE_FIELDS)})
+            VALUES %s
+            RETURNING id, violation_number, vehicle_id, license_plate
+        ''', rows, page_size=len(rows), fetch=True)
+        created_ids = {row['violation_number']: row['id'] for row in inserted}
+    
+    for index in pending:
+        violation_number = items[index]['violation_number']
+        if violation_number in created_ids:
+            results.append({'index': index, 'result': 'created', 'id': created_ids.pop(violation_number)})
+        else:
+            results.append({'index': index, 'result': 'duplicate', 'violation_number': violation_number})
+    
+    results.sort(key=lambda r: r['index'])
+    return summarize(results), [(row['id'], row['license_plate'], row['vehicle_id']) for row in inserted]
+
+def update_fines_batch(cur, ids: List[int], body_data: Dict[str, Any]) -> Tuple[Dict[str, Any], List[TouchedFine]]:
+    update_fields = [f'{field} = %s' for field in UPDATABLE_FIELDS if field in body_data]
+    update_values = [body_data[field] for field in UPDATABLE_FIELDS if field in body_data]
+    update_fields.append('updated_at = CURRENT_TIMESTAMP')
+    
+    cur.execute(f'''
+        UPDATE gibdd_fines
+        SET {', '.join(update_fields)}
+        WHERE id = ANY(%s) AND {FINE_IDS_DATE_FILTER}
+        RETURNING id, vehicle_id, license_plate
+    ''', update_values + [ids, ids])
+    touched = [(row['id'], row['license_plate'], row['vehicle_id']) for row in cur.fetchall()]
+    updated = {row[0] for row in touched}
+    
+    return summarize([{'id': fine_id, 'result': 'updated' if fine_id in updated else 'not_found'} for fine_id in ids]), touched
+
+def delete_fines_batch(cur, ids: List[int], deleted_by: Optional[str] = None,
+                       reason: Optional[str] = None) -> Tuple[Dict[str, Any], List[TouchedFine]]:
+    touched = archive_fines(cur, 'gibdd_fines', ids, deleted_by, reason)
+    deleted = {row[0] for row in touched}
+    
+    return summarize([{'id': fine_id, 'result': 'deleted' if fine_id in deleted else 'not_found'} for fine_id in ids]), touched
+
+def invalidate_fine_vehicles(touched: List[TouchedFine]) -> None:
+    invalidate_vehicles([vehicle_id for _, _, vehicle_id in touched], [plate for _, plate, _ in touched])
+
+def summarize(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    counts: Dict[str, int] = {}
+    for item in results:
+        counts[item['result']] = counts.get(item['result'], 0) + 1
+    return {'results': results, 'counts': counts}
+
+@instrumented('gibdd-fines')
+@compressed
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     method: str = event.get('httpMethod', 'GET')
     
@@ -32,22 +158,22 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'isBase64Encoded': False
         }
     
-    conn = get_db_connection()
-    cur = conn.cursor()
+    params = event.get('queryStringParameters', {}) or {}
+    deleted_by = (event.get('headers') or {}).get('X-User-Id')
+    conn = None
+    cur = None
     
     try:
+        conn = get_connection()
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        
         if method == 'GET':
             fine_id = event.get('pathParams', {}).get('id')
             
             if fine_id:
-                cur.execute('''
-                    SELECT id, violation_number, driver_id, vehicle_id, 
-                           driver_name, license_plate, violation_type, 
-                           violation_date, amount, status, location, 
-                           description, payment_date, created_at
-                    FROM gibdd_fines WHERE id = %s
-                ''', (fine_id,))
-                fine = cur.fetchone()
+                with conn.cursor() as row_cur:
+                    row_cur.execute(f'SELECT {FINE_COLUMNS} FROM gibdd_fines WHERE id = %s AND {FINE_ID_DATE_FILTER}', (fine_id, fine_id))
+                    fine = row_cur.fetchone()
                 
                 if not fine:
                     return {
@@ -60,77 +186,157 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 return {
                     'statusCode': 200,
                     'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                    'body': json.dumps(dict(fine), default=str),
+                    'body': dumps(FINE_ENCODER.row(fine)),
+                    'isBase64Encoded': False
+                }
+            
+            try:
+                date_from = parse_date_filter(params.get('dateFrom'))
+                date_to = parse_date_filter(params.get('dateTo'))
+            except (ValueError, TypeError):
+                return {
+                    'statusCode': 400,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps({'error': 'Некорректный формат dateFrom или dateTo'}),
                     'isBase64Encoded': False
                 }
             
-            params = event.get('queryStringParameters', {}) or {}
             status_filter = params.get('status')
-            search = params.get('search')
-            
-            query = '''
-                SELECT id, violation_number, driver_id, vehicle_id, 
-                       driver_name, license_plate, violation_type, 
-                       violation_date, amount, status, location, 
-                       description, payment_date, created_at
-                FROM gibdd_fines WHERE 1=1
-            '''
+            search = (params.get('search') or '').strip()
+            ranked = params.get('mode') == 'ranked'
+            
             query_params = []
             
+            if search and ranked:
+                query = f'''
+                    SELECT {FINE_COLUMNS},
+                           GREATEST(similarity(driver_name, %s),
+                                    similarity(license_plate, %s),
+                                    similarity(violation_number, %s)) AS rank
+                    FROM gibdd_fines
+                    WHERE (driver_name %% %s OR license_plate %% %s OR violation_number %% %s)
+                '''
+                plate_term = normalize_plate(search)
+                query_params.extend([search, plate_term, search, search, plate_term, search])
+            else:
+                query = f'SELECT {FINE_COLUMNS} FROM gibdd_fines WHERE 1=1'
+            
             if status_filter:
                 query += ' AND status = %s'
                 query_params.append(status_filter)
             
-            if search:
-                query += ''' AND (
-                    driver_name ILIKE %s OR 
-                    license_plate ILIKE %s OR 
-                    violation_number ILIKE %s
-                )'''
-                search_pattern = f'%{search}%'
-                query_params.extend([search_pattern, search_pattern, search_pattern])
+            if date_from:
+                query += ' AND violation_date >= %s'
+                query_params.append(date_from)
+            
+            if date_to:
+                query += ' AND violation_date <= %s'
+                query_params.append(date_to)
+            
+            if search and not ranked:
+                if is_plate(search):
+                    query += ' AND license_plate = %s'
+                    query_params.append(normalize_plate(search))
+                else:
+                    query += ''' AND (
+                        driver_name ILIKE %s OR 
+                        license_plate ILIKE %s OR 
+                        violation_number ILIKE %s
+                    )'''
+                    search_pattern = f'%{search}%'
+                    query_params.extend([search_pattern, f'%{normalize_plate(search)}%', search_pattern])
             
-            query += ' ORDER BY violation_date DESC LIMIT 1000'
+            if search and ranked:
+                query += ' ORDER BY rank DESC, violation_date DESC LIMIT 1000'
+            else:
+                query += ' ORDER BY violation_date DESC LIMIT 1000'
             
-            cur.execute(query, query_params)
-            fines = cur.fetchall()
+            with conn.cursor() as row_cur:
+                row_cur.execute(query, query_params)
+                fines = row_cur.fetchall()
             
+            encoder = RANKED_FINE_ENCODER if search and ranked else FINE_ENCODER
             return {
                 'statusCode': 200,
                 'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps([dict(f) for f in fines], default=str),
+                'body': dumps(encoder.rows(fines)),
                 'isBase64Encoded': False
             }
         
         if method == 'POST':
-            body_data = json.loads(event.get('body', '{}'))
-            
-            cur.execute('''
-                INSERT INTO gibdd_fines (
-                    violation_number, driver_id, vehicle_id, driver_name,
-                    license_plate, violation_type, violation_date, amount,
-                    status, location, description
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            maintain_partitions()
+        
+        if method == 'POST' and params.get('action') == 'import':
+            fmt = params.get('format', 'csv')
+            body = event.get('body') or ''
+            if event.get('isBase64Encoded'):
+                body = base64.b64decode(body).decode('utf-8')
+            
+            try:
+                report = import_fines(conn, io.StringIO(body), fmt)
+            except ValueError as e:
+                conn.rollback()
+                return {
+                    'statusCode': 400,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps({'error': str(e)}),
+                    'isBase64Encoded': False
+                }
+            conn.commit()
+            if report['inserted'] or report['updated']:
+                get_cache('vehicles').clear()
+            
+            return {
+                'statusCode': 200,
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                'body': json.dumps(report),
+                'isBase64Encoded': False
+            }
+        
+        if method == 'POST':
+            body_data = json.loads(event.get('body') or '{}')
+            
+            if isinstance(body_data.get('fines'), list):
+                if len(body_data['fines']) > MAX_BATCH_SIZE:
+                    return {
+                        'statusCode': 400,
+                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                        'body': json.dumps({'error': f'Не более {MAX_BATCH_SIZE} штрафов за запрос'}),
+                        'isBase64Encoded': False
+                    }
+                
+                batch_result, touched = insert_fines_batch(cur, body_data['fines'])
+                conn.commit()
+                invalidate_fine_vehicles(touched)
+                
+                return {
+                    'statusCode': 200,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps(batch_result, default=str),
+                    'isBase64Encoded': False
+                }
+            
+            cur.execute(f'''
+                INSERT INTO gibdd_fines ({', '.join(FINE_FIELDS)})
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                 RETURNING id, violation_number, driver_name, license_plate,
                           violation_type, violation_date, amount, status,
                           location, description, created_at
-            ''', (
-                body_data.get('violation_number'),
-                body_data.get('driver_id'),
-                body_data.get('vehicle_id'),
-                body_data.get('driver_name'),
-                body_data.get('license_plate'),
-                body_data.get('violation_type'),
-                body_data.get('violation_date'),
-                body_data.get('amount'),
-                body_data.get('status', 'Не оплачен'),
-                body_data.get('location'),
-                body_data.get('description')
-            ))
+            ''', fine_values(body_data))
             
             new_fine = cur.fetchone()
             conn.commit()
             
+            if not new_fine:
+                return {
+                    'statusCode': 409,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps({'error': 'Штраф с таким номером постановления уже существует'}),
+                    'isBase64Encoded': False
+                }
+            
+            invalidate_vehicles([body_data.get('vehicle_id')], [new_fine['license_plate']])
+            
             return {
                 'statusCode': 201,
                 'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
@@ -139,7 +345,42 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             }
         
         if method == 'PUT':
-            fine_id = event.get('pathParams', {}).get('id')
+            body_data = json.loads(event.get('body') or '{}')
+            
+            if 'ids' in body_data:
+                try:
+                    ids = parse_ids(body_data['ids'])
+                except ValueError as e:
+                    return {
+                        'statusCode': 400,
+                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                        'body': json.dumps({'error': str(e)}),
+                        'isBase64Encoded': False
+                    }
+                
+                if not any(field in body_data for field in UPDATABLE_FIELDS):
+                    return {
+                        'statusCode': 400,
+                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                        'body': json.dumps({'error': 'Нет полей для обновления'}),
+                        'isBase64Encoded': False
+                    }
+                
+                if body_data.get('status') == DELETED_STATUS:
+                    batch_result, touched = delete_fines_batch(cur, ids, deleted_by, body_data.get('reason'))
+                else:
+                    batch_result, touched = update_fines_batch(cur, ids, body_data)
+                conn.commit()
+                invalidate_fine_vehicles(touched)
+                
+                return {
+                    'statusCode': 200,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps(batch_result),
+                    'isBase64Encoded': False
+                }
+            
+            fine_id = (event.get('pathParams') or {}).get('id') or body_data.get('id')
             if not fine_id:
                 return {
                     'statusCode': 400,
@@ -148,12 +389,38 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                     'isBase64Encoded': False
                 }
             
-            body_data = json.loads(event.get('body', '{}'))
+            if body_data.get('status') == DELETED_STATUS:
+                try:
+                    touched = archive_fines(cur, 'gibdd_fines', parse_ids([fine_id]), deleted_by, body_data.get('reason'))
+                except ValueError as e:
+                    return {
+                        'statusCode': 400,
+                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                        'body': json.dumps({'error': str(e)}),
+                        'isBase64Encoded': False
+                    }
+                conn.commit()
+                invalidate_fine_vehicles(touched)
+                
+                if not touched:
+                    return {
+                        'statusCode': 404,
+                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                        'body': json.dumps({'error': 'Штраф не найден'}),
+                        'isBase64Encoded': False
+                    }
+                
+                return {
+                    'statusCode': 200,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps({'id': touched[0][0], 'status': DELETED_STATUS, 'archived': True}),
+                    'isBase64Encoded': False
+                }
             
             update_fields = []
             update_values = []
             
-            for field in ['status', 'amount', 'description', 'payment_date']:
+            for field in UPDATABLE_FIELDS:
                 if field in body_data:
                     update_fields.append(f'{field} = %s')
                     update_values.append(body_data[field])
@@ -167,21 +434,25 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 }
             
             update_fields.append('updated_at = CURRENT_TIMESTAMP')
-            update_values.append(fine_id)
+            update_values.extend([fine_id, fine_id])
             
             query = f'''
                 UPDATE gibdd_fines 
                 SET {', '.join(update_fields)}
-                WHERE id = %s
+                WHERE id = %s AND {FINE_ID_DATE_FILTER}
                 RETURNING id, violation_number, driver_name, license_plate,
                           violation_type, violation_date, amount, status,
-                          location, description, payment_date, updated_at
+                          location, description, payment_date, updated_at,
+                          vehicle_id
             '''
             
             cur.execute(query, update_values)
             updated_fine = cur.fetchone()
             conn.commit()
             
+            if updated_fine:
+                invalidate_vehicles([updated_fine.pop('vehicle_id')], [updated_fine['license_plate']])
+            
             if not updated_fine:
                 return {
                     'statusCode': 404,
@@ -197,6 +468,31 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 'isBase64Encoded': False
             }
         
+        if method == 'DELETE':
+            body_data = json.loads(event.get('body') or '{}')
+            fine_id = (event.get('pathParams') or {}).get('id')
+            
+            try:
+                ids = parse_ids(body_data.get('ids') if 'ids' in body_data else [fine_id] if fine_id else [])
+            except ValueError as e:
+                return {
+                    'statusCode': 400,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps({'error': str(e)}),
+                    'isBase64Encoded': False
+                }
+            
+            batch_result, touched = delete_fines_batch(cur, ids, deleted_by, body_data.get('reason'))
+            conn.commit()
+            invalidate_fine_vehicles(touched)
+            
+            return {
+                'statusCode': 200,
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                'body': json.dumps(batch_result),
+                'isBase64Encoded': False
+            }
+        
         return {
             'statusCode': 405,
             'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
@@ -204,8 +500,17 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'isBase64Encoded': False
         }
     
+    except PoolTimeout as e:
+        return {
+            'statusCode': 503,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': str(e)}),
+            'isBase64Encoded': False
+        }
+    
     except Exception as e:
-        conn.rollback()
+        if conn is not None:
+            conn.rollback()
         return {
             'statusCode': 500,
             'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
@@ -214,5 +519,6 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         }
     
     finally:
-        cur.close()
-        conn.close()
+        if cur is not None:
+            cur.close()
+        release_connection(conn)
@@ -0,0 +1,149 @@
+'''
+Business: Агрегаты по штрафам (итоги, статусы, типы нарушений, помесячная и подневная динамика) из суточных агрегатов
+          fine_stats_daily, топ нарушителей из fine_stats_violators (с фильтром по датам - по диапазону исходной таблицы)
+Args: cur - курсор psycopg2, source - источник штрафов (gibdd_fines, fines), filters - dateFrom, dateTo, status,
+      days - число последних дней для byDay, top - размер топа нарушителей
+Returns: dict со сводной статистикой для дашборда и страницы аналитики
+'''
+from typing import Dict, Any, List, Tuple
+
+ANALYTICS_SOURCES = {
+    'gibdd_fines': 'gibdd_fines',
+    'fines': 'fines'
+}
+
+PAID_STATUSES = ('Оплачен',)
+UNPAID_STATUSES = ('Не оплачен', 'Неоплачен')
+DELETED_STATUS = 'Удален'
+
+MAX_DAYS = 366
+MAX_TOP = 50
+
+
+def _where(filters: Dict[str, Any], date_column: str, alias: str = '') -> Tuple[str, List[Any]]:
+    clause = ''
+    query_params: List[Any] = []
+
+    if filters.get('dateFrom'):
+        clause += f' AND {alias}{date_column} >= %s::date'
+        query_params.append(filters['dateFrom'])
+
+    if filters.get('dateTo'):
+        clause += f' AND {alias}{date_column} <= %s::date'
+        query_params.append(filters['dateTo'])
+
+    if filters.get('status'):
+        clause += f' AND {alias}status = %s'
+        query_params.append(filters['status'])
+
+    return clause, query_params
+
+
+def fetch_analytics(cur, source: str, filters: Dict[str, Any], days: int = 0, top: int = 0) -> Dict[str, Any]:
+    clause, clause_params = _where(filters, 'day')
+    cur.execute(f'''
+        SELECT status, violation_type,
+               to_char(date_trunc('month', day), 'YYYY-MM') AS month,
+               SUM(fines_count), SUM(total_amount)
+        FROM fine_stats_daily
+        WHERE source = %s{clause}
+        GROUP BY 1, 2, 3 HAVING SUM(fines_count) <> 0
+    ''', [ANALYTICS_SOURCES[source]] + clause_params)
+    analytics = build_analytics(cur.fetchall())
+
+    if days:
+        clause, clause_params = _where(filters, 'day', 's.')
+        cur.execute(f'''
+            SELECT to_char(d.day, 'YYYY-MM-DD'),
+                   COALESCE(SUM(s.fines_count), 0),
+                   COALESCE(SUM(s.total_amount), 0),
+                   COALESCE(SUM(s.total_amount) FILTER (WHERE s.status = ANY(%s)), 0)
+            FROM generate_series(CURRENT_DATE - %s + 1, CURRENT_DATE, interval '1 day') AS d(day)
+            LEFT JOIN fine_stats_daily s
+              ON s.day = d.day::date AND s.source = %s AND s.status <> %s{clause}
+            GROUP BY d.day
+            ORDER BY d.day
+        ''', [list(PAID_STATUSES), days, ANALYTICS_SOURCES[source], DELETED_STATUS] + clause_params)
+        analytics['byDay'] = [
+            {'day': day, 'count': int(count), 'amount': float(amount), 'paidAmount': float(paid)}
+            for day, count, amount, paid in cur.fetchall()
+        ]
+
+    if top:
+        clause, clause_params = _where(filters, 'violation_date')
+        if filters.get('dateFrom') or filters.get('dateTo'):
+            cur.execute(f'''
+                SELECT driver_name, license_plate, COUNT(*), SUM(amount)
+                FROM {ANALYTICS_SOURCES[source]}
+                WHERE status <> %s{clause}
+                GROUP BY driver_name, license_plate
+                ORDER BY COUNT(*) DESC, SUM(amount) DESC, driver_name, license_plate
+                LIMIT %s
+            ''', [DELETED_STATUS] + clause_params + [top])
+        else:
+            cur.execute(f'''
+                SELECT NULLIF(driver_name, ''), NULLIF(license_plate, ''), SUM(fines_count), SUM(total_amount)
+                FROM fine_stats_violators
+                WHERE source = %s AND status <> %s{clause}
+                GROUP BY driver_name, license_plate
+                HAVING SUM(fines_count) > 0
+                ORDER BY 3 DESC, 4 DESC, driver_name, license_plate
+                LIMIT %s
+            ''', [ANALYTICS_SOURCES[source], DELETED_STATUS] + clause_params + [top])
+        analytics['topViolators'] = [
+            {'driverName': driver_name, 'licensePlate': license_plate, 'count': int(count), 'amount': float(amount or 0)}
+            for driver_name, license_plate, count, amount in cur.fetchall()
+        ]
+
+    return analytics
+
+
+def build_analytics(groups: List[Tuple[str, str, str, int, Any]]) -> Dict[str, Any]:
+    totals = {
+        'count': 0,
+        'amount': 0.0,
+        'paidCount': 0,
+        'paidAmount': 0.0,
+        'unpaidCount': 0,
+        'unpaidAmount': 0.0
+    }
+    by_status: Dict[str, Dict[str, Any]] = {}
+    by_type: Dict[str, Dict[str, Any]] = {}
+    by_month: Dict[str, Dict[str, Any]] = {}
+
+    for status, violation_type, month, count, amount in groups:
+        count = int(count)
+        amount = float(amount)
+
+        status_entry = by_status.setdefault(status, {'status': status, 'count': 0, 'amount': 0.0})
+        status_entry['count'] += count
+        status_entry['amount'] += amount
+
+        if status == DELETED_STATUS:
+            continue
+
+        totals['count'] += count
+        totals['amount'] += amount
+        if status in PAID_STATUSES:
+            totals['paidCount'] += count
+            totals['paidAmount'] += amount
+        elif status in UNPAID_STATUSES:
+            totals['unpaidCount'] += count
+            totals['unpaidAmount'] += amount
+
+        type_entry = by_type.setdefault(violation_type, {'violationType': violation_type, 'count': 0, 'amount': 0.0})
+        type_entry['count'] += count
+        type_entry['amount'] += amount
+
+        month_entry = by_month.setdefault(month, {'month': month, 'count': 0, 'amount': 0.0, 'paidAmount': 0.0})
+        month_entry['count'] += count
+        month_entry['amount'] += amount
+        if status in PAID_STATUSES:
+            month_entry['paidAmount'] += amount
+
+    return {
+        'totals': totals,
+        'byStatus': sorted(by_status.values(), key=lambda e: -e['count']),
+        'byViolationType': sorted(by_type.values(), key=lambda e: -e['count']),
+        'byMonth': [by_month[month] for month in sorted(by_month)]
+    }
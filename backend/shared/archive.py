@@ -0,0 +1,78 @@
+'''
+Business: Архивация удаляемых штрафов в deleted_fines_history одной транзакцией (DELETE ... RETURNING -> INSERT ... SELECT) и помесячная очистка истории
+Args: cur - курсор psycopg2, source - fines или gibdd_fines, ids - id штрафов, deleted_by/reason - кто и почему удалил;
+      очистка из каталога backend: python -m shared.archive purge [месяцев], по умолчанию HISTORY_RETENTION_MONTHS
+Returns: список (fine_id, license_plate, vehicle_id) перенесённых штрафов; число удалённых строк истории
+'''
+import os
+import sys
+from typing import List, Optional, Tuple
+
+from shared.db import connection
+from shared.partitions import FINE_IDS_DATE_FILTER
+
+ARCHIVE_SOURCES = {
+    'fines': '',
+    'gibdd_fines': f' AND f.{FINE_IDS_DATE_FILTER}'
+}
+DEFAULT_DELETED_BY = 'admin'
+DEFAULT_DELETE_REASON = 'Удалено через систему'
+PURGE_BATCH_SIZE = 5000
+
+
+def archive_fines(cur, source: str, ids: List[int], deleted_by: Optional[str] = None,
+                  reason: Optional[str] = None) -> List[Tuple[int, str, Optional[int]]]:
+    if source not in ARCHIVE_SOURCES:
+        raise ValueError(f'Неизвестный источник штрафов: {source}')
+
+    partition_filter = ARCHIVE_SOURCES[source]
+    filter_params = [ids, ids] if partition_filter else [ids]
+
+    with cur.connection.cursor() as archive_cur:
+        archive_cur.execute(f'''
+            WITH moved AS (
+                DELETE FROM {source} f
+                WHERE f.id = ANY(%s){partition_filter}
+                RETURNING f.*
+            )
+            INSERT INTO deleted_fines_history (
+                source, fine_id, violation_number, driver_name, license_plate,
+                violation_type, violation_date, amount, status, location,
+                description, deleted_by, reason, payload
+            )
+            SELECT %s, m.id, m.violation_number, m.driver_name, m.license_plate,
+                   m.violation_type, m.violation_date, m.amount, m.status, m.location,
+                   m.description, %s, %s, to_jsonb(m)
+            FROM moved m
+            RETURNING fine_id, license_plate, (payload->>'vehicle_id')::INTEGER
+        ''', filter_params + [source, deleted_by or DEFAULT_DELETED_BY, reason or DEFAULT_DELETE_REASON])
+        return [tuple(row) for row in archive_cur.fetchall()]
+
+
+def purge_history(conn, keep_months: int, batch_size: int = PURGE_BATCH_SIZE) -> int:
+    total = 0
+    with conn.cursor() as cur:
+        while True:
+            cur.execute('''
+                DELETE FROM deleted_fines_history
+                WHERE id IN (
+                    SELECT id FROM deleted_fines_history
+                    WHERE deleted_at < date_trunc('month', CURRENT_TIMESTAMP) - make_interval(months => %s)
+                    ORDER BY deleted_at
+                    LIMIT %s
+                )
+            ''', (keep_months, batch_size))
+            deleted = cur.rowcount
+            conn.commit()
+            total += deleted
+            if deleted < batch_size:
+                return total
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] != 'purge':
+        sys.exit('Использование: python -m shared.archive purge [месяцев]')
+
+    months = int(sys.argv[2]) if len(sys.argv) > 2 else int(os.environ.get('HISTORY_RETENTION_MONTHS', '36'))
+    with connection() as purge_conn:
+        print(f'deleted_fines_history: {purge_history(purge_conn, months)}')
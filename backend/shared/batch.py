@@ -0,0 +1,52 @@
+'''
+Business: Разбор пакетных запросов: списки ID и строковых ключей (госномера, VIN) из тела или строки запроса с ограничением размера пакета
+Args: value - list из JSON либо строка "1,2,3" из queryStringParameters
+Returns: list уникальных значений в исходном порядке или ValueError при некорректных данных
+'''
+from typing import Any, List
+
+MAX_BATCH_SIZE = 1000
+
+
+def parse_ids(value: Any) -> List[int]:
+    if isinstance(value, str):
+        value = [part for part in value.split(',') if part.strip()]
+    if not isinstance(value, list) or not value:
+        raise ValueError('Список ID пуст')
+    if len(value) > MAX_BATCH_SIZE:
+        raise ValueError(f'Не более {MAX_BATCH_SIZE} элементов за запрос')
+
+    ids: List[int] = []
+    seen = set()
+    for item in value:
+        try:
+            fine_id = int(item)
+        except (TypeError, ValueError):
+            raise ValueError(f'Некорректный ID: {item}')
+        if fine_id not in seen:
+            seen.add(fine_id)
+            ids.append(fine_id)
+    return ids
+
+
+def parse_keys(value: Any, required: bool = True) -> List[str]:
+    if value is None and not required:
+        return []
+    if isinstance(value, str):
+        value = value.split(',')
+    if not isinstance(value, list):
+        raise ValueError('Ожидается список значений')
+
+    keys: List[str] = []
+    seen = set()
+    for item in value:
+        key = str(item).strip() if item is not None else ''
+        if key and key not in seen:
+            seen.add(key)
+            keys.append(key)
+
+    if required and not keys:
+        raise ValueError('Список значений пуст')
+    if len(keys) > MAX_BATCH_SIZE:
+        raise ValueError(f'Не более {MAX_BATCH_SIZE} элементов за запрос')
+    return keys
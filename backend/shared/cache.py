@@ -0,0 +1,244 @@
+'''
+Business: LRU+TTL кэш для горячих проверок ТС и VIN с негативным кэшированием и инвалидацией по тегам (ТС, госномер)
+Args: CACHE_REDIS_URL - общий бэкенд в redis, CACHE_TTL - время жизни в нём, CACHE_LOCAL_TTL - в памяти процесса, CACHE_MAX_ENTRIES, CACHE_NEGATIVE_TTL
+Returns: get_cache(name[, max_entries, ttl]) -> TTLCache с get/set/invalidate_tags/clear/stats; cache_stats() по всем кэшам процесса
+'''
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Iterable, Optional, Set, Tuple
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+MISSING = object()
+_NEGATIVE_MARKER = {'__not_found__': True}
+
+
+class MemoryBackend:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, Tuple[float, Any, Tuple[str, ...]]]' = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.errors = 0
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING
+            expires_at, value, _ = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                return MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float, tags: Iterable[str]) -> None:
+        tags = tuple(tags)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl, value, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        removed = 0
+        with self._lock:
+            for tag in tags:
+                for key in self._tags.pop(tag, set()):
+                    if key in self._entries:
+                        self._remove(key)
+                        removed += 1
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _remove(self, key: str) -> None:
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class RedisBackend:
+    def __init__(self, url: str, namespace: str, tag_ttl: float):
+        self.client = redis.Redis.from_url(url)
+        self.namespace = namespace
+        self.tag_ttl = tag_ttl
+        self.evictions = 0
+        self.errors = 0
+
+    def get(self, key: str) -> Any:
+        try:
+            raw = self.client.get(self._key(key))
+        except redis.RedisError:
+            self.errors += 1
+            return MISSING
+        if raw is None:
+            return MISSING
+        value = json.loads(raw)
+        return None if value == _NEGATIVE_MARKER else value
+
+    def set(self, key: str, value: Any, ttl: float, tags: Iterable[str]) -> None:
+        payload = json.dumps(_NEGATIVE_MARKER if value is None else value, default=str)
+        pipe = self.client.pipeline()
+        pipe.set(self._key(key), payload, px=int(ttl * 1000))
+        for tag in tags:
+            pipe.sadd(self._tag(tag), self._key(key))
+            pipe.pexpire(self._tag(tag), int(max(ttl, self.tag_ttl) * 1000))
+        try:
+            pipe.execute()
+        except redis.RedisError:
+            self.errors += 1
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        removed = 0
+        try:
+            for tag in tags:
+                keys = self.client.smembers(self._tag(tag))
+                if keys:
+                    removed += self.client.delete(*keys)
+                self.client.delete(self._tag(tag))
+        except redis.RedisError:
+            self.errors += 1
+        return removed
+
+    def clear(self) -> None:
+        try:
+            keys = list(self.client.scan_iter(f'{self.namespace}:*'))
+            if keys:
+                self.client.delete(*keys)
+        except redis.RedisError:
+            self.errors += 1
+
+    def size(self) -> int:
+        return sum(1 for _ in self.client.scan_iter(f'{self.namespace}:key:*'))
+
+    def _key(self, key: str) -> str:
+        return f'{self.namespace}:key:{key}'
+
+    def _tag(self, tag: str) -> str:
+        return f'{self.namespace}:tag:{tag}'
+
+
+class TTLCache:
+    def __init__(self, name: str, backend, ttl: float, negative_ttl: float):
+        self.name = name
+        self.backend = backend
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'negativeHits': 0, 'misses': 0, 'sets': 0, 'invalidations': 0}
+
+    def get(self, key: str) -> Any:
+        value = self.backend.get(key)
+        with self._lock:
+            if value is MISSING:
+                self._stats['misses'] += 1
+            elif value is None:
+                self._stats['negativeHits'] += 1
+            else:
+                self._stats['hits'] += 1
+        return value
+
+    def set(self, key: str, value: Optional[Any], tags: Iterable[str] = ()) -> None:
+        ttl = self.negative_ttl if value is None else self.ttl
+        if ttl <= 0:
+            return
+        self.backend.set(key, value, ttl, tags)
+        with self._lock:
+            self._stats['sets'] += 1
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        removed = self.backend.invalidate_tags(tags)
+        with self._lock:
+            self._stats['invalidations'] += removed
+        return removed
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            result = dict(self._stats)
+        lookups = result['hits'] + result['negativeHits'] + result['misses']
+        result['hitRatio'] = round((result['hits'] + result['negativeHits']) / lookups, 4) if lookups else 0.0
+        result['size'] = self.backend.size()
+        result['evictions'] = self.backend.evictions
+        result['errors'] = self.backend.errors
+        result['ttl'] = self.ttl
+        result['backend'] = type(self.backend).__name__
+        return result
+
+
+_caches: Dict[str, TTLCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(name: str, max_entries: Optional[int] = None, ttl: Optional[float] = None) -> TTLCache:
+    cache = _caches.get(name)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.get(name)
+            if cache is None:
+                redis_url = os.environ.get('CACHE_REDIS_URL')
+                if redis_url:
+                    if redis is None:
+                        raise RuntimeError('CACHE_REDIS_URL задан, но пакет redis не установлен')
+                    ttl = float(os.environ.get('CACHE_TTL', '300')) if ttl is None else ttl
+                    backend = RedisBackend(redis_url, f'fms:{name}', ttl)
+                else:
+                    ttl = float(os.environ.get('CACHE_LOCAL_TTL', '5')) if ttl is None else ttl
+                    backend = MemoryBackend(max_entries or int(os.environ.get('CACHE_MAX_ENTRIES', '10000')))
+                cache = TTLCache(
+                    name,
+                    backend,
+                    ttl=ttl,
+                    negative_ttl=min(float(os.environ.get('CACHE_NEGATIVE_TTL', '30')), ttl)
+                )
+                _caches[name] = cache
+    return cache
+
+
+def vehicle_tags(vehicle_id: Optional[int] = None, plate: Optional[str] = None) -> Tuple[str, ...]:
+    tags = []
+    if vehicle_id is not None:
+        tags.append(f'vehicle:{vehicle_id}')
+    if plate:
+        tags.append(f'plate:{plate}')
+    return tuple(tags)
+
+
+def invalidate_vehicles(vehicle_ids: Iterable[Optional[int]] = (), plates: Iterable[Optional[str]] = ()) -> int:
+    tags = [f'vehicle:{vehicle_id}' for vehicle_id in vehicle_ids if vehicle_id is not None]
+    tags.extend(f'plate:{plate}' for plate in plates if plate)
+    if not tags:
+        return 0
+    return get_cache('vehicles').invalidate_tags(set(tags))
+
+
+def cache_stats() -> Dict[str, Any]:
+    with _caches_lock:
+        caches = list(_caches.values())
+    return {cache.name: cache.stats() for cache in caches}
@@ -0,0 +1,145 @@
+'''
+Business: Дельта-синхронизация штрафов: строки, изменённые после водяного знака (updated_at, id), и надгробия из deleted_fines_history
+Args: cur - курсор, source - gibdd_fines или fines, since - токен прошлого ответа или None, limit - строк на страницу; CHANGES_OVERLAP
+Returns: dict с changes, deleted (id, deletedAt), watermark - токен для следующего запроса, hasMore
+'''
+import base64
+import json
+import os
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+from shared.serialize import RowEncoder, iso, as_float, as_str
+
+DEFAULT_CHANGES_LIMIT = 1000
+MAX_CHANGES_LIMIT = 5000
+CHANGES_OVERLAP = float(os.environ.get('CHANGES_OVERLAP', '0'))
+
+CHANGE_SOURCES = {
+    'gibdd_fines': RowEncoder([
+        ('id', None),
+        ('violation_number', None),
+        ('driver_id', None),
+        ('vehicle_id', None),
+        ('driver_name', None),
+        ('license_plate', None),
+        ('violation_type', None),
+        ('violation_date', as_str),
+        ('amount', as_str),
+        ('status', None),
+        ('location', None),
+        ('description', None),
+        ('payment_date', as_str),
+        ('created_at', as_str),
+        ('updated_at', as_str)
+    ]),
+    'fines': RowEncoder([
+        ('id', None),
+        ('violationNumber', None),
+        ('driverName', None),
+        ('licensePlate', None),
+        ('violationType', None),
+        ('violationDate', iso),
+        ('amount', as_float),
+        ('status', None),
+        ('location', None),
+        ('description', None),
+        ('createdAt', iso),
+        ('updatedAt', iso)
+    ])
+}
+
+SOURCE_COLUMNS = {
+    'gibdd_fines': ('id, violation_number, driver_id, vehicle_id, driver_name, license_plate, violation_type, '
+                    'violation_date, amount, status, location, description, payment_date, created_at, updated_at'),
+    'fines': ('id, violation_number, driver_name, license_plate, violation_type, violation_date, amount, status, '
+              'location, description, created_at, updated_at')
+}
+
+Position = Optional[Tuple[str, int]]
+
+
+def encode_watermark(source: str, rows: Position, deleted: Position) -> str:
+    raw = json.dumps({'source': source, 'rows': rows, 'deleted': deleted})
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_watermark(token: str, source: str) -> Tuple[Position, Position]:
+    try:
+        data = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+        positions = [
+            (datetime.fromisoformat(data[key][0]).isoformat(), int(data[key][1])) if data[key] else None
+            for key in ('rows', 'deleted')
+        ]
+    except Exception:
+        raise ValueError('Некорректный водяной знак')
+    if data.get('source') != source:
+        raise ValueError('Водяной знак выдан для другого источника')
+    return positions[0], positions[1]
+
+
+def _advance(position: Position, last: Position, has_more: bool, horizon: datetime) -> Position:
+    if has_more:
+        return last
+    position = last or position
+    if position is None or datetime.fromisoformat(position[0]) < horizon:
+        return horizon.isoformat(), 0
+    return position
+
+
+def fetch_changes(cur, source: str, since: Optional[str], limit: int = DEFAULT_CHANGES_LIMIT) -> Dict[str, Any]:
+    if source not in CHANGE_SOURCES:
+        raise ValueError(f'Неизвестный источник штрафов: {source}')
+
+    cur.execute('''
+        SELECT horizon, horizon::timestamp
+        FROM (
+            SELECT LEAST(CURRENT_TIMESTAMP, MIN(xact_start)) - make_interval(secs => %s) AS horizon
+            FROM pg_stat_activity
+            WHERE datname = current_database() AND backend_type = 'client backend'
+        ) oldest
+    ''', (CHANGES_OVERLAP,))
+    rows_horizon, deleted_horizon = cur.fetchone()
+
+    if since:
+        rows_position, deleted_position = decode_watermark(since, source)
+    else:
+        rows_position, deleted_position = None, (deleted_horizon.isoformat(), 0)
+
+    query = f'SELECT {SOURCE_COLUMNS[source]} FROM {source} WHERE updated_at < %s'
+    query_params: List[Any] = [rows_horizon]
+    if rows_position:
+        query += ' AND (updated_at, id) > (%s::timestamptz, %s)'
+        query_params.extend(rows_position)
+    query += ' ORDER BY updated_at, id LIMIT %s'
+    query_params.append(limit + 1)
+    cur.execute(query, query_params)
+    rows = cur.fetchall()
+    rows_more = len(rows) > limit
+    rows = rows[:limit]
+
+    cur.execute('''
+        SELECT fine_id, deleted_at, id
+        FROM deleted_fines_history
+        WHERE source = %s AND deleted_at < %s AND (deleted_at, id) > (%s::timestamp, %s)
+        ORDER BY deleted_at, id
+        LIMIT %s
+    ''', (source, deleted_horizon, deleted_position[0], deleted_position[1], limit + 1))
+    tombstones = cur.fetchall()
+    deleted_more = len(tombstones) > limit
+    tombstones = tombstones[:limit]
+
+    last_row = (rows[-1][-1].isoformat(), rows[-1][0]) if rows else None
+    last_tombstone = (tombstones[-1][1].isoformat(), tombstones[-1][2]) if tombstones else None
+
+    return {
+        'source': source,
+        'changes': CHANGE_SOURCES[source].rows(rows),
+        'deleted': [{'id': fine_id, 'deletedAt': iso(deleted_at)} for fine_id, deleted_at, _ in tombstones],
+        'watermark': encode_watermark(
+            source,
+            _advance(rows_position, last_row, rows_more, rows_horizon),
+            _advance(deleted_position, last_tombstone, deleted_more, deleted_horizon)
+        ),
+        'hasMore': rows_more or deleted_more
+    }
@@ -0,0 +1,152 @@
+'''
+Business: Сжатие ответов хендлеров gzip или Brotli по Accept-Encoding для тел больше порога; сжатое тело отдаётся в base64
+          с isBase64Encoded=True и Content-Encoding, как того требует среда выполнения функций
+Args: COMPRESS_MIN_BYTES - порог размера тела, COMPRESS_GZIP_LEVEL и COMPRESS_BROTLI_QUALITY - уровни сжатия,
+      COMPRESS_ENABLED=0 отключает сжатие; Brotli доступен при установленном пакете brotli
+Returns: декоратор compressed для handler; compression_stats() - степень сжатия, байты и процессорное время по кодировкам
+'''
+import base64
+import gzip
+import os
+import threading
+import time
+from functools import wraps
+from typing import Dict, Any, Callable, Optional
+
+from shared.instrument import current_trace, record_phase, increment
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ENABLED = os.environ.get('COMPRESS_ENABLED', '1') != '0'
+MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', '1024'))
+GZIP_LEVEL = int(os.environ.get('COMPRESS_GZIP_LEVEL', '6'))
+BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', '4'))
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'text/')
+
+ENCODERS: Dict[str, Callable[[bytes], bytes]] = {
+    'gzip': lambda data: gzip.compress(data, GZIP_LEVEL, mtime=0)
+}
+if brotli is not None:
+    ENCODERS['br'] = lambda data: brotli.compress(data, quality=BROTLI_QUALITY)
+PREFERENCE = ('br', 'gzip')
+
+_lock = threading.Lock()
+_encodings: Dict[str, Dict[str, float]] = {}
+_skipped = {'notAccepted': 0, 'small': 0, 'incompressible': 0}
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    if not accept_encoding:
+        return None
+
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(','):
+        coding, _, params = part.partition(';')
+        weight = 1.0
+        params = params.replace(' ', '')
+        if params.startswith('q='):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip().lower()] = weight
+
+    best, best_weight = None, 0.0
+    for coding in PREFERENCE:
+        if coding in ENCODERS:
+            weight = weights.get(coding, weights.get('*', 0.0))
+            if weight > best_weight:
+                best, best_weight = coding, weight
+    return best
+
+
+def _header(event: Dict[str, Any], name: str) -> Optional[str]:
+    headers = event.get('headers') or {}
+    return headers.get(name) or headers.get(name.lower())
+
+
+def _skip(reason: str) -> None:
+    with _lock:
+        _skipped[reason] += 1
+
+
+def _record(function: str, encoding: str, size_in: int, size_out: int, cpu: float) -> None:
+    with _lock:
+        stats = _encodings.setdefault(encoding, {'responses': 0, 'bytesIn': 0, 'bytesOut': 0, 'cpuSeconds': 0.0})
+        stats['responses'] += 1
+        stats['bytesIn'] += size_in
+        stats['bytesOut'] += size_out
+        stats['cpuSeconds'] += cpu
+    increment((('function', function), ('encoding', encoding)), {
+        'handler_compressed_responses_total': 1,
+        'handler_compression_input_bytes_total': size_in,
+        'handler_compression_output_bytes_total': size_out,
+        'handler_compression_cpu_seconds_total': cpu
+    })
+
+
+def compress_response(event: Dict[str, Any], response: Dict[str, Any], function: Optional[str] = None) -> Dict[str, Any]:
+    if not isinstance(response, dict) or response.get('isBase64Encoded'):
+        return response
+    headers = response.get('headers')
+    body = response.get('body')
+    if not isinstance(headers, dict) or not isinstance(body, str) or 'Content-Encoding' in headers:
+        return response
+    if not str(headers.get('Content-Type', '')).startswith(COMPRESSIBLE_TYPES):
+        return response
+
+    headers['Vary'] = 'Accept-Encoding'
+    encoding = negotiate(_header(event, 'Accept-Encoding'))
+    if encoding is None:
+        _skip('notAccepted')
+        return response
+
+    data = body.encode('utf-8')
+    if len(data) < MIN_BYTES:
+        _skip('small')
+        return response
+
+    started, cpu_started = time.perf_counter(), time.thread_time()
+    payload = ENCODERS[encoding](data)
+    cpu = time.thread_time() - cpu_started
+    record_phase('compress', started)
+    if len(payload) >= len(data):
+        _skip('incompressible')
+        return response
+
+    trace = current_trace()
+    _record(trace.function if trace else function or 'unknown', encoding, len(data), len(payload), cpu)
+    headers['Content-Encoding'] = encoding
+    response['body'] = base64.b64encode(payload).decode('ascii')
+    response['isBase64Encoded'] = True
+    return response
+
+
+def compressed(handler: Callable[[Dict[str, Any], Any], Dict[str, Any]]) -> Callable[[Dict[str, Any], Any], Dict[str, Any]]:
+    if not ENABLED:
+        return handler
+
+    @wraps(handler)
+    def wrapper(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+        return compress_response(event, handler(event, context), getattr(context, 'function_name', None))
+    return wrapper
+
+
+def compression_stats() -> Dict[str, Any]:
+    with _lock:
+        encodings = {name: dict(stats) for name, stats in _encodings.items()}
+        skipped = dict(_skipped)
+    for stats in encodings.values():
+        stats['ratio'] = round(stats['bytesIn'] / stats['bytesOut'], 2) if stats['bytesOut'] else 0.0
+        stats['cpuMs'] = round(stats.pop('cpuSeconds') * 1000, 3)
+        stats['avgCpuMs'] = round(stats['cpuMs'] / stats['responses'], 3) if stats['responses'] else 0.0
+    return {
+        'minBytes': MIN_BYTES,
+        'available': [coding for coding in PREFERENCE if coding in ENCODERS],
+        'encodings': encodings,
+        'skipped': skipped
+    }
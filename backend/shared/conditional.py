@@ -0,0 +1,109 @@
+'''
+Business: Условные GET для списков: версия набора из dataset_versions, ETag/Last-Modified, 304 по If-None-Match и кэш тел на версию
+Args: cur - курсор, dataset - имя набора, params - queryStringParameters; RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL
+Returns: dataset_version -> DatasetVersion или None; cached_response -> ответ 304/200 или None; versioned_response -> ответ 200
+'''
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Dict, Any, Optional
+
+from shared.cache import get_cache, TTLCache, MISSING
+
+
+class DatasetVersion:
+    __slots__ = ('dataset', 'version', 'changed_at', 'etag', 'last_modified')
+
+    def __init__(self, dataset: str, version: int, changed_at: datetime, params: Dict[str, Any]):
+        digest = hashlib.sha1(json.dumps(params, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()[:16]
+        self.dataset = dataset
+        self.version = version
+        self.changed_at = changed_at.astimezone(timezone.utc).replace(microsecond=0)
+        self.etag = f'W/"{dataset}-{version}-{digest}"'
+        self.last_modified = format_datetime(self.changed_at, usegmt=True)
+
+
+def dataset_version(cur, dataset: str, params: Optional[Dict[str, Any]]) -> Optional[DatasetVersion]:
+    cur.execute('SELECT version, changed_at FROM dataset_versions WHERE dataset = %s', (dataset,))
+    row = cur.fetchone()
+    return DatasetVersion(dataset, row[0], row[1], params or {}) if row else None
+
+
+def response_cache() -> TTLCache:
+    return get_cache(
+        'responses',
+        max_entries=int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', '256')),
+        ttl=float(os.environ.get('RESPONSE_CACHE_TTL', '600'))
+    )
+
+
+def _header(event: Dict[str, Any], name: str) -> Optional[str]:
+    headers = event.get('headers') or {}
+    return headers.get(name) or headers.get(name.lower())
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith('W/') else tag
+
+
+def is_not_modified(event: Dict[str, Any], version: DatasetVersion) -> bool:
+    if_none_match = _header(event, 'If-None-Match')
+    if not if_none_match:
+        return False
+    current = _opaque(version.etag)
+    return any(tag.strip() == '*' or _opaque(tag) == current for tag in if_none_match.split(','))
+
+
+def _headers(version: DatasetVersion) -> Dict[str, str]:
+    return {
+        'Content-Type': 'application/json',
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Expose-Headers': 'ETag, Last-Modified',
+        'Cache-Control': 'no-cache',
+        'ETag': version.etag,
+        'Last-Modified': version.last_modified
+    }
+
+
+def cached_response(event: Dict[str, Any], version: Optional[DatasetVersion]) -> Optional[Dict[str, Any]]:
+    if version is None:
+        return None
+
+    if is_not_modified(event, version):
+        return {
+            'statusCode': 304,
+            'headers': _headers(version),
+            'isBase64Encoded': False,
+            'body': ''
+        }
+
+    body = response_cache().get(version.etag)
+    if body is MISSING or body is None:
+        return None
+    return {
+        'statusCode': 200,
+        'headers': _headers(version),
+        'isBase64Encoded': False,
+        'body': body
+    }
+
+
+def versioned_response(version: Optional[DatasetVersion], body: str) -> Dict[str, Any]:
+    if version is None:
+        return {
+            'statusCode': 200,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'isBase64Encoded': False,
+            'body': body
+        }
+
+    response_cache().set(version.etag, body)
+    return {
+        'statusCode': 200,
+        'headers': _headers(version),
+        'isBase64Encoded': False,
+        'body': body
+    }
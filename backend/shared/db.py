@@ -0,0 +1,198 @@
+'''
+Business: Общий пул соединений PostgreSQL, переживающий тёплые вызовы функций
+Args: DATABASE_URL - строка подключения, DB_POOL_MAX_SIZE - лимит соединений на инстанс,
+      DB_POOL_MAX_IDLE - секунд простоя до проверки соединения, DB_POOL_TIMEOUT - ожидание свободного соединения
+Returns: соединения psycopg2 через get_connection/release_connection и метрики пула через pool_stats
+'''
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, List, Tuple, Iterator, Optional
+
+import psycopg2
+from psycopg2 import extensions
+
+from shared.instrument import InstrumentedConnection, record_phase
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    def __init__(self, dsn: str, max_size: int = 5, max_idle: float = 30.0, timeout: float = 10.0):
+        self.dsn = dsn
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self._idle: List[Tuple[Any, float]] = []
+        self._size = 0
+        self._cond = threading.Condition()
+        self._stats: Dict[str, Any] = {
+            'hits': 0,
+            'misses': 0,
+            'reconnects': 0,
+            'waits': 0,
+            'waitTime': 0.0,
+            'timeouts': 0
+        }
+
+    def acquire(self):
+        started = time.monotonic()
+        deadline = started + self.timeout
+        waited = False
+
+        with self._cond:
+            while True:
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    conn, last_used = None, 0.0
+                    break
+                if not waited:
+                    waited = True
+                    self._stats['waits'] += 1
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeout('Нет свободных соединений с БД')
+                self._cond.wait(remaining)
+
+            if waited:
+                self._stats['waitTime'] += time.monotonic() - started
+
+        if conn is not None:
+            if self._is_alive(conn, last_used):
+                self._count('hits')
+                return conn
+            self._close_quietly(conn)
+            self._count('reconnects')
+
+        self._count('misses')
+        try:
+            return psycopg2.connect(self.dsn, connection_factory=InstrumentedConnection)
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, conn) -> None:
+        if not conn.closed:
+            try:
+                if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                self._close_quietly(conn)
+
+        with self._cond:
+            if conn.closed:
+                self._size -= 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def discard(self, conn) -> None:
+        self._close_quietly(conn)
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def close_all(self) -> None:
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn, _ in idle:
+            self._close_quietly(conn)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            result = dict(self._stats)
+            result['size'] = self._size
+            result['idle'] = len(self._idle)
+            result['maxSize'] = self.max_size
+        requests = result['hits'] + result['misses']
+        result['hitRatio'] = round(result['hits'] / requests, 4) if requests else 0.0
+        result['waitTime'] = round(result['waitTime'], 6)
+        return result
+
+    def _is_alive(self, conn, last_used: float) -> bool:
+        if conn.closed:
+            return False
+        if time.monotonic() - last_used < self.max_idle:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute('SELECT 1')
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _count(self, key: str) -> None:
+        with self._cond:
+            self._stats[key] += 1
+
+    @staticmethod
+    def _close_quietly(conn) -> None:
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    os.environ.get('DATABASE_URL'),
+                    max_size=int(os.environ.get('DB_POOL_MAX_SIZE', '5')),
+                    max_idle=float(os.environ.get('DB_POOL_MAX_IDLE', '30')),
+                    timeout=float(os.environ.get('DB_POOL_TIMEOUT', '10'))
+                )
+    return _pool
+
+
+def get_connection():
+    started = time.perf_counter()
+    conn = get_pool().acquire()
+    record_phase('connect', started)
+    return conn
+
+
+def release_connection(conn) -> None:
+    if conn is None:
+        return
+    if conn.closed:
+        get_pool().discard(conn)
+    else:
+        get_pool().release(conn)
+
+
+@contextmanager
+def connection() -> Iterator[Any]:
+    conn = get_connection()
+    try:
+        yield conn
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        get_pool().discard(conn)
+        raise
+    except Exception:
+        release_connection(conn)
+        raise
+    else:
+        release_connection(conn)
+
+
+def pool_stats() -> Dict[str, Any]:
+    return get_pool().stats()
@@ -0,0 +1,186 @@
+'''
+Business: Потоковая выгрузка штрафов и истории удалений в CSV/NDJSON через серверный курсор; CLI пишет в файл частями без материализации
+Args: conn - соединение psycopg2, source - fines или deleted_fines_history, fmt - csv или ndjson, sink - бинарный поток;
+      запуск из каталога backend: python -m shared.export <source> <csv|ndjson> [файл[.gz]];
+      EXPORT_MAX_ROWS - предел строк для HTTP-выгрузки, которая собирает тело ответа в памяти целиком
+Returns: число выгруженных строк; данные пишутся в sink частями, опционально через gzip;
+         export_response - ответ 200 с файлом или 413, если выгрузка больше предела и её нужно делать через CLI
+'''
+import base64
+import csv
+import gzip
+import io
+import json
+import os
+import sys
+from typing import Dict, Any, Tuple, Iterator, BinaryIO, Optional
+
+from shared.db import connection
+from shared.serialize import RowEncoder, iso, float_or_zero
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson'
+}
+DEFAULT_ITERSIZE = 2000
+CHUNK_ROWS = 500
+EXPORT_MAX_ROWS = int(os.environ.get('EXPORT_MAX_ROWS', '50000'))
+
+
+EXPORT_SOURCES: Dict[str, Dict[str, Any]] = {
+    'fines': {
+        'query': '''
+            SELECT id, violation_number, driver_name, license_plate,
+                   violation_type, violation_date, amount, status,
+                   location, description, created_at
+            FROM fines
+            ORDER BY violation_date DESC, id DESC
+        ''',
+        'encoder': RowEncoder([
+            ('id', None),
+            ('violationNumber', None),
+            ('driverName', None),
+            ('licensePlate', None),
+            ('violationType', None),
+            ('violationDate', iso),
+            ('amount', float_or_zero),
+            ('status', None),
+            ('location', None),
+            ('description', None),
+            ('createdAt', iso)
+        ])
+    },
+    'deleted_fines_history': {
+        'query': '''
+            SELECT id, fine_id, violation_number, driver_name, license_plate,
+                   violation_type, violation_date, amount, status, location,
+                   description, deleted_by, deleted_at, reason, source
+            FROM deleted_fines_history
+            ORDER BY deleted_at DESC, id DESC
+        ''',
+        'encoder': RowEncoder([
+            ('id', None),
+            ('fineId', None),
+            ('violationNumber', None),
+            ('driverName', None),
+            ('licensePlate', None),
+            ('violationType', None),
+            ('violationDate', iso),
+            ('amount', float_or_zero),
+            ('status', None),
+            ('location', None),
+            ('description', None),
+            ('deletedBy', None),
+            ('deletedAt', iso),
+            ('reason', None),
+            ('source', None)
+        ])
+    }
+}
+
+
+def iter_export_chunks(conn, source: str, fmt: str, itersize: int = DEFAULT_ITERSIZE,
+                       max_rows: Optional[int] = None) -> Iterator[Tuple[str, int]]:
+    spec = EXPORT_SOURCES[source]
+    encoder: RowEncoder = spec['encoder']
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if fmt == 'csv':
+        writer.writerow(encoder.keys)
+
+    cur = conn.cursor(name=f'export_{source}')
+    cur.itersize = itersize
+    pending = 0
+    try:
+        if max_rows is None:
+            cur.execute(spec['query'])
+        else:
+            cur.execute(spec['query'] + ' LIMIT %s', (max_rows,))
+        for row in cur:
+            record = encoder.row(row)
+            if fmt == 'csv':
+                writer.writerow(record.values())
+            else:
+                buffer.write(json.dumps(record, ensure_ascii=False))
+                buffer.write('\n')
+            pending += 1
+
+            if pending >= CHUNK_ROWS:
+                yield buffer.getvalue(), pending
+                buffer.seek(0)
+                buffer.truncate()
+                pending = 0
+    finally:
+        cur.close()
+
+    yield buffer.getvalue(), pending
+
+
+def export_rows(conn, source: str, fmt: str, sink: BinaryIO, compress: bool = False,
+                itersize: int = DEFAULT_ITERSIZE, max_rows: Optional[int] = None) -> int:
+    if source not in EXPORT_SOURCES:
+        raise ValueError(f'Неизвестный источник выгрузки: {source}')
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f'Неизвестный формат выгрузки: {fmt}')
+
+    target = gzip.GzipFile(fileobj=sink, mode='wb') if compress else sink
+    total = 0
+    try:
+        for chunk, rows in iter_export_chunks(conn, source, fmt, itersize, max_rows):
+            target.write(chunk.encode('utf-8'))
+            total += rows
+    finally:
+        if compress:
+            target.close()
+    return total
+
+
+def export_filename(source: str, fmt: str, compress: bool) -> str:
+    return f"{source}.{fmt}{'.gz' if compress else ''}"
+
+
+def export_response(conn, source: str, fmt: str, compress: bool = False) -> Dict[str, Any]:
+    sink = io.BytesIO()
+    total = export_rows(conn, source, fmt, sink, compress, max_rows=EXPORT_MAX_ROWS + 1)
+    if total > EXPORT_MAX_ROWS:
+        return {
+            'statusCode': 413,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'isBase64Encoded': False,
+            'body': json.dumps({
+                'error': f'Выгрузка больше {EXPORT_MAX_ROWS} строк, используйте python -m shared.export {source} {fmt}'
+            })
+        }
+    payload = sink.getvalue()
+
+    return {
+        'statusCode': 200,
+        'headers': {
+            'Content-Type': 'application/gzip' if compress else EXPORT_CONTENT_TYPES[fmt],
+            'Content-Disposition': f'attachment; filename="{export_filename(source, fmt, compress)}"',
+            'Access-Control-Allow-Origin': '*',
+            'X-Export-Rows': str(total)
+        },
+        'isBase64Encoded': compress,
+        'body': base64.b64encode(payload).decode('ascii') if compress else payload.decode('utf-8')
+    }
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        sys.exit('Использование: python -m shared.export <fines|deleted_fines_history> <csv|ndjson> [файл[.gz]]')
+
+    source_name, export_format = sys.argv[1], sys.argv[2]
+    output_path = sys.argv[3] if len(sys.argv) > 3 else None
+
+    with connection() as conn:
+        if output_path:
+            with open(output_path, 'wb') as output_file:
+                exported = export_rows(conn, source_name, export_format, output_file, output_path.endswith('.gz'))
+        else:
+            exported = export_rows(conn, source_name, export_format, sys.stdout.buffer)
+        conn.rollback()
+
+    print(f'{source_name}: {exported}', file=sys.stderr)
@@ -0,0 +1,218 @@
+'''
+Business: Потоковый импорт штрафов ГИБДД из CSV/NDJSON через COPY FROM STDIN во временную таблицу с валидацией, дедупликацией и upsert в gibdd_fines
+Args: conn - соединение psycopg2, stream - текстовый поток с данными, fmt - csv или ndjson;
+      запуск из каталога backend: python -m shared.fines_import fines.csv [csv|ndjson]
+Returns: dict со счётчиками staged/inserted/updated/rejected/duplicates и примерами отклонённых строк
+'''
+import csv
+import io
+import json
+import sys
+from typing import Dict, Any, Iterable, Optional, TextIO
+
+from shared.db import connection
+
+IMPORT_COLUMNS = [
+    'violation_number', 'driver_id', 'vehicle_id', 'driver_name',
+    'license_plate', 'violation_type', 'violation_date', 'amount',
+    'status', 'location', 'description', 'payment_date'
+]
+IMPORT_FORMATS = ('csv', 'ndjson')
+MAX_REPORTED_ERRORS = 20
+COPY_CHUNK_SIZE = 64 * 1024
+
+
+class NdjsonCsvStream:
+    def __init__(self, lines: Iterable[str]):
+        self._lines = iter(lines)
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+        self._pending = ''
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self._pending) < size:
+            line = next(self._lines, None)
+            if line is None:
+                break
+            if not line.strip():
+                continue
+            self._write_record(line)
+
+        if size < 0:
+            chunk, self._pending = self._pending, ''
+        else:
+            chunk, self._pending = self._pending[:size], self._pending[size:]
+        return chunk
+
+    def _write_record(self, line: str) -> None:
+        parse_error = None
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError('not an object')
+        except ValueError:
+            record = {}
+            parse_error = 'Некорректная строка JSON'
+
+        self._writer.writerow([self._cell(record.get(column)) for column in IMPORT_COLUMNS] + [parse_error])
+        self._pending += self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+
+    @staticmethod
+    def _cell(value: Any) -> Optional[str]:
+        if value is None:
+            return None
+        if isinstance(value, (dict, list)):
+            return json.dumps(value, ensure_ascii=False)
+        return str(value)
+
+
+def import_fines(conn, stream: TextIO, fmt: str = 'csv') -> Dict[str, Any]:
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f'Неизвестный формат импорта: {fmt}')
+
+    cur = conn.cursor()
+    try:
+        cur.execute(f'''
+            CREATE TEMP TABLE gibdd_fines_import (
+                line_no BIGSERIAL,
+                {', '.join(f'{column} TEXT' for column in IMPORT_COLUMNS)},
+                parse_error TEXT
+            ) ON COMMIT DROP
+        ''')
+
+        if fmt == 'csv':
+            header = next(csv.reader([stream.readline()]), [])
+            columns = [column.strip() for column in header]
+            unknown = [column for column in columns if column not in IMPORT_COLUMNS]
+            if not columns or unknown:
+                raise ValueError(f"Неизвестные колонки CSV: {', '.join(unknown) or '(пустой заголовок)'}")
+            source = stream
+        else:
+            columns = IMPORT_COLUMNS + ['parse_error']
+            source = NdjsonCsvStream(stream)
+
+        cur.copy_expert(
+            f"COPY gibdd_fines_import ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+            source,
+            size=COPY_CHUNK_SIZE
+        )
+
+        cur.execute('''
+            CREATE TEMP TABLE gibdd_fines_import_checked ON COMMIT DROP AS
+            SELECT s.*, trim(s.violation_number) AS fine_key,
+                   CASE
+                       WHEN s.parse_error IS NOT NULL THEN s.parse_error
+                       WHEN NULLIF(trim(s.violation_number), '') IS NULL THEN 'Не указан номер постановления'
+                       WHEN NULLIF(trim(s.driver_name), '') IS NULL THEN 'Не указан водитель'
+                       WHEN NULLIF(trim(s.license_plate), '') IS NULL THEN 'Не указан госномер'
+                       WHEN NULLIF(trim(s.violation_type), '') IS NULL THEN 'Не указан тип нарушения'
+                       WHEN NULLIF(trim(s.location), '') IS NULL THEN 'Не указано место нарушения'
+                       WHEN import_to_timestamptz(s.violation_date) IS NULL THEN 'Некорректная дата нарушения'
+                       WHEN import_to_numeric(s.amount) IS NULL OR import_to_numeric(s.amount) < 0 THEN 'Некорректная сумма'
+                       WHEN NULLIF(s.payment_date, '') IS NOT NULL AND import_to_timestamptz(s.payment_date) IS NULL THEN 'Некорректная дата оплаты'
+                       WHEN NULLIF(s.driver_id, '') IS NOT NULL AND s.driver_id !~ '^[0-9]+$' THEN 'Некорректный driver_id'
+                       WHEN NULLIF(s.vehicle_id, '') IS NOT NULL AND s.vehicle_id !~ '^[0-9]+$' THEN 'Некорректный vehicle_id'
+                   END AS reject_reason
+            FROM gibdd_fines_import s
+        ''')
+
+        cur.execute('''
+            SELECT COUNT(*),
+                   COUNT(*) FILTER (WHERE reject_reason IS NOT NULL),
+                   COUNT(*) FILTER (WHERE reject_reason IS NULL) - COUNT(DISTINCT fine_key) FILTER (WHERE reject_reason IS NULL)
+            FROM gibdd_fines_import_checked
+        ''')
+        staged, rejected, duplicates = cur.fetchone()
+
+        cur.execute('''
+            SELECT line_no, reject_reason
+            FROM gibdd_fines_import_checked
+            WHERE reject_reason IS NOT NULL
+            ORDER BY line_no
+            LIMIT %s
+        ''', (MAX_REPORTED_ERRORS,))
+        errors = [{'row': row[0], 'reason': row[1]} for row in cur.fetchall()]
+
+        cur.execute('''
+            WITH latest AS (
+                SELECT DISTINCT ON (fine_key) *
+                FROM gibdd_fines_import_checked
+                WHERE reject_reason IS NULL
+                ORDER BY fine_key, line_no DESC
+            ), prepared AS (
+                SELECT fine_key AS violation_number,
+                       NULLIF(driver_id, '')::INTEGER AS driver_id,
+                       NULLIF(vehicle_id, '')::INTEGER AS vehicle_id,
+                       trim(driver_name) AS driver_name,
+                       license_plate,
+                       trim(violation_type) AS violation_type,
+                       import_to_timestamptz(violation_date) AS violation_date,
+                       import_to_numeric(amount) AS amount,
+                       COALESCE(NULLIF(trim(status), ''), 'Не оплачен') AS status,
+                       trim(location) AS location,
+                       NULLIF(description, '') AS description,
+                       import_to_timestamptz(payment_date) AS payment_date
+                FROM latest
+            ), updated AS (
+                UPDATE gibdd_fines f SET
+                    driver_id = p.driver_id,
+                    vehicle_id = p.vehicle_id,
+                    driver_name = p.driver_name,
+                    license_plate = p.license_plate,
+                    violation_type = p.violation_type,
+                    violation_date = p.violation_date,
+                    amount = p.amount,
+                    status = p.status,
+                    location = p.location,
+                    description = p.description,
+                    payment_date = p.payment_date,
+                    updated_at = CURRENT_TIMESTAMP
+                FROM prepared p
+                JOIN gibdd_fine_numbers n ON n.violation_number = p.violation_number
+                WHERE f.id = n.fine_id AND f.violation_date = n.violation_date
+                RETURNING f.id
+            ), inserted AS (
+                INSERT INTO gibdd_fines (
+                    violation_number, driver_id, vehicle_id, driver_name,
+                    license_plate, violation_type, violation_date, amount,
+                    status, location, description, payment_date
+                )
+                SELECT p.violation_number, p.driver_id, p.vehicle_id, p.driver_name,
+                       p.license_plate, p.violation_type, p.violation_date, p.amount,
+                       p.status, p.location, p.description, p.payment_date
+                FROM prepared p
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM gibdd_fine_numbers n WHERE n.violation_number = p.violation_number
+                )
+                RETURNING id
+            )
+            SELECT (SELECT COUNT(*) FROM inserted), (SELECT COUNT(*) FROM updated)
+        ''')
+        inserted, updated = cur.fetchone()
+    finally:
+        cur.close()
+
+    return {
+        'staged': staged,
+        'inserted': inserted,
+        'updated': updated,
+        'rejected': rejected,
+        'duplicates': duplicates,
+        'errors': errors
+    }
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        sys.exit('Использование: python -m shared.fines_import <файл> [csv|ndjson]')
+
+    path = sys.argv[1]
+    fmt = sys.argv[2] if len(sys.argv) > 2 else ('ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv')
+
+    with open(path, encoding='utf-8', newline='') as source_file, connection() as conn:
+        report = import_fines(conn, source_file, fmt)
+        conn.commit()
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
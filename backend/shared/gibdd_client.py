@@ -0,0 +1,292 @@
+'''
+Business: Клиент проверки штрафов ГИБДД: TTL-кэш по (ВУ, СТС), объединение одинаковых запросов, token bucket, circuit breaker с выдачей устаревших данных
+Args: GIBDD_UPSTREAM_URL - адрес внешнего сервиса (без него используется тестовый генератор), GIBDD_CACHE_TTL, GIBDD_STALE_TTL,
+      GIBDD_RATE_LIMIT, GIBDD_RATE_BURST, GIBDD_BREAKER_THRESHOLD, GIBDD_BREAKER_RESET, GIBDD_UPSTREAM_TIMEOUT из окружения
+Returns: get_client().check(license_number, sts_number) -> dict с fines, checkedAt, cached, stale; метрики через get_client().metrics()
+'''
+import json
+import os
+import random
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Tuple, Optional
+
+VIOLATION_TYPES = [
+    'Превышение скорости',
+    'Нарушение правил парковки',
+    'Проезд на красный свет',
+    'Непредоставление преимущества пешеходу',
+    'Использование телефона за рулем'
+]
+
+
+class UpstreamUnavailable(Exception):
+    pass
+
+
+class MockUpstream:
+    name = 'ГИБДД API (тестовый режим)'
+
+    def fetch(self, license_number: str, sts_number: str) -> List[Dict[str, Any]]:
+        fines = []
+        for _ in range(random.randint(0, 3)):
+            days_ago = random.randint(1, 180)
+            violation_date = datetime.now() - timedelta(days=days_ago)
+            fines.append({
+                'uinNumber': f'188{random.randint(10000000, 99999999)}',
+                'violationType': random.choice(VIOLATION_TYPES),
+                'violationDate': violation_date.strftime('%Y-%m-%d'),
+                'amount': random.choice([1500, 3000, 5000, 15000, 20000, 25000, 30000]),
+                'status': random.choice(['Не оплачен', 'Не оплачен', 'В обработке']),
+                'location': f'МКАД {random.randint(1, 109)}км',
+                'canPay': True
+            })
+        return fines
+
+
+class HttpUpstream:
+    name = 'ГИБДД API'
+
+    def __init__(self, url: str, timeout: float = 5.0):
+        self.url = url
+        self.timeout = timeout
+
+    def fetch(self, license_number: str, sts_number: str) -> List[Dict[str, Any]]:
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps({'licenseNumber': license_number, 'stsNumber': sts_number}).encode('utf-8'),
+            headers={'Content-Type': 'application/json'},
+            method='POST'
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read().decode('utf-8')).get('fines', [])
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: float = 0.0) -> bool:
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return 'half-open'
+            return 'open'
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+
+class _InflightCall:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[Exception] = None
+
+
+class GibddClient:
+    def __init__(self, upstream, ttl: float = 300.0, stale_ttl: float = 86400.0, max_entries: int = 10000,
+                 rate_limiter: Optional[TokenBucket] = None, breaker: Optional[CircuitBreaker] = None,
+                 rate_wait: float = 2.0):
+        self.upstream = upstream
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.rate_limiter = rate_limiter or TokenBucket(rate=5, capacity=10)
+        self.breaker = breaker or CircuitBreaker()
+        self.rate_wait = rate_wait
+        self._cache: 'OrderedDict[Tuple[str, str], Tuple[float, Dict[str, Any]]]' = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], _InflightCall] = {}
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Any] = {
+            'hits': 0,
+            'misses': 0,
+            'coalesced': 0,
+            'staleServed': 0,
+            'upstreamCalls': 0,
+            'upstreamErrors': 0,
+            'rateLimited': 0,
+            'circuitRejected': 0,
+            'upstreamLatencyTotal': 0.0,
+            'upstreamLatencyMax': 0.0
+        }
+
+    def check(self, license_number: str, sts_number: str) -> Dict[str, Any]:
+        key = (license_number.strip().upper(), sts_number.strip().upper())
+
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry and time.monotonic() - entry[0] < self.ttl:
+                self._cache.move_to_end(key)
+                self._metrics['hits'] += 1
+                return dict(entry[1], cached=True, stale=False)
+
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = _InflightCall()
+                self._inflight[key] = call
+                self._metrics['misses'] += 1
+            else:
+                self._metrics['coalesced'] += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error:
+                raise call.error
+            return dict(call.result, cached=True, stale=call.result['stale'])
+
+        try:
+            call.result = self._refresh(key, entry)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            call.event.set()
+
+    def _refresh(self, key: Tuple[str, str], entry: Optional[Tuple[float, Dict[str, Any]]]) -> Dict[str, Any]:
+        if not self.rate_limiter.acquire(self.rate_wait):
+            self._count('rateLimited')
+            return self._serve_stale(entry, 'Превышен лимит запросов к ГИБДД')
+
+        if not self.breaker.allow():
+            self._count('circuitRejected')
+            return self._serve_stale(entry, 'Сервис ГИБДД временно недоступен')
+
+        started = time.monotonic()
+        try:
+            fines = self.upstream.fetch(*key)
+        except Exception:
+            self.breaker.record_failure()
+            self._record_latency(time.monotonic() - started, failed=True)
+            return self._serve_stale(entry, 'Сервис ГИБДД не ответил')
+
+        self.breaker.record_success()
+        self._record_latency(time.monotonic() - started, failed=False)
+
+        value = {'fines': fines, 'checkedAt': datetime.now().isoformat(), 'source': self.upstream.name}
+        with self._lock:
+            self._cache[key] = (time.monotonic(), value)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return dict(value, cached=False, stale=False)
+
+    def _serve_stale(self, entry: Optional[Tuple[float, Dict[str, Any]]], reason: str) -> Dict[str, Any]:
+        if entry and time.monotonic() - entry[0] < self.stale_ttl:
+            self._count('staleServed')
+            return dict(entry[1], cached=True, stale=True)
+        raise UpstreamUnavailable(reason)
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._metrics[key] += 1
+
+    def _record_latency(self, elapsed: float, failed: bool) -> None:
+        with self._lock:
+            self._metrics['upstreamCalls'] += 1
+            if failed:
+                self._metrics['upstreamErrors'] += 1
+            self._metrics['upstreamLatencyTotal'] += elapsed
+            self._metrics['upstreamLatencyMax'] = max(self._metrics['upstreamLatencyMax'], elapsed)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            result = dict(self._metrics)
+            result['cacheSize'] = len(self._cache)
+            result['inflight'] = len(self._inflight)
+        lookups = result['hits'] + result['misses'] + result['coalesced']
+        result['hitRatio'] = round((result['hits'] + result['coalesced']) / lookups, 4) if lookups else 0.0
+        result['upstreamLatencyAvg'] = round(result['upstreamLatencyTotal'] / result['upstreamCalls'], 6) if result['upstreamCalls'] else 0.0
+        result['upstreamLatencyTotal'] = round(result['upstreamLatencyTotal'], 6)
+        result['upstreamLatencyMax'] = round(result['upstreamLatencyMax'], 6)
+        result['circuit'] = self.breaker.state
+        return result
+
+
+_client: Optional[GibddClient] = None
+_client_lock = threading.Lock()
+
+
+def build_upstream():
+    url = os.environ.get('GIBDD_UPSTREAM_URL')
+    if url:
+        return HttpUpstream(url, timeout=float(os.environ.get('GIBDD_UPSTREAM_TIMEOUT', '5')))
+    return MockUpstream()
+
+
+def get_client() -> GibddClient:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = GibddClient(
+                    build_upstream(),
+                    ttl=float(os.environ.get('GIBDD_CACHE_TTL', '300')),
+                    stale_ttl=float(os.environ.get('GIBDD_STALE_TTL', '86400')),
+                    rate_limiter=TokenBucket(
+                        rate=float(os.environ.get('GIBDD_RATE_LIMIT', '5')),
+                        capacity=float(os.environ.get('GIBDD_RATE_BURST', '10'))
+                    ),
+                    breaker=CircuitBreaker(
+                        failure_threshold=int(os.environ.get('GIBDD_BREAKER_THRESHOLD', '5')),
+                        reset_timeout=float(os.environ.get('GIBDD_BREAKER_RESET', '30'))
+                    )
+                )
+    return _client
@@ -0,0 +1,384 @@
+'''
+Business: Инструментирование хендлеров: фазы запроса (connect/query/fetch/map/serialize), число строк и байт ответа с привязкой к context.request_id,
+          журнал медленных запросов с планом EXPLAIN и гистограммы в формате Prometheus
+Args: INSTRUMENT_LOG - all, slow (по умолчанию) или off; SLOW_REQUEST_MS, SLOW_QUERY_MS - пороги; EXPLAIN_INTERVAL - не чаще раза
+      в N секунд на один запрос; INSTRUMENT_ENABLED=0 отключает сбор полностью
+Returns: декоратор instrumented(name) для handler, phase(name) для своих участков, increment(...) для своих счётчиков,
+         render_prometheus() и metrics_snapshot()
+'''
+import json
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Dict, Any, Callable, Iterator, List, Optional, Tuple
+
+import psycopg2
+from psycopg2 import extensions
+
+ENABLED = os.environ.get('INSTRUMENT_ENABLED', '1') != '0'
+LOG_MODE = os.environ.get('INSTRUMENT_LOG', 'slow')
+SLOW_REQUEST_MS = float(os.environ.get('SLOW_REQUEST_MS', '500'))
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', '200'))
+EXPLAIN_INTERVAL = float(os.environ.get('EXPLAIN_INTERVAL', '60'))
+
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+EXPLAINABLE = (b'SELECT', b'WITH', b'INSERT', b'UPDATE', b'DELETE')
+MAX_LOGGED_QUERY = 2000
+QUOTED_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMERIC_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+PLAN_CONDITION = re.compile(r'(?:Cond|Filter):')
+MAX_EXPLAINED_STATEMENTS = 1000
+
+
+class RequestTrace:
+    __slots__ = ('function', 'request_id', 'started', 'phases', 'queries', 'rows', 'affected', 'slow_queries', 'error')
+
+    def __init__(self, function: str, request_id: Optional[str]):
+        self.function = function
+        self.request_id = request_id
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.queries = 0
+        self.rows = 0
+        self.affected = 0
+        self.slow_queries: List[Dict[str, Any]] = []
+        self.error: Optional[str] = None
+
+    def add(self, name: str, elapsed: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+
+_current: ContextVar[Optional[RequestTrace]] = ContextVar('instrument_trace', default=None)
+
+
+def current_trace() -> Optional[RequestTrace]:
+    return _current.get()
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, time.perf_counter() - started)
+
+
+def record_phase(name: str, started: float) -> None:
+    trace = _current.get()
+    if trace is not None:
+        trace.add(name, time.perf_counter() - started)
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.series: Dict[Tuple[Tuple[str, str], ...], List[float]] = {}
+
+    def observe(self, labels: Tuple[Tuple[str, str], ...], value: float) -> None:
+        counts = self.series.get(labels)
+        if counts is None:
+            counts = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def render(self, name: str, help_text: str, scale: float = 1.0) -> List[str]:
+        lines = [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+        for labels, counts in sorted(self.series.items()):
+            label_text = ','.join(f'{key}="{value}"' for key, value in labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{label_text},le="{bound * scale:g}"}} {cumulative}')
+            cumulative += counts[len(self.buckets)]
+            lines.append(f'{name}_bucket{{{label_text},le="+Inf"}} {cumulative}')
+            lines.append(f'{name}_sum{{{label_text}}} {counts[-1] * scale:.6f}')
+            lines.append(f'{name}_count{{{label_text}}} {cumulative}')
+        return lines
+
+
+_lock = threading.Lock()
+_request_latency = Histogram(LATENCY_BUCKETS_MS)
+_phase_latency = Histogram(LATENCY_BUCKETS_MS)
+_response_size = Histogram(SIZE_BUCKETS)
+_counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+_explained_at: Dict[bytes, float] = {}
+
+
+def _inc(name: str, labels: Tuple[Tuple[str, str], ...], value: float = 1) -> None:
+    key = (name, labels)
+    _counters[key] = _counters.get(key, 0) + value
+
+
+def increment(labels: Tuple[Tuple[str, str], ...], counters: Dict[str, float]) -> None:
+    with _lock:
+        for name, value in counters.items():
+            _inc(name, labels, value)
+
+
+def _emit(record: Dict[str, Any]) -> None:
+    print(json.dumps(record, ensure_ascii=False, default=str), flush=True)
+
+
+def _finish(trace: RequestTrace, status: int, body_bytes: int, error: Optional[str]) -> None:
+    total_ms = (time.perf_counter() - trace.started) * 1000
+    phases_ms = {name: round(elapsed * 1000, 3) for name, elapsed in trace.phases.items()}
+    function = (('function', trace.function),)
+
+    with _lock:
+        _request_latency.observe(function + (('status', str(status // 100) + 'xx'),), total_ms)
+        for name, elapsed in phases_ms.items():
+            _phase_latency.observe(function + (('phase', name),), elapsed)
+        _response_size.observe(function, body_bytes)
+        _inc('handler_requests_total', function + (('status', str(status)),))
+        _inc('handler_rows_total', function, trace.rows)
+        _inc('handler_queries_total', function, trace.queries)
+        _inc('handler_slow_queries_total', function, len(trace.slow_queries))
+
+    if LOG_MODE == 'off':
+        return
+    if LOG_MODE == 'all' or total_ms >= SLOW_REQUEST_MS or status >= 500 or trace.slow_queries:
+        _emit({
+            'event': 'request',
+            'function': trace.function,
+            'requestId': trace.request_id,
+            'status': status,
+            'totalMs': round(total_ms, 3),
+            'phasesMs': phases_ms,
+            'otherMs': round(total_ms - sum(phases_ms.values()), 3),
+            'queries': trace.queries,
+            'rows': trace.rows,
+            'affected': trace.affected,
+            'bytes': body_bytes,
+            'error': error,
+            'slowQueries': trace.slow_queries
+        })
+
+
+def instrumented(name: str) -> Callable[[Callable], Callable]:
+    def decorate(handler: Callable[[Dict[str, Any], Any], Dict[str, Any]]) -> Callable[[Dict[str, Any], Any], Dict[str, Any]]:
+        if not ENABLED:
+            return handler
+
+        @wraps(handler)
+        def wrapper(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+            trace = RequestTrace(name, getattr(context, 'request_id', None))
+            token = _current.set(trace)
+            try:
+                response = handler(event, context)
+            except Exception as e:
+                _finish(trace, 500, 0, _error_code(e))
+                raise
+            finally:
+                _current.reset(token)
+
+            if isinstance(response, dict) and isinstance(response.get('headers'), dict) and trace.request_id:
+                response['headers'].setdefault('X-Request-Id', trace.request_id)
+            status = int(response.get('statusCode', 200)) if isinstance(response, dict) else 200
+            body = response.get('body') if isinstance(response, dict) else None
+            error = (trace.error or f'HTTP {status}') if status >= 500 else None
+            _finish(trace, status, len(body) if isinstance(body, (str, bytes)) else 0, error)
+            return response
+        return wrapper
+    return decorate
+
+
+def _error_code(error: BaseException) -> str:
+    pgcode = getattr(error, 'pgcode', None)
+    return f'{type(error).__name__} {pgcode}' if pgcode else type(error).__name__
+
+
+def _mask_plan(line: str) -> str:
+    line = QUOTED_LITERAL.sub("'?'", line)
+    return NUMERIC_LITERAL.sub('?', line) if PLAN_CONDITION.search(line) else line
+
+
+def _template(cursor, query) -> bytes:
+    if isinstance(query, bytes):
+        return query
+    if isinstance(query, str):
+        return query.encode('utf-8')
+    try:
+        return query.as_string(cursor).encode('utf-8')
+    except (AttributeError, psycopg2.Error):
+        return b''
+
+
+def _explain(cursor, template: bytes, statement: bytes) -> Optional[str]:
+    if cursor.name or not statement.lstrip()[:6].upper().startswith(EXPLAINABLE):
+        return None
+    conn = cursor.connection
+    if conn.get_transaction_status() == extensions.TRANSACTION_STATUS_INERROR:
+        return None
+
+    key = template[:MAX_LOGGED_QUERY]
+    now = time.monotonic()
+    with _lock:
+        if now - _explained_at.get(key, -EXPLAIN_INTERVAL) < EXPLAIN_INTERVAL:
+            return None
+        if len(_explained_at) >= MAX_EXPLAINED_STATEMENTS:
+            _explained_at.clear()
+        _explained_at[key] = now
+
+    savepoint = not conn.autocommit
+    plain = extensions.cursor(conn)
+    try:
+        if savepoint:
+            plain.execute('SAVEPOINT instrument_explain')
+        plain.execute(b'EXPLAIN ' + statement)
+        plan = '\n'.join(_mask_plan(row[0]) for row in plain.fetchall())
+        if savepoint:
+            plain.execute('RELEASE SAVEPOINT instrument_explain')
+        return plan
+    except psycopg2.Error as e:
+        if savepoint:
+            try:
+                plain.execute('ROLLBACK TO SAVEPOINT instrument_explain')
+            except psycopg2.Error:
+                pass
+        return f'EXPLAIN недоступен: {_error_code(e)}'
+    finally:
+        plain.close()
+
+
+def _record_query(cursor, query, started: float, failed: Optional[BaseException]) -> None:
+    trace = _current.get()
+    if trace is None:
+        return
+    elapsed = time.perf_counter() - started
+    trace.add('query', elapsed)
+    trace.queries += 1
+    if failed is not None:
+        trace.error = _error_code(failed)
+        return
+    if cursor.rowcount > 0 and cursor.description is None:
+        trace.affected += cursor.rowcount
+
+    if elapsed * 1000 >= SLOW_QUERY_MS and LOG_MODE != 'off':
+        template = _template(cursor, query)
+        trace.slow_queries.append({
+            'ms': round(elapsed * 1000, 3),
+            'query': QUOTED_LITERAL.sub("'?'", template[:MAX_LOGGED_QUERY].decode('utf-8', 'replace')),
+            'plan': _explain(cursor, template, cursor.query or b'')
+        })
+
+
+class TimedCursorMixin:
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        try:
+            result = super().execute(query, vars)
+        except Exception as e:
+            _record_query(self, query, started, e)
+            raise
+        _record_query(self, query, started, None)
+        return result
+
+    def executemany(self, query, vars_list):
+        started = time.perf_counter()
+        try:
+            result = super().executemany(query, vars_list)
+        except Exception as e:
+            _record_query(self, query, started, e)
+            raise
+        _record_query(self, query, started, None)
+        return result
+
+    def copy_expert(self, sql, file, size=8192):
+        with phase('query'):
+            return super().copy_expert(sql, file, size)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._record_fetch(started, 0 if row is None else 1)
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._record_fetch(started, len(rows))
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._record_fetch(started, len(rows))
+        return rows
+
+    @staticmethod
+    def _record_fetch(started: float, count: int) -> None:
+        trace = _current.get()
+        if trace is not None:
+            trace.add('fetch', time.perf_counter() - started)
+            trace.rows += count
+
+
+_timed_classes: Dict[type, type] = {}
+
+
+def timed_cursor_class(base: type) -> type:
+    timed = _timed_classes.get(base)
+    if timed is None:
+        timed = _timed_classes[base] = type(f'Timed{base.__name__}', (TimedCursorMixin, base), {})
+    return timed
+
+
+class InstrumentedConnection(extensions.connection):
+    def cursor(self, *args, **kwargs):
+        if ENABLED and len(args) < 2:
+            kwargs['cursor_factory'] = timed_cursor_class(kwargs.get('cursor_factory') or self.cursor_factory or extensions.cursor)
+        return super().cursor(*args, **kwargs)
+
+
+def metrics_snapshot() -> Dict[str, Any]:
+    with _lock:
+        requests = {}
+        for (name, labels), value in _counters.items():
+            if name != 'handler_requests_total':
+                continue
+            label_map = dict(labels)
+            function = requests.setdefault(label_map['function'], {})
+            function[label_map['status']] = function.get(label_map['status'], 0) + value
+        latency = {}
+        for labels, counts in _request_latency.series.items():
+            label_map = dict(labels)
+            entry = latency.setdefault(label_map['function'], {'count': 0, 'sumMs': 0.0})
+            entry['count'] += sum(counts[:-1])
+            entry['sumMs'] = round(entry['sumMs'] + counts[-1], 3)
+    return {'requests': requests, 'latency': latency, 'logMode': LOG_MODE, 'slowQueryMs': SLOW_QUERY_MS}
+
+
+def render_prometheus() -> str:
+    with _lock:
+        lines = []
+        lines += _request_latency.render('handler_request_duration_seconds', 'Время обработки запроса', 0.001)
+        lines += _phase_latency.render('handler_phase_duration_seconds', 'Время фаз запроса', 0.001)
+        lines += _response_size.render('handler_response_bytes', 'Размер тела ответа')
+        seen = set()
+        for (name, labels), value in sorted(_counters.items()):
+            if name not in seen:
+                seen.add(name)
+                lines.append(f'# TYPE {name} counter')
+            label_text = ','.join(f'{key}="{value_}"' for key, value_ in labels)
+            lines.append(f'{name}{{{label_text}}} {value:g}')
+    return '\n'.join(lines) + '\n'
+
+
+def prometheus_response() -> Dict[str, Any]:
+    return {
+        'statusCode': 200,
+        'headers': {'Content-Type': 'text/plain; version=0.0.4', 'Access-Control-Allow-Origin': '*'},
+        'isBase64Encoded': False,
+        'body': render_prometheus()
+    }
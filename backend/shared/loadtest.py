@@ -0,0 +1,239 @@
+'''
+Business: Нагрузочный прогон хендлеров (fines-api, gibdd-fines, vehicle-check, extended-api) на засеянных данных с замером p50/p95/p99, пропускной способности и пикового RSS и сравнением с сохранённым baseline
+Args: запуск из каталога backend: python -m shared.loadtest --dataset 1m [--concurrency 1,8,32] [--requests 500] [--scenario ...]
+      [--url http://127.0.0.1:8000 --server-pid PID] [--save]; LOADTEST_BASELINE - файл baseline, LOADTEST_TOLERANCE - допуск
+Returns: таблица замеров; код выхода 1 при регрессии относительно baseline
+'''
+import argparse
+import http.client
+import json
+import math
+import os
+import random
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import Dict, Any, Callable, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+from shared.seed import dataset_rows, vehicle_count, vehicle_plate, vehicle_vin, STATUSES
+from shared.server import load_handlers, build_event, invoke
+
+BASELINE_PATH = os.environ.get('LOADTEST_BASELINE', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'loadtest_baseline.json'))
+TOLERANCE = float(os.environ.get('LOADTEST_TOLERANCE', '0.2'))
+
+Request = Tuple[str, str, Optional[Dict[str, Any]]]
+Send = Callable[[str, str, Optional[bytes]], Tuple[int, int]]
+
+
+def _path(function: str, params: Dict[str, Any]) -> str:
+    return f'/{function}?{urlencode(params)}' if params else f'/{function}'
+
+
+def _month_range(rng: random.Random) -> Dict[str, str]:
+    start = date.today() - timedelta(days=rng.randrange(30, 3 * 365))
+    return {'dateFrom': start.isoformat(), 'dateTo': (start + timedelta(days=30)).isoformat()}
+
+
+SCENARIOS: Dict[str, Callable[[random.Random, int], Request]] = {
+    'fines-api.list': lambda rng, vehicles: ('GET', _path('fines-api', {'limit': 100}), None),
+    'fines-api.filter': lambda rng, vehicles: ('GET', _path('fines-api', {
+        'status': rng.choice(STATUSES), 'licensePlate': vehicle_plate(rng.randrange(vehicles))
+    }), None),
+    'gibdd-fines.list': lambda rng, vehicles: ('GET', _path('gibdd-fines', {}), None),
+    'gibdd-fines.plate': lambda rng, vehicles: ('GET', _path('gibdd-fines', {'search': vehicle_plate(rng.randrange(vehicles))}), None),
+    'gibdd-fines.month': lambda rng, vehicles: ('GET', _path('gibdd-fines', _month_range(rng)), None),
+    'vehicle-check.plate': lambda rng, vehicles: ('GET', _path('vehicle-check', {'license_plate': vehicle_plate(rng.randrange(vehicles))}), None),
+    'vehicle-check.batch': lambda rng, vehicles: ('POST', _path('vehicle-check', {}), {
+        'license_plates': [vehicle_plate(rng.randrange(vehicles)) for _ in range(20)],
+        'vins': [vehicle_vin(rng.randrange(vehicles)) for _ in range(5)]
+    }),
+    'extended-api.history': lambda rng, vehicles: ('GET', _path('extended-api', {'action': 'history'}), None),
+    'extended-api.analytics': lambda rng, vehicles: ('GET', _path('extended-api', {'action': 'analytics'}), None)
+}
+
+
+def in_process_sender(pool_size: int) -> Send:
+    os.environ.setdefault('DB_POOL_MAX_SIZE', str(pool_size))
+    handlers = load_handlers()
+
+    def send(method: str, path: str, body: Optional[bytes]) -> Tuple[int, int]:
+        name, event = build_event(method, path, {'Content-Type': 'application/json'}, body or b'')
+        response = invoke(handlers, name, event)
+        return int(response.get('statusCode', 200)), len(response.get('body') or '')
+    return send
+
+
+def http_sender(base_url: str) -> Send:
+    url = urlsplit(base_url)
+    local = threading.local()
+
+    def send(method: str, path: str, body: Optional[bytes]) -> Tuple[int, int]:
+        conn = getattr(local, 'conn', None)
+        if conn is None:
+            conn = local.conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=60)
+        try:
+            conn.request(method, url.path.rstrip('/') + path, body=body, headers={'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            payload = response.read()
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            local.conn = None
+            raise
+        return response.status, len(payload)
+    return send
+
+
+def peak_rss_mb(pid: Optional[int] = None) -> float:
+    try:
+        with open(f"/proc/{pid or 'self'}/status") as status_file:
+            for line in status_file:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def reset_peak_rss(pid: Optional[int] = None) -> None:
+    try:
+        with open(f"/proc/{pid or 'self'}/clear_refs", 'w') as clear_refs:
+            clear_refs.write('5')
+    except OSError:
+        pass
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(math.ceil(pct / 100 * len(sorted_values)) - 1, 0)]
+
+
+def run_scenario(send: Send, scenario: str, vehicles: int, concurrency: int, requests: int,
+                 warmup: int, seed: int = 0, server_pid: Optional[int] = None) -> Dict[str, Any]:
+    make_request = SCENARIOS[scenario]
+    rng = random.Random(seed)
+    planned = [make_request(rng, vehicles) for _ in range(warmup + requests)]
+    encoded = [(method, path, json.dumps(body).encode('utf-8') if body is not None else None) for method, path, body in planned]
+
+    for method, path, body in encoded[:warmup]:
+        send(method, path, body)
+
+    latencies: List[float] = []
+    errors = 0
+    received_bytes = 0
+    lock = threading.Lock()
+    position = iter(range(warmup, warmup + requests))
+
+    def worker() -> None:
+        nonlocal errors, received_bytes
+        while True:
+            with lock:
+                index = next(position, None)
+            if index is None:
+                return
+            method, path, body = encoded[index]
+            started = time.perf_counter()
+            try:
+                status, size = send(method, path, body)
+            except Exception:
+                status, size = 599, 0
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                latencies.append(elapsed)
+                received_bytes += size
+                if status >= 500:
+                    errors += 1
+
+    reset_peak_rss(server_pid)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(concurrency):
+            executor.submit(worker)
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'p50': round(percentile(latencies, 50), 2),
+        'p95': round(percentile(latencies, 95), 2),
+        'p99': round(percentile(latencies, 99), 2),
+        'throughput': round(len(latencies) / wall, 1) if wall else 0.0,
+        'avgBytes': round(received_bytes / len(latencies)) if latencies else 0,
+        'peakRssMb': peak_rss_mb(server_pid)
+    }
+
+
+def load_baseline(path: str = BASELINE_PATH) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as baseline_file:
+        return json.load(baseline_file)
+
+
+def save_baseline(baseline: Dict[str, Any], path: str = BASELINE_PATH) -> None:
+    with open(path, 'w', encoding='utf-8') as baseline_file:
+        json.dump(baseline, baseline_file, ensure_ascii=False, indent=2, sort_keys=True)
+        baseline_file.write('\n')
+
+
+def regressions(current: Dict[str, Any], reference: Optional[Dict[str, Any]], tolerance: float = TOLERANCE) -> List[str]:
+    if not reference:
+        return []
+    found = []
+    for metric in ('p95', 'p99', 'peakRssMb'):
+        if reference.get(metric) and current[metric] > reference[metric] * (1 + tolerance):
+            found.append(f'{metric} {reference[metric]} -> {current[metric]}')
+    if reference.get('throughput') and current['throughput'] < reference['throughput'] * (1 - tolerance):
+        found.append(f"throughput {reference['throughput']} -> {current['throughput']}")
+    if current['errors'] > reference.get('errors', 0):
+        found.append(f"errors {reference.get('errors', 0)} -> {current['errors']}")
+    return found
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(prog='python -m shared.loadtest')
+    parser.add_argument('--dataset', default='10k', help='10k, 1m, 10m или число строк, засеянных shared.seed')
+    parser.add_argument('--concurrency', default='1,8,32')
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS))
+    parser.add_argument('--url', help='адрес запущенного python -m shared.server; без него хендлеры вызываются в процессе')
+    parser.add_argument('--server-pid', type=int, help='pid сервера для замера пикового RSS')
+    parser.add_argument('--save', action='store_true', help='записать результаты в baseline')
+    args = parser.parse_args(argv)
+
+    dataset = args.dataset.lower()
+    vehicles = vehicle_count(dataset_rows(dataset))
+    levels = [int(value) for value in args.concurrency.split(',')]
+    send = http_sender(args.url) if args.url else in_process_sender(max(levels))
+    baseline = load_baseline()
+    reference = baseline.get(dataset, {})
+    failed = False
+
+    print(f"{'сценарий':<26} {'c':>3} {'p50':>8} {'p95':>8} {'p99':>8} {'rps':>8} {'RSS МБ':>8} {'ошибки':>6}")
+    for scenario in args.scenario or list(SCENARIOS):
+        for concurrency in levels:
+            key = f'{scenario}@c{concurrency}'
+            result = run_scenario(send, scenario, vehicles, concurrency, args.requests, args.warmup,
+                                  server_pid=args.server_pid)
+            problems = [] if args.save else regressions(result, reference.get(key))
+            failed = failed or bool(problems)
+            print(f"{scenario:<26} {concurrency:>3} {result['p50']:>8} {result['p95']:>8} {result['p99']:>8} "
+                  f"{result['throughput']:>8} {result['peakRssMb']:>8} {result['errors']:>6}"
+                  + (f"  РЕГРЕССИЯ: {'; '.join(problems)}" if problems else ''))
+            if args.save:
+                baseline.setdefault(dataset, {})[key] = result
+
+    if args.save:
+        save_baseline(baseline)
+        print(f'baseline: {BASELINE_PATH}', file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,297 @@
+'''
+Business: Планировщик и обработчик уведомлений по неоплаченным штрафам gibdd_fines: окончание скидки 50%, срок оплаты и просрочка.
+          Планировщик читает только узкие окна дат по индексу (status, violation_date) и ставит задачи в очередь fine_notifications,
+          пул обработчиков разбирает очередь через FOR UPDATE SKIP LOCKED с арендой задачи и повторами с отсрочкой
+Args: запуск из каталога backend: python -m shared.notifications schedule | work | run | purge [дней];
+      NOTIFY_WORKERS, NOTIFY_BATCH_SIZE, NOTIFY_LEASE, NOTIFY_MAX_ATTEMPTS, NOTIFY_RETRY_DELAY, NOTIFY_SCAN_INTERVAL,
+      NOTIFY_DISCOUNT_NOTICE_DAYS, NOTIFY_PAYMENT_NOTICE_DAYS, NOTIFY_OVERDUE_LOOKBACK_DAYS, NOTIFY_RETENTION_DAYS;
+      NOTIFY_WEBHOOK_URL - куда отправлять уведомления POST-запросом (без него уведомление только сохраняется для ленты), NOTIFY_WEBHOOK_TIMEOUT
+Returns: schedule -> число поставленных задач по видам; work -> число обработанных задач по итогам; purge -> число удалённых строк
+'''
+import json
+import os
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+
+from psycopg2.extras import execute_values
+
+from shared.db import connection
+from shared.analytics import UNPAID_STATUSES
+from shared.partitions import FINE_IDS_DATE_FILTER
+
+DISCOUNT_DAYS = 20
+PAYMENT_DAYS = 60
+
+WORKERS = int(os.environ.get('NOTIFY_WORKERS', '4'))
+BATCH_SIZE = int(os.environ.get('NOTIFY_BATCH_SIZE', '100'))
+LEASE_SECONDS = int(os.environ.get('NOTIFY_LEASE', '300'))
+MAX_ATTEMPTS = int(os.environ.get('NOTIFY_MAX_ATTEMPTS', '5'))
+RETRY_DELAY = int(os.environ.get('NOTIFY_RETRY_DELAY', '60'))
+SCAN_INTERVAL = float(os.environ.get('NOTIFY_SCAN_INTERVAL', '3600'))
+IDLE_SLEEP = 5.0
+WEBHOOK_URL = os.environ.get('NOTIFY_WEBHOOK_URL')
+WEBHOOK_TIMEOUT = int(os.environ.get('NOTIFY_WEBHOOK_TIMEOUT', '10'))
+
+RULES = {
+    'discount_expiring': (DISCOUNT_DAYS, 0, int(os.environ.get('NOTIFY_DISCOUNT_NOTICE_DAYS', '3'))),
+    'payment_due': (PAYMENT_DAYS, 0, int(os.environ.get('NOTIFY_PAYMENT_NOTICE_DAYS', '7'))),
+    'overdue': (PAYMENT_DAYS, -int(os.environ.get('NOTIFY_OVERDUE_LOOKBACK_DAYS', '7')), -1)
+}
+
+NOTIFICATION_LEVELS = {
+    'discount_expiring': 'success',
+    'payment_due': 'info',
+    'overdue': 'warning'
+}
+
+ENQUEUE_DAY = '''
+    INSERT INTO fine_notifications (fine_id, kind, deadline, payload)
+    SELECT f.id, %(kind)s, (f.violation_date::date + %(deadline_days)s),
+           jsonb_build_object(
+               'violationNumber', f.violation_number,
+               'violationType', f.violation_type,
+               'violationDate', f.violation_date,
+               'licensePlate', f.license_plate,
+               'driverId', f.driver_id,
+               'driverName', f.driver_name,
+               'amount', f.amount
+           )
+    FROM gibdd_fines f
+    WHERE f.status = ANY(%(statuses)s)
+      AND f.violation_date >= (CURRENT_DATE - %(days_ago)s)::timestamptz
+      AND f.violation_date < (CURRENT_DATE - %(days_ago)s + 1)::timestamptz
+    ON CONFLICT (fine_id, kind) DO NOTHING
+'''
+
+CLAIM = '''
+    WITH claimed AS (
+        SELECT id FROM fine_notifications
+        WHERE status IN ('pending', 'processing') AND run_at <= CURRENT_TIMESTAMP
+        ORDER BY run_at, id
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE fine_notifications n
+    SET status = 'processing', attempts = n.attempts + 1,
+        run_at = CURRENT_TIMESTAMP + make_interval(secs => %s)
+    FROM claimed
+    WHERE n.id = claimed.id
+    RETURNING n.id, n.attempts, n.fine_id, n.kind, n.deadline, n.payload
+'''
+
+COMPLETE = f'''
+    UPDATE fine_notifications n
+    SET status = CASE
+            WHEN r.outcome <> 'retry' THEN r.outcome
+            WHEN n.attempts >= {MAX_ATTEMPTS} THEN 'failed'
+            ELSE 'pending'
+        END,
+        run_at = CASE
+            WHEN r.outcome = 'retry' THEN CURRENT_TIMESTAMP + make_interval(secs => {RETRY_DELAY} * power(2, n.attempts - 1))
+            ELSE n.run_at
+        END,
+        sent_at = CASE WHEN r.outcome = 'sent' THEN CURRENT_TIMESTAMP END,
+        title = r.title, message = r.message, last_error = r.error
+    FROM (VALUES %s) AS r(id, attempts, outcome, title, message, error)
+    WHERE n.id = r.id AND n.attempts = r.attempts AND n.status = 'processing'
+'''
+
+Job = Tuple[int, int, int, str, Any, Dict[str, Any]]
+
+
+def schedule(conn) -> Dict[str, int]:
+    enqueued = {}
+    with conn.cursor() as cur:
+        for kind, (deadline_days, first_day_left, last_day_left) in RULES.items():
+            enqueued[kind] = 0
+            for days_left in range(first_day_left, last_day_left + 1):
+                cur.execute(ENQUEUE_DAY, {
+                    'kind': kind,
+                    'deadline_days': deadline_days,
+                    'days_ago': deadline_days - days_left,
+                    'statuses': list(UNPAID_STATUSES)
+                })
+                enqueued[kind] += cur.rowcount
+                conn.commit()
+    return enqueued
+
+
+def render(kind: str, deadline: Any, payload: Dict[str, Any]) -> Tuple[str, str]:
+    fine = f"Штраф {payload.get('violationNumber')} ({payload.get('violationType')})"
+    amount = float(payload.get('amount') or 0)
+    if kind == 'discount_expiring':
+        return ('Скоро закончится скидка 50%',
+                f'{fine} можно оплатить со скидкой до {deadline:%d.%m.%Y}: {amount / 2:.0f} ₽ вместо {amount:.0f} ₽.')
+    if kind == 'payment_due':
+        return ('Приближается срок оплаты', f'{fine} на сумму {amount:.0f} ₽ нужно оплатить до {deadline:%d.%m.%Y}.')
+    return ('Просроченный штраф',
+            f'{fine} не оплачен более {PAYMENT_DAYS} дней. Возможны дополнительные санкции.')
+
+
+def deliver(job_id: int, fine_id: int, kind: str, title: str, message: str, payload: Dict[str, Any]) -> None:
+    if not WEBHOOK_URL:
+        return
+    request = urllib.request.Request(
+        WEBHOOK_URL,
+        data=json.dumps({
+            'id': job_id, 'fineId': fine_id, 'kind': kind, 'type': NOTIFICATION_LEVELS.get(kind, 'info'),
+            'title': title, 'message': message, 'fine': payload
+        }, ensure_ascii=False).encode('utf-8'),
+        headers={'Content-Type': 'application/json'},
+        method='POST'
+    )
+    with urllib.request.urlopen(request, timeout=WEBHOOK_TIMEOUT) as response:
+        response.read()
+
+
+def claim(conn, batch_size: int) -> List[Job]:
+    with conn.cursor() as cur:
+        cur.execute(CLAIM, (batch_size, LEASE_SECONDS))
+        jobs = [tuple(row) for row in cur.fetchall()]
+    conn.commit()
+    return jobs
+
+
+def unpaid_fine_ids(conn, fine_ids: List[int]) -> set:
+    with conn.cursor() as cur:
+        cur.execute(f'SELECT id FROM gibdd_fines WHERE id = ANY(%s) AND {FINE_IDS_DATE_FILTER} AND status = ANY(%s)',
+                    (fine_ids, fine_ids, list(UNPAID_STATUSES)))
+        unpaid = {row[0] for row in cur.fetchall()}
+    conn.rollback()
+    return unpaid
+
+
+def lease_batch_size(batch_size: int) -> int:
+    if not WEBHOOK_URL:
+        return batch_size
+    return max(1, min(batch_size, LEASE_SECONDS // (2 * WEBHOOK_TIMEOUT)))
+
+
+def process_batch(batch_size: int = BATCH_SIZE) -> Dict[str, int]:
+    with connection() as conn:
+        jobs = claim(conn, lease_batch_size(batch_size))
+        if not jobs:
+            return {}
+        unpaid = unpaid_fine_ids(conn, sorted({fine_id for _, _, fine_id, _, _, _ in jobs}))
+
+        results = []
+        for job_id, attempts, fine_id, kind, deadline, payload in jobs:
+            if fine_id not in unpaid:
+                results.append((job_id, attempts, 'skipped', None, None, None))
+                continue
+            title, message = render(kind, deadline, payload)
+            try:
+                deliver(job_id, fine_id, kind, title, message, payload)
+            except Exception as e:
+                results.append((job_id, attempts, 'retry', title, message, f'{type(e).__name__}: {e}'[:1000]))
+            else:
+                results.append((job_id, attempts, 'sent', title, message, None))
+
+        with conn.cursor() as cur:
+            execute_values(cur, COMPLETE, results, template='(%s::BIGINT, %s::INTEGER, %s, %s, %s, %s)')
+        conn.commit()
+
+    outcomes: Dict[str, int] = {}
+    for _, _, outcome, _, _, _ in results:
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    return outcomes
+
+
+class WorkerPool:
+    def __init__(self, workers: int = WORKERS, batch_size: int = BATCH_SIZE, idle_sleep: float = IDLE_SLEEP):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.idle_sleep = idle_sleep
+        self.stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._stats = {'batches': 0, 'sent': 0, 'skipped': 0, 'retry': 0, 'errors': 0}
+
+    def _work(self, drain: bool) -> None:
+        while not self.stop_event.is_set():
+            try:
+                outcomes = process_batch(self.batch_size)
+            except Exception as e:
+                with self._lock:
+                    self._stats['errors'] += 1
+                print(f'notifications: {type(e).__name__}: {e}', file=sys.stderr)
+                self.stop_event.wait(self.idle_sleep)
+                continue
+            with self._lock:
+                if outcomes:
+                    self._stats['batches'] += 1
+                for outcome, count in outcomes.items():
+                    self._stats[outcome] = self._stats.get(outcome, 0) + count
+            if not outcomes:
+                if drain:
+                    return
+                self.stop_event.wait(self.idle_sleep)
+
+    def run(self, drain: bool = False) -> Dict[str, int]:
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='notify') as executor:
+            for _ in range(self.workers):
+                executor.submit(self._work, drain)
+        return self.stats()
+
+    def stop(self) -> None:
+        self.stop_event.set()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+
+def run_scheduler(stop_event: threading.Event, interval: float = SCAN_INTERVAL) -> None:
+    while not stop_event.is_set():
+        try:
+            with connection() as conn:
+                print(f'notifications: {schedule(conn)}', file=sys.stderr)
+        except Exception as e:
+            print(f'notifications: {type(e).__name__}: {e}', file=sys.stderr)
+        stop_event.wait(interval)
+
+
+def purge(conn, keep_days: int) -> int:
+    with conn.cursor() as cur:
+        cur.execute('''
+            DELETE FROM fine_notifications
+            WHERE status IN ('sent', 'skipped', 'failed') AND created_at < CURRENT_TIMESTAMP - make_interval(days => %s)
+        ''', (keep_days,))
+        deleted = cur.rowcount
+    conn.commit()
+    return deleted
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else ''
+    if command not in ('schedule', 'work', 'run', 'purge'):
+        sys.exit('Использование: python -m shared.notifications schedule | work | run | purge [дней]')
+
+    os.environ.setdefault('DB_POOL_MAX_SIZE', str(WORKERS + 1))
+    started = time.monotonic()
+
+    if command == 'schedule':
+        with connection() as schedule_conn:
+            print(f'fine_notifications: {schedule(schedule_conn)}')
+    elif command == 'purge':
+        days = int(sys.argv[2]) if len(sys.argv) > 2 else int(os.environ.get('NOTIFY_RETENTION_DAYS', '180'))
+        with connection() as purge_conn:
+            print(f'fine_notifications: {purge(purge_conn, days)}')
+    else:
+        pool = WorkerPool()
+        scheduler = None
+        if command == 'run':
+            scheduler = threading.Thread(target=run_scheduler, args=(pool.stop_event,), name='notify-scheduler', daemon=True)
+            scheduler.start()
+        try:
+            print(f'fine_notifications: {pool.run(drain=command == "work")}')
+        except KeyboardInterrupt:
+            pool.stop()
+            print(f'fine_notifications: {pool.stats()}')
+        if scheduler is not None:
+            scheduler.join(timeout=1)
+
+    print(f'{time.monotonic() - started:.1f} с', file=sys.stderr)
@@ -0,0 +1,29 @@
+'''
+Business: Курсоры keyset-пагинации (дата, id) для постраничной выдачи штрафов и истории удалений
+Args: value - дата последней строки страницы, row_id - её id; cursor - строка из параметра cursor
+Returns: непрозрачный base64-курсор или пара (ISO-дата, id) для условия (date, id) < (%s, %s);
+         parse_date_filter - ISO-дата из фильтров dateFrom/dateTo или ValueError
+'''
+import base64
+import json
+from datetime import datetime
+from typing import Tuple, Optional
+
+
+def encode_cursor(value: datetime, row_id: int) -> str:
+    raw = json.dumps([value.isoformat(), row_id])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except Exception:
+        raise ValueError('invalid cursor')
+    return datetime.fromisoformat(value).isoformat(), int(row_id)
+
+
+def parse_date_filter(value: Optional[str]) -> Optional[str]:
+    if not value:
+        return None
+    return datetime.fromisoformat(value).isoformat()
@@ -0,0 +1,151 @@
+'''
+Business: Проверка действия парковочных пропусков по госномеру и зоне из in-memory индекса активных пропусков с инкрементальным обновлением по updated_at
+Args: plates - госномера (любая раскладка), zone - зона парковки или None; PARKING_REFRESH_INTERVAL, PARKING_REFRESH_OVERLAP из окружения
+Returns: dict по каждому госномеру: valid, passNumber, validUntil, zones
+'''
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+
+from shared.db import connection
+from shared.plates import normalize_plate
+
+ACTIVE_STATUS = 'Активен'
+REVOKED_STATUS = 'Отозван'
+ALL_ZONES = 'Все зоны'
+
+PASS_COLUMNS = '''
+    SELECT id, pass_number, plate_normalized, valid_from, valid_until,
+           parking_zones, status, updated_at
+    FROM parking_passes
+'''
+
+
+def parse_zones(value: Any) -> List[str]:
+    if isinstance(value, str):
+        value = value.split(',')
+    if not isinstance(value, list):
+        return [ALL_ZONES]
+    zones = [str(zone).strip() for zone in value if zone is not None and str(zone).strip()]
+    return zones or [ALL_ZONES]
+
+
+class ActivePassCache:
+    def __init__(self, refresh_interval: float = 5.0, overlap: float = 5.0):
+        self.refresh_interval = refresh_interval
+        self.overlap = timedelta(seconds=overlap)
+        self._by_plate: Dict[str, Dict[int, Tuple[str, datetime, datetime, Tuple[str, ...]]]] = {}
+        self._plate_of: Dict[int, str] = {}
+        self._watermark: Optional[datetime] = None
+        self._db_now: Optional[datetime] = None
+        self._db_now_at = 0.0
+        self._refreshed_at = float('-inf')
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._stats = {'checks': 0, 'fullLoads': 0, 'refreshes': 0, 'rowsApplied': 0}
+
+    def check(self, plates: List[str], zone: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        self.ensure_fresh()
+        result = {}
+        with self._lock:
+            now = self._now()
+            self._stats['checks'] += len(plates)
+            for plate in plates:
+                match = None
+                for pass_number, valid_from, valid_until, zones in self._by_plate.get(normalize_plate(plate), {}).values():
+                    if valid_from <= now < valid_until and (not zone or ALL_ZONES in zones or zone in zones):
+                        if match is None or valid_until > match[2]:
+                            match = (pass_number, valid_from, valid_until, zones)
+                result[plate] = {
+                    'valid': match is not None,
+                    'passNumber': match[0] if match else None,
+                    'validUntil': match[2].isoformat() if match else None,
+                    'zones': list(match[3]) if match else []
+                }
+        return result
+
+    def ensure_fresh(self) -> None:
+        if time.monotonic() - self._refreshed_at < self.refresh_interval:
+            return
+        if not self._refresh_lock.acquire(blocking=self._watermark is None):
+            return
+        try:
+            if time.monotonic() - self._refreshed_at >= self.refresh_interval:
+                self.refresh()
+        finally:
+            self._refresh_lock.release()
+
+    def _now(self) -> datetime:
+        return self._db_now + timedelta(seconds=time.monotonic() - self._db_now_at)
+
+    def mark_stale(self) -> None:
+        self._refreshed_at = float('-inf')
+
+    def refresh(self) -> None:
+        with connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute('SELECT LOCALTIMESTAMP')
+                now = cur.fetchone()[0]
+                now_at = time.monotonic()
+                if self._watermark is None:
+                    cur.execute(PASS_COLUMNS + ' WHERE status = %s AND valid_until > CURRENT_TIMESTAMP', (ACTIVE_STATUS,))
+                else:
+                    cur.execute(PASS_COLUMNS + ' WHERE updated_at > %s', (self._watermark - self.overlap,))
+                rows = cur.fetchall()
+            conn.rollback()
+
+        with self._lock:
+            if self._watermark is None:
+                self._stats['fullLoads'] += 1
+            self._stats['refreshes'] += 1
+            self._stats['rowsApplied'] += len(rows)
+            for pass_id, pass_number, plate, valid_from, valid_until, zones, status, updated_at in rows:
+                self._remove(pass_id)
+                if status == ACTIVE_STATUS and valid_until > now:
+                    self._by_plate.setdefault(plate, {})[pass_id] = (
+                        pass_number, valid_from or datetime.min, valid_until, tuple(zones or (ALL_ZONES,))
+                    )
+                    self._plate_of[pass_id] = plate
+                if updated_at and (self._watermark is None or updated_at > self._watermark):
+                    self._watermark = updated_at
+            if self._watermark is None:
+                self._watermark = now
+            for pass_id in [pid for pid, plate in self._plate_of.items() if self._by_plate[plate][pid][2] <= now]:
+                self._remove(pass_id)
+            self._db_now, self._db_now_at = now, now_at
+            self._refreshed_at = time.monotonic()
+
+    def _remove(self, pass_id: int) -> None:
+        plate = self._plate_of.pop(pass_id, None)
+        if plate is None:
+            return
+        passes = self._by_plate[plate]
+        passes.pop(pass_id, None)
+        if not passes:
+            del self._by_plate[plate]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            result = dict(self._stats)
+            result['plates'] = len(self._by_plate)
+            result['passes'] = len(self._plate_of)
+            result['watermark'] = self._watermark.isoformat() if self._watermark else None
+        return result
+
+
+_cache: Optional[ActivePassCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_pass_cache() -> ActivePassCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ActivePassCache(
+                    refresh_interval=float(os.environ.get('PARKING_REFRESH_INTERVAL', '5')),
+                    overlap=float(os.environ.get('PARKING_REFRESH_OVERLAP', '5'))
+                )
+    return _cache
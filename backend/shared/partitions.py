@@ -0,0 +1,67 @@
+'''
+Business: Обслуживание помесячных партиций gibdd_fines: заблаговременное создание партиций, разбор строк из default-партиции, условия отсечения партиций при доступе по id
+Args: conn - соединение psycopg2; PARTITION_MONTHS_AHEAD, PARTITION_CHECK_INTERVAL, PARTITION_LOCK_TIMEOUT из окружения;
+      maintain_partitions() работает в собственной транзакции и отмечает проверку только после её коммита;
+      запуск из каталога backend: python -m shared.partitions [месяцев вперёд]
+Returns: число созданных партиций
+'''
+import os
+import sys
+import threading
+import time
+
+import psycopg2
+
+from shared.db import connection, PoolTimeout
+
+FINE_ID_DATE_FILTER = 'violation_date = (SELECT violation_date FROM gibdd_fine_numbers WHERE fine_id = %s)'
+FINE_IDS_DATE_FILTER = 'violation_date = ANY(ARRAY(SELECT violation_date FROM gibdd_fine_numbers WHERE fine_id = ANY(%s)))'
+
+MONTHS_AHEAD = int(os.environ.get('PARTITION_MONTHS_AHEAD', '12'))
+CHECK_INTERVAL = float(os.environ.get('PARTITION_CHECK_INTERVAL', '86400'))
+LOCK_TIMEOUT = os.environ.get('PARTITION_LOCK_TIMEOUT', '2s')
+
+_checked_at = float('-inf')
+_lock = threading.Lock()
+
+
+def ensure_partitions(conn, months_ahead: int = MONTHS_AHEAD) -> int:
+    with conn.cursor() as cur:
+        cur.execute(
+            'SELECT ensure_gibdd_fines_partitions(CURRENT_DATE, (CURRENT_DATE + make_interval(months => %s))::date)',
+            (months_ahead,)
+        )
+        created = cur.fetchone()[0]
+
+        cur.execute("SELECT DISTINCT date_trunc('month', violation_date)::date FROM gibdd_fines_default")
+        for (month,) in cur.fetchall():
+            cur.execute('SELECT ensure_gibdd_fines_partitions(%s, %s)', (month, month))
+            created += cur.fetchone()[0]
+    return created
+
+
+def maintain_partitions() -> int:
+    global _checked_at
+    if time.monotonic() - _checked_at < CHECK_INTERVAL:
+        return 0
+    with _lock:
+        if time.monotonic() - _checked_at < CHECK_INTERVAL:
+            return 0
+        try:
+            with connection() as maintenance_conn:
+                with maintenance_conn.cursor() as cur:
+                    cur.execute('SELECT set_config(%s, %s, true)', ('lock_timeout', LOCK_TIMEOUT))
+                created = ensure_partitions(maintenance_conn)
+                maintenance_conn.commit()
+        except (psycopg2.Error, PoolTimeout):
+            return 0
+        _checked_at = time.monotonic()
+    return created
+
+
+if __name__ == '__main__':
+    ahead = int(sys.argv[1]) if len(sys.argv) > 1 else MONTHS_AHEAD
+    with connection() as maintenance_conn:
+        total = ensure_partitions(maintenance_conn, ahead)
+        maintenance_conn.commit()
+    print(f'gibdd_fines: {total}')
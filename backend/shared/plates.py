@@ -0,0 +1,24 @@
+'''
+Business: Нормализация госномеров: латинские двойники букв приводятся к кириллице, пробелы и дефисы удаляются
+Args: plate - госномер в произвольном написании (А123ВВ777, a 123 bb 777, ...)
+Returns: каноническая запись госномера, совпадающая с SQL-функцией normalize_plate()
+'''
+import re
+from typing import Optional
+
+LATIN_LOOKALIKES = 'ABEKMHOPCTYX'
+CYRILLIC_LETTERS = 'АВЕКМНОРСТУХ'
+
+_TRANSLATION = str.maketrans(LATIN_LOOKALIKES, CYRILLIC_LETTERS)
+_SEPARATORS = re.compile(r'[\s\-]+')
+_PLATE_PATTERN = re.compile(r'^[АВЕКМНОРСТУХ]\d{3}[АВЕКМНОРСТУХ]{2}\d{2,3}$')
+
+
+def normalize_plate(plate: Optional[str]) -> Optional[str]:
+    if plate is None:
+        return None
+    return _SEPARATORS.sub('', plate).upper().translate(_TRANSLATION)
+
+
+def is_plate(value: str) -> bool:
+    return bool(_PLATE_PATTERN.match(normalize_plate(value) or ''))
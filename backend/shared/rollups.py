@@ -0,0 +1,33 @@
+'''
+Business: Пересборка суточных агрегатов fine_stats_daily (бэкфилл после миграций и ручных правок данных)
+Args: source - gibdd_fines, fines или all; запуск: python -m shared.rollups [source] из каталога backend
+Returns: число пересобранных строк агрегатов по каждому источнику
+'''
+import sys
+from typing import Dict
+
+from shared.analytics import ANALYTICS_SOURCES
+from shared.db import connection
+
+
+def rebuild_rollups(cur, source: str) -> int:
+    cur.execute('SELECT rebuild_fine_stats_daily(%s)', (source,))
+    return cur.fetchone()[0]
+
+
+def rebuild_all(sources=None) -> Dict[str, int]:
+    result = {}
+    with connection() as conn:
+        with conn.cursor() as cur:
+            for source in sources or ANALYTICS_SOURCES:
+                result[source] = rebuild_rollups(cur, source)
+                conn.commit()
+    return result
+
+
+if __name__ == '__main__':
+    requested = sys.argv[1] if len(sys.argv) > 1 else 'all'
+    if requested != 'all' and requested not in ANALYTICS_SOURCES:
+        sys.exit(f'Неизвестный источник: {requested}')
+    for name, rows in rebuild_all(None if requested == 'all' else [requested]).items():
+        print(f'{name}: {rows}')
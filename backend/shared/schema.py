@@ -0,0 +1,28 @@
+'''
+Business: Однократная на процесс проверка наличия таблиц, создаваемых миграциями db_migrations, вместо DDL в обработчиках
+Args: cur - курсор psycopg2, tables - имена обязательных таблиц
+Returns: None при успехе (результат кэшируется в процессе) или SchemaMissing со списком отсутствующих таблиц
+'''
+import threading
+from typing import Iterable, Set
+
+_verified: Set[str] = set()
+_lock = threading.Lock()
+
+
+class SchemaMissing(Exception):
+    pass
+
+
+def require_tables(cur, tables: Iterable[str]) -> None:
+    pending = [table for table in tables if table not in _verified]
+    if not pending:
+        return
+
+    cur.execute('SELECT t FROM unnest(%s::text[]) AS t WHERE to_regclass(t) IS NULL', (pending,))
+    missing = [row[0] for row in cur.fetchall()]
+    if missing:
+        raise SchemaMissing(f"Не созданы таблицы: {', '.join(missing)}. Примените миграции db_migrations")
+
+    with _lock:
+        _verified.update(pending)
@@ -0,0 +1,223 @@
+'''
+Business: Наполнение локальной БД синтетическими водителями, ТС и штрафами (fines, gibdd_fines) для нагрузочных замеров на 10k/1M/10M строк
+Args: conn - соединение psycopg2, rows - целевое число штрафов в каждой таблице; запуск из каталога backend:
+      python -m shared.seed <10k|1m|10m|число>; повторный запуск досевает только недостающие строки
+Returns: dict с числом добавленных водителей, ТС и штрафов по таблицам
+'''
+import io
+import sys
+import time
+from typing import Dict, Any, List, Tuple
+
+from shared.db import connection
+
+DATASETS = {'10k': 10_000, '1m': 1_000_000, '10m': 10_000_000}
+SEED_PREFIX = 'SIM'
+SEED_PREFIX_END = 'SIN'
+VIN_PREFIX = 'XTA'
+LICENSE_PREFIX = 'SD'
+BATCH_ROWS = 100_000
+COPY_ROWS = 50_000
+HISTORY_DAYS = 3 * 365
+
+PLATE_LETTERS = 'АВЕКМНОРСТУХ'
+PLATE_REGIONS = ['97', '797', '90', '150', '190', '750', '98', '178', '47', '147', '52', '152', '16', '116', '716', '66']
+PLATES_PER_REGION = len(PLATE_LETTERS) ** 3 * 999
+
+LAST_NAMES = ['Петров', 'Иванов', 'Сидоров', 'Козлов', 'Михайлов', 'Федоров', 'Николаев', 'Смирнов', 'Кузнецов',
+              'Морозов', 'Алексеев', 'Борисов', 'Васильев', 'Григорьев', 'Денисов', 'Егоров']
+FIRST_NAMES = ['Петр', 'Иван', 'Сидор', 'Александр', 'Дмитрий', 'Максим', 'Андрей', 'Игорь', 'Владимир',
+               'Артем', 'Сергей', 'Олег', 'Михаил', 'Павел']
+MIDDLE_NAMES = ['Петрович', 'Иванович', 'Сидорович', 'Олегович', 'Сергеевич', 'Викторович', 'Павлович',
+                'Дмитриевич', 'Николаевич', 'Александрович']
+BRANDS = [('Lada', 'Vesta'), ('Lada', 'Granta'), ('Kia', 'Rio'), ('Hyundai', 'Solaris'), ('Toyota', 'Camry'),
+          ('Volkswagen', 'Polo'), ('Skoda', 'Octavia'), ('Renault', 'Logan'), ('BMW', 'X5'), ('Haval', 'Jolion')]
+COLORS = ['Белый', 'Черный', 'Серый', 'Серебристый', 'Синий', 'Красный']
+
+VIOLATIONS = [
+    ('Превышение скорости', 500, 'Превышение на 20-40 км/ч'),
+    ('Превышение скорости', 1500, 'Превышение на 40-60 км/ч'),
+    ('Превышение скорости', 5000, 'Превышение на 60-80 км/ч'),
+    ('Нарушение правил стоянки', 3000, 'Парковка в неположенном месте'),
+    ('Проезд на красный свет', 1000, 'Нарушение сигнала светофора'),
+    ('Нарушение правил обгона', 5000, 'Обгон на запрещающий знак'),
+    ('Непредоставление преимущества', 1500, 'Не уступил дорогу пешеходу'),
+    ('Нарушение разметки', 1500, 'Пересечение сплошной линии'),
+    ('Разговор по телефону', 1500, 'Использование телефона без гарнитуры'),
+    ('Управление в нетрезвом виде', 30000, 'Алкогольное опьянение')
+]
+LOCATIONS = ['МКАД 23км', 'ул. Ленина, д.5', 'Проспект Мира, д.12', 'Трасса М4, 45км', 'пл. Победы', 'ул. Садовая, д.8',
+             'Кутузовский проспект', 'Трасса М11, 120км', 'Тверская ул., д.22', 'Невский проспект', 'М7 105км']
+STATUSES = ['Не оплачен'] * 5 + ['Оплачен'] * 3 + ['В обработке'] * 2
+
+
+def dataset_rows(value: str) -> int:
+    return DATASETS.get(value.lower()) or int(value)
+
+
+def vehicle_count(rows: int) -> int:
+    return max(rows // 5, 1)
+
+
+def driver_count(rows: int) -> int:
+    return max(rows // 10, 1)
+
+
+def vehicle_plate(n: int) -> str:
+    region, rest = divmod(n, PLATES_PER_REGION)
+    letters, number = divmod(rest, 999)
+    first, rest_letters = divmod(letters, len(PLATE_LETTERS) ** 2)
+    second, third = divmod(rest_letters, len(PLATE_LETTERS))
+    return (f'{PLATE_LETTERS[first]}{number + 1:03d}{PLATE_LETTERS[second]}{PLATE_LETTERS[third]}'
+            f'{PLATE_REGIONS[region % len(PLATE_REGIONS)]}')
+
+
+def vehicle_vin(n: int) -> str:
+    return f'{VIN_PREFIX}{n:014d}'
+
+
+def driver_license(n: int) -> str:
+    return f'{LICENSE_PREFIX}{n:010d}'
+
+
+def driver_name(n: int) -> str:
+    return (f'{LAST_NAMES[n % len(LAST_NAMES)]} {FIRST_NAMES[n // len(LAST_NAMES) % len(FIRST_NAMES)]} '
+            f'{MIDDLE_NAMES[n // 7 % len(MIDDLE_NAMES)]}')
+
+
+def _copy_rows(cur, table: str, columns: List[str], rows: List[Tuple[Any, ...]]) -> None:
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join('\\N' if value is None else str(value) for value in row))
+        buffer.write('\n')
+    buffer.seek(0)
+    cur.copy_from(buffer, table, columns=columns)
+
+
+def _seeded(cur, table: str, column: str, prefix: str) -> int:
+    cur.execute(f'SELECT COUNT(*) FROM {table} WHERE {column} LIKE %s', (f'{prefix}%',))
+    return cur.fetchone()[0]
+
+
+def seed_drivers(conn, count: int) -> int:
+    with conn.cursor() as cur:
+        existing = _seeded(cur, 'drivers', 'license_number', LICENSE_PREFIX)
+        for start in range(existing, count, COPY_ROWS):
+            _copy_rows(cur, 'drivers', ['name', 'license_number', 'birth_date', 'phone', 'address'], [
+                (driver_name(n), driver_license(n), f'{1960 + n % 45}-{1 + n % 12:02d}-{1 + n % 28:02d}',
+                 f'+7900{n % 10_000_000:07d}', LOCATIONS[n % len(LOCATIONS)])
+                for n in range(start, min(start + COPY_ROWS, count))
+            ])
+            conn.commit()
+    return max(count - existing, 0)
+
+
+def seed_vehicles(conn, count: int, drivers: int) -> int:
+    with conn.cursor() as cur:
+        existing = _seeded(cur, 'vehicles', 'vin', VIN_PREFIX)
+        for start in range(existing, count, COPY_ROWS):
+            _copy_rows(cur, 'vehicles', ['license_plate', 'brand', 'model', 'year', 'color', 'vin'], [
+                (vehicle_plate(n), *BRANDS[n % len(BRANDS)], 2005 + n % 20, COLORS[n % len(COLORS)], vehicle_vin(n))
+                for n in range(start, min(start + COPY_ROWS, count))
+            ])
+            conn.commit()
+        cur.execute('''
+            UPDATE vehicles v SET owner_id = d.id
+            FROM drivers d
+            WHERE v.vin LIKE %s AND v.owner_id IS NULL
+              AND d.license_number = %s || lpad((substr(v.vin, 4)::BIGINT %% %s)::TEXT, 10, '0')
+        ''', (f'{VIN_PREFIX}%', LICENSE_PREFIX, drivers))
+        conn.commit()
+    return max(count - existing, 0)
+
+
+FINES_INSERT = {
+    'fines': '''
+        INSERT INTO fines (violation_number, driver_name, license_plate, violation_type,
+                           violation_date, amount, status, location, description)
+        SELECT %(prefix)s || lpad(g::TEXT, 12, '0'), d.name, v.license_plate, t.violation_type,
+               date_trunc('second', LOCALTIMESTAMP - make_interval(secs => (g::BIGINT * 7919) %% (%(days)s * 86400))),
+               t.amount, (%(statuses)s::TEXT[])[1 + g %% %(status_count)s],
+               (%(locations)s::TEXT[])[1 + g %% %(location_count)s], t.description
+    ''',
+    'gibdd_fines': '''
+        INSERT INTO gibdd_fines (violation_number, driver_id, vehicle_id, driver_name, license_plate, violation_type,
+                                 violation_date, amount, status, location, description)
+        SELECT %(prefix)s || lpad(g::TEXT, 12, '0'), d.id, v.id, d.name, v.license_plate, t.violation_type,
+               date_trunc('second', CURRENT_TIMESTAMP - make_interval(secs => (g::BIGINT * 7919) %% (%(days)s * 86400))),
+               t.amount, (%(statuses)s::TEXT[])[1 + g %% %(status_count)s],
+               (%(locations)s::TEXT[])[1 + g %% %(location_count)s], t.description
+    '''
+}
+
+FINES_SOURCE = '''
+    FROM generate_series(%(start)s, %(stop)s) g
+    JOIN vehicles v ON v.vin = %(vin_prefix)s || lpad((g %% %(vehicles)s)::TEXT, 14, '0')
+    JOIN drivers d ON d.license_number = %(license_prefix)s || lpad((g %% %(drivers)s)::TEXT, 10, '0')
+    JOIN LATERAL (
+        SELECT (%(types)s::TEXT[])[1 + g %% %(type_count)s] AS violation_type,
+               (%(amounts)s::NUMERIC[])[1 + g %% %(type_count)s] AS amount,
+               (%(descriptions)s::TEXT[])[1 + g %% %(type_count)s] AS description
+    ) t ON TRUE
+'''
+
+
+def seed_fines(conn, table: str, rows: int, vehicles: int, drivers: int) -> int:
+    params = {
+        'prefix': SEED_PREFIX,
+        'days': HISTORY_DAYS,
+        'vin_prefix': VIN_PREFIX,
+        'license_prefix': LICENSE_PREFIX,
+        'vehicles': vehicles,
+        'drivers': drivers,
+        'types': [violation for violation, _, _ in VIOLATIONS],
+        'amounts': [amount for _, amount, _ in VIOLATIONS],
+        'descriptions': [description for _, _, description in VIOLATIONS],
+        'type_count': len(VIOLATIONS),
+        'statuses': STATUSES,
+        'status_count': len(STATUSES),
+        'locations': LOCATIONS,
+        'location_count': len(LOCATIONS)
+    }
+
+    with conn.cursor() as cur:
+        if table == 'gibdd_fines':
+            cur.execute(
+                'SELECT ensure_gibdd_fines_partitions((CURRENT_DATE - %s)::date, (CURRENT_DATE + 31)::date)',
+                (HISTORY_DAYS + 31,)
+            )
+            conn.commit()
+
+        cur.execute(
+            f'SELECT MAX(violation_number) FROM {table} WHERE violation_number >= %s AND violation_number < %s',
+            (SEED_PREFIX, SEED_PREFIX_END)
+        )
+        last = cur.fetchone()[0]
+        existing = int(last[len(SEED_PREFIX):]) + 1 if last else 0
+
+        for start in range(existing, rows, BATCH_ROWS):
+            params['start'], params['stop'] = start, min(start + BATCH_ROWS, rows) - 1
+            cur.execute(FINES_INSERT[table] + FINES_SOURCE, params)
+            conn.commit()
+        cur.execute(f'ANALYZE {table}')
+        conn.commit()
+    return max(rows - existing, 0)
+
+
+def seed(conn, rows: int) -> Dict[str, int]:
+    drivers, vehicles = driver_count(rows), vehicle_count(rows)
+    result = {'drivers': seed_drivers(conn, drivers), 'vehicles': seed_vehicles(conn, vehicles, drivers)}
+    for table in FINES_INSERT:
+        result[table] = seed_fines(conn, table, rows, vehicles, drivers)
+    return result
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        sys.exit('Использование: python -m shared.seed <10k|1m|10m|число строк>')
+
+    target = dataset_rows(sys.argv[1])
+    started = time.monotonic()
+    with connection() as seed_conn:
+        seeded = seed(seed_conn, target)
+    print(f'{target}: {seeded} за {time.monotonic() - started:.1f} с', file=sys.stderr)
@@ -0,0 +1,187 @@
+'''
+Business: Сериализация строк курсора в JSON по таблице колонок (ключ ответа, конвертер) вместо ручной сборки dict в каждом хендлере; по умолчанию stdlib json
+Args: columns - список (ключ, конвертер или None) в порядке колонок SELECT; JSON_ENCODER=orjson включает orjson (нужен пакет orjson);
+      замер из каталога backend: python -m shared.serialize [строк] [повторов]
+Returns: RowEncoder.rows(rows) -> список dict для ответа; dumps(obj) -> str. Ветка stdlib побайтно совпадает с json.dumps,
+         ветка orjson даёт те же ключи и значения в компактной записи UTF-8
+'''
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from shared.instrument import record_phase
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+Column = Tuple[str, Optional[Callable[[Any], Any]]]
+
+USE_ORJSON = os.environ.get('JSON_ENCODER', 'stdlib') == 'orjson'
+if USE_ORJSON and orjson is None:
+    raise RuntimeError('JSON_ENCODER=orjson задан, но пакет orjson не установлен')
+
+
+def iso(value: Any) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def as_float(value: Any) -> float:
+    return float(value)
+
+
+def float_or_zero(value: Any) -> float:
+    return float(value) if value else 0
+
+
+def as_str(value: Any) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+def as_list(value: Any) -> List[Any]:
+    return value or []
+
+
+class RowEncoder:
+    def __init__(self, columns: Sequence[Column]):
+        self.columns = list(columns)
+        self.keys = [key for key, _ in self.columns]
+
+    def row(self, row: Sequence[Any]) -> Dict[str, Any]:
+        return {
+            key: value if convert is None else convert(value)
+            for (key, convert), value in zip(self.columns, row)
+        }
+
+    def rows(self, rows: Iterable[Sequence[Any]]) -> List[Dict[str, Any]]:
+        started = time.perf_counter()
+        result = [self.row(row) for row in rows]
+        record_phase('map', started)
+        return result
+
+
+def dumps_stdlib(obj: Any) -> str:
+    return json.dumps(obj)
+
+
+def dumps_orjson(obj: Any) -> str:
+    return orjson.dumps(obj).decode('utf-8')
+
+
+_dumps = dumps_orjson if USE_ORJSON else dumps_stdlib
+
+
+def dumps(obj: Any) -> str:
+    started = time.perf_counter()
+    text = _dumps(obj)
+    record_phase('serialize', started)
+    return text
+
+
+def encoder_name() -> str:
+    return 'orjson' if USE_ORJSON else 'json'
+
+
+BENCH_COLUMNS: List[Column] = [
+    ('id', None),
+    ('violationNumber', None),
+    ('driverName', None),
+    ('licensePlate', None),
+    ('violationType', None),
+    ('violationDate', iso),
+    ('amount', as_float),
+    ('status', None),
+    ('location', None),
+    ('description', None),
+    ('createdAt', iso)
+]
+
+
+def _bench_rows(count: int) -> List[Tuple[Any, ...]]:
+    return [
+        (i, f'18810177240115{i:06d}', 'Петров Петр Петрович', 'А123ВВ777', 'Превышение скорости',
+         datetime(2024, 1, 15, 14, 30), Decimal('2500.00') + i % 7, 'Не оплачен', 'Москва, МКАД 23 км',
+         'Превышение скорости на 20-40 км/ч', datetime(2024, 1, 15, 14, 30, 1, 123456))
+        for i in range(count)
+    ]
+
+
+def _legacy_body(rows: List[Tuple[Any, ...]]) -> str:
+    fines = []
+    for row in rows:
+        fines.append({
+            'id': row[0],
+            'violationNumber': row[1],
+            'driverName': row[2],
+            'licensePlate': row[3],
+            'violationType': row[4],
+            'violationDate': row[5].isoformat() if row[5] else None,
+            'amount': float(row[6]),
+            'status': row[7],
+            'location': row[8],
+            'description': row[9],
+            'createdAt': row[10].isoformat() if row[10] else None
+        })
+    return json.dumps({'fines': fines, 'nextCursor': None, 'hasMore': False})
+
+
+def _legacy_default_str(rows: List[Tuple[Any, ...]]) -> str:
+    keys = [key for key, _ in BENCH_COLUMNS]
+    return json.dumps([dict(zip(keys, row)) for row in rows], default=str)
+
+
+def _time_case(case: Callable[[], str], repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        case()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def benchmark(count: int, repeat: int) -> List[Tuple[str, float, float]]:
+    rows = _bench_rows(count)
+    encoder = RowEncoder(BENCH_COLUMNS)
+    str_encoder = RowEncoder([(key, as_str if convert else None) for key, convert in BENCH_COLUMNS])
+
+    def envelope(fines: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return {'fines': fines, 'nextCursor': None, 'hasMore': False}
+
+    groups = [
+        ('legacy dict + json.dumps', lambda: _legacy_body(rows), [
+            ('RowEncoder + json', lambda: dumps_stdlib(envelope(encoder.rows(rows)))),
+            ('RowEncoder + orjson', lambda: dumps_orjson(envelope(encoder.rows(rows))))
+        ]),
+        ('legacy default=str', lambda: _legacy_default_str(rows), [
+            ('RowEncoder(as_str) + json', lambda: dumps_stdlib(str_encoder.rows(rows))),
+            ('RowEncoder(as_str) + orjson', lambda: dumps_orjson(str_encoder.rows(rows)))
+        ])
+    ]
+
+    results = []
+    for legacy_name, legacy, cases in groups:
+        expected = legacy()
+        baseline = _time_case(legacy, repeat)
+        results.append((legacy_name, baseline, 1.0))
+        for name, case in cases:
+            if name.endswith('orjson'):
+                if orjson is None:
+                    continue
+                assert json.loads(case()) == json.loads(expected)
+            else:
+                assert case() == expected
+            elapsed = _time_case(case, repeat)
+            results.append((name, elapsed, baseline / elapsed))
+    return results
+
+
+if __name__ == '__main__':
+    rows_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    print(f'{rows_count} строк, {repeats} повторов, orjson: {"да" if orjson is not None else "нет"}')
+    for case_name, elapsed, speedup in benchmark(rows_count, repeats):
+        print(f'{case_name:<30} {elapsed:8.3f} мс  x{speedup:.2f}')
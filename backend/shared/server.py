@@ -0,0 +1,261 @@
+'''
+Business: Локальный HTTP-сервер, поднимающий все функции из func2url.json в одном процессе с общим пулом соединений и кэшами
+Args: запуск из каталога backend: python -m shared.server [порт]; SERVER_HOST, SERVER_PORT, SERVER_WORKERS - число одновременно
+      выполняемых запросов, SERVER_KEEPALIVE_TIMEOUT - простой keep-alive соединения, SERVER_ACCESS_LOG=1 - журнал запросов;
+      поток занят только на время одного запроса, простаивающие keep-alive соединения ждут в selector, поэтому клиентов
+      может быть больше, чем потоков, а лишние запросы ждут в очереди пула
+Returns: маршруты /<функция> и /<функция>/<id> (pathParams.id), /metrics в формате Prometheus; HTTP-запрос переводится в event, ответ handler - в HTTP
+'''
+import base64
+import importlib.util
+import json
+import os
+import selectors
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Any, Callable, Optional, Tuple
+from urllib.parse import urlsplit, parse_qsl
+
+from shared.instrument import prometheus_response
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_WORKERS = 16
+
+Handler = Callable[[Dict[str, Any], Any], Dict[str, Any]]
+
+
+class LocalContext:
+    def __init__(self, function_name: str, request_id: Optional[str] = None):
+        self.function_name = function_name
+        self.request_id = request_id or str(uuid.uuid4())
+
+
+def load_handlers(backend_dir: str = BACKEND_DIR) -> Dict[str, Handler]:
+    with open(os.path.join(backend_dir, 'func2url.json'), encoding='utf-8') as routes_file:
+        names = list(json.load(routes_file))
+
+    if backend_dir not in sys.path:
+        sys.path.insert(0, backend_dir)
+
+    handlers = {}
+    for name in names:
+        spec = importlib.util.spec_from_file_location(f"{name.replace('-', '_')}_index", os.path.join(backend_dir, name, 'index.py'))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        handlers[name] = module.handler
+    return handlers
+
+
+def canonical_header(name: str) -> str:
+    return '-'.join(part.capitalize() for part in name.split('-'))
+
+
+def build_event(method: str, path: str, headers: Dict[str, str], body: bytes) -> Tuple[Optional[str], Dict[str, Any]]:
+    url = urlsplit(path)
+    parts = [part for part in url.path.split('/') if part]
+    name = parts[0] if parts else None
+
+    try:
+        text_body, is_base64 = body.decode('utf-8'), False
+    except UnicodeDecodeError:
+        text_body, is_base64 = base64.b64encode(body).decode('ascii'), True
+
+    event = {
+        'httpMethod': method,
+        'path': url.path,
+        'headers': {canonical_header(key): value for key, value in headers.items()},
+        'queryStringParameters': dict(parse_qsl(url.query, keep_blank_values=True)),
+        'pathParams': {'id': parts[1]} if len(parts) > 1 else {},
+        'body': text_body,
+        'isBase64Encoded': is_base64
+    }
+    return name, event
+
+
+def invoke(handlers: Dict[str, Handler], name: Optional[str], event: Dict[str, Any],
+           request_id: Optional[str] = None) -> Dict[str, Any]:
+    handler = handlers.get(name)
+    if handler is None and name == 'metrics':
+        return prometheus_response()
+    if handler is None:
+        return {
+            'statusCode': 404,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'isBase64Encoded': False,
+            'body': json.dumps({'error': 'Функция не найдена', 'functions': sorted(handlers)})
+        }
+
+    try:
+        return handler(event, LocalContext(name, request_id))
+    except Exception as e:
+        return {
+            'statusCode': 500,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'isBase64Encoded': False,
+            'body': json.dumps({'error': str(e)})
+        }
+
+
+class FunctionRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'fines-local'
+    handlers: Dict[str, Handler] = {}
+    access_log = False
+
+    def _dispatch(self) -> None:
+        started = time.perf_counter()
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        request_id = self.headers.get('X-Request-Id') or str(uuid.uuid4())
+
+        name, event = build_event(self.command, self.path, dict(self.headers.items()), body)
+        response = invoke(self.handlers, name, event, request_id)
+
+        payload = response.get('body') or ''
+        if response.get('isBase64Encoded'):
+            payload = base64.b64decode(payload)
+        elif not isinstance(payload, bytes):
+            payload = payload.encode('utf-8')
+
+        self.send_response(int(response.get('statusCode', 200)))
+        for key, value in (response.get('headers') or {}).items():
+            if key.lower() != 'content-length':
+                self.send_header(key, str(value))
+        self.send_header('Content-Length', str(len(payload)))
+        if 'X-Request-Id' not in (response.get('headers') or {}):
+            self.send_header('X-Request-Id', request_id)
+        self.send_header('X-Handler-Time', f'{(time.perf_counter() - started) * 1000:.2f}')
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(payload)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = do_OPTIONS = do_HEAD = _dispatch
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if self.access_log:
+            super().log_message(format, *args)
+
+
+class PooledHTTPServer(HTTPServer):
+    def __init__(self, address: Tuple[str, int], request_handler, workers: int):
+        super().__init__(address, request_handler)
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='handler')
+        self.keepalive_timeout = float(request_handler.timeout or 0) or None
+        self._selector = selectors.DefaultSelector()
+        self._selector_lock = threading.Lock()
+        self._closing = False
+        self._poller = threading.Thread(target=self._poll, name='keepalive', daemon=True)
+        self._poller.start()
+
+    def process_request(self, request, client_address) -> None:
+        handler = self.RequestHandlerClass.__new__(self.RequestHandlerClass)
+        handler.request, handler.client_address, handler.server = request, client_address, self
+        handler.setup()
+        self._park(handler)
+
+    def _serve(self, handler) -> None:
+        try:
+            handler.close_connection = True
+            handler.handle_one_request()
+        except Exception:
+            self.handle_error(handler.request, handler.client_address)
+            handler.close_connection = True
+        if handler.close_connection or self._closing:
+            self._close(handler)
+        elif self._has_buffered(handler):
+            self.executor.submit(self._serve, handler)
+        else:
+            self._park(handler)
+
+    def _has_buffered(self, handler) -> bool:
+        handler.connection.setblocking(False)
+        try:
+            return bool(handler.rfile.peek(1))
+        except OSError:
+            return False
+        finally:
+            handler.connection.settimeout(handler.timeout)
+
+    def _park(self, handler) -> None:
+        deadline = time.monotonic() + self.keepalive_timeout if self.keepalive_timeout else None
+        with self._selector_lock:
+            if not self._closing:
+                self._selector.register(handler.connection, selectors.EVENT_READ, (handler, deadline))
+                return
+        self._close(handler)
+
+    def _poll(self) -> None:
+        while not self._closing:
+            try:
+                events = self._selector.select(timeout=0.5)
+            except (OSError, ValueError):
+                if self._closing:
+                    return
+                continue
+
+            ready, expired = [], []
+            now = time.monotonic()
+            with self._selector_lock:
+                if self._closing:
+                    return
+                for key, _ in events:
+                    self._selector.unregister(key.fileobj)
+                    ready.append(key.data[0])
+                for key in list(self._selector.get_map().values()):
+                    if key.data[1] is not None and key.data[1] <= now:
+                        self._selector.unregister(key.fileobj)
+                        expired.append(key.data[0])
+
+            for handler in ready:
+                self.executor.submit(self._serve, handler)
+            for handler in expired:
+                self._close(handler)
+
+    def _close(self, handler) -> None:
+        try:
+            handler.finish()
+        except OSError:
+            pass
+        self.shutdown_request(handler.request)
+
+    def server_close(self) -> None:
+        with self._selector_lock:
+            self._closing = True
+            parked = [key.data[0] for key in self._selector.get_map().values()]
+            self._selector.close()
+        for handler in parked:
+            self._close(handler)
+        self._poller.join()
+        super().server_close()
+        self.executor.shutdown(wait=True)
+
+
+def create_server(host: str, port: int, workers: int, handlers: Optional[Dict[str, Handler]] = None) -> PooledHTTPServer:
+    os.environ.setdefault('DB_POOL_MAX_SIZE', str(workers))
+    request_handler = type('BoundFunctionRequestHandler', (FunctionRequestHandler,), {
+        'handlers': handlers if handlers is not None else load_handlers(),
+        'access_log': os.environ.get('SERVER_ACCESS_LOG') == '1',
+        'timeout': float(os.environ.get('SERVER_KEEPALIVE_TIMEOUT', '5'))
+    })
+    return PooledHTTPServer((host, port), request_handler, workers)
+
+
+if __name__ == '__main__':
+    listen_host = os.environ.get('SERVER_HOST', '127.0.0.1')
+    listen_port = int(sys.argv[1]) if len(sys.argv) > 1 else int(os.environ.get('SERVER_PORT', '8000'))
+    worker_count = int(os.environ.get('SERVER_WORKERS', str(DEFAULT_WORKERS)))
+
+    server = create_server(listen_host, listen_port, worker_count)
+    routes = ', '.join(f'/{name}' for name in sorted(server.RequestHandlerClass.handlers))
+    print(f'http://{listen_host}:{listen_port} ({worker_count} потоков): {routes}', file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
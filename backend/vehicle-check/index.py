@@ -1,20 +1,177 @@
 '''
 Business: API проверки транспортных средств по госномеру и VIN через внешний сервис
-Args: event - dict с httpMethod, queryStringParameters (license_plate, vin)
+Args: event - dict с httpMethod, queryStringParameters (license_plate, vin или списки license_plates, vins), body для пакетной проверки
       context - объект с атрибутами request_id, function_name
 Returns: HTTP response dict с данными о ТС
 '''
 
 import json
 import os
-from typing import Dict, Any
-import psycopg2
+import sys
+from typing import Dict, Any, List, Optional
 from psycopg2.extras import RealDictCursor
 
-def get_db_connection():
-    database_url = os.environ.get('DATABASE_URL')
-    return psycopg2.connect(database_url, cursor_factory=RealDictCursor)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from shared.db import get_connection, release_connection, pool_stats, PoolTimeout
+from shared.plates import normalize_plate
+from shared.batch import parse_keys, MAX_BATCH_SIZE
+from shared.cache import get_cache, cache_stats, vehicle_tags, MISSING
+from shared.instrument import instrumented, metrics_snapshot, prometheus_response
+from shared.compress import compressed, compression_stats
 
+VEHICLE_QUERY = '''
+    SELECT v.id, v.license_plate, v.plate_normalized, v.brand, v.model, v.year, 
+           v.color, v.vin, v.owner_id, v.created_at,
+           d.name as owner_name, d.license_number as owner_license,
+           d.phone as owner_phone,
+           COALESCE(s.fines_count, 0) as fines_count,
+           COALESCE(s.unpaid_amount, 0) as unpaid_amount,
+           s.last_violation_date
+    FROM vehicles v
+    LEFT JOIN drivers d ON v.owner_id = d.id
+    LEFT JOIN vehicle_fine_summary s ON s.vehicle_id = v.id
+'''
+
+def vehicle_to_dict(vehicle: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'found': True,
+        'id': vehicle['id'],
+        'license_plate': vehicle['license_plate'],
+        'brand': vehicle['brand'],
+        'model': vehicle['model'],
+        'year': vehicle['year'],
+        'color': vehicle['color'],
+        'vin': vehicle['vin'],
+        'owner': {
+            'id': vehicle['owner_id'],
+            'name': vehicle['owner_name'],
+            'license_number': vehicle['owner_license'],
+            'phone': vehicle['owner_phone']
+        } if vehicle['owner_id'] else None,
+        'fines': {
+            'count': int(vehicle['fines_count']),
+            'unpaid_amount': float(vehicle['unpaid_amount']),
+            'last_violation_date': str(vehicle['last_violation_date']) if vehicle['last_violation_date'] else None
+        },
+        'created_at': str(vehicle['created_at'])
+    }
+
+def cache_vehicle(key: str, vehicle: Optional[Dict[str, Any]], plate: Optional[str] = None) -> None:
+    if vehicle:
+        get_cache('vehicles').set(key, vehicle, vehicle_tags(vehicle['id'], normalize_plate(vehicle['license_plate'])))
+    else:
+        get_cache('vehicles').set(key, None, vehicle_tags(plate=plate))
+
+def lookup_vehicles_batch(plates: List[str], vins: List[str]) -> Dict[str, Any]:
+    cache = get_cache('vehicles')
+    normalized = {plate: normalize_plate(plate) for plate in plates}
+    
+    by_plate: Dict[str, Dict[str, Any]] = {}
+    by_vin: Dict[str, Dict[str, Any]] = {}
+    missing_plates: List[str] = []
+    missing_vins: List[str] = []
+    for key in set(normalized.values()):
+        cached = cache.get(f'plate:{key}')
+        if cached is MISSING:
+            missing_plates.append(key)
+        elif cached:
+            by_plate[key] = cached
+    for vin in vins:
+        cached = cache.get(f'vin:{vin}')
+        if cached is MISSING:
+            missing_vins.append(vin)
+        elif cached:
+            by_vin[vin] = cached
+    
+    if missing_plates or missing_vins:
+        conn = get_connection()
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        try:
+            cur.execute(
+                VEHICLE_QUERY + ' WHERE v.plate_normalized = ANY(%s) OR v.vin = ANY(%s)',
+                (missing_plates, missing_vins)
+            )
+            rows = cur.fetchall()
+        finally:
+            cur.close()
+            release_connection(conn)
+        
+        loaded_plates: Dict[str, Dict[str, Any]] = {}
+        loaded_vins: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            vehicle = vehicle_to_dict(row)
+            loaded_plates[row['plate_normalized']] = vehicle
+            if row['vin']:
+                loaded_vins[row['vin']] = vehicle
+        
+        for key in missing_plates:
+            vehicle = loaded_plates.get(key)
+            cache_vehicle(f'plate:{key}', vehicle, key)
+            if vehicle:
+                by_plate[key] = vehicle
+        for vin in missing_vins:
+            vehicle = loaded_vins.get(vin)
+            cache_vehicle(f'vin:{vin}', vehicle)
+            if vehicle:
+                by_vin[vin] = vehicle
+    
+    found_plates = {plate: by_plate[key] for plate, key in normalized.items() if key in by_plate}
+    found_vins = {vin: by_vin[vin] for vin in vins if vin in by_vin}
+    
+    return {
+        'license_plates': {
+            'found': found_plates,
+            'not_found': [plate for plate in plates if plate not in found_plates]
+        },
+        'vins': {
+            'found': found_vins,
+            'not_found': [vin for vin in vins if vin not in found_vins]
+        },
+        'total_found': len(found_plates) + len(found_vins)
+    }
+
+def handle_batch(body_data: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        plates = parse_keys(body_data.get('license_plates'), required=False)
+        vins = parse_keys(body_data.get('vins'), required=False)
+        if not plates and not vins:
+            raise ValueError('Укажите license_plates или vins')
+        if len(plates) + len(vins) > MAX_BATCH_SIZE:
+            raise ValueError(f'Не более {MAX_BATCH_SIZE} госномеров и VIN за запрос')
+    except ValueError as e:
+        return {
+            'statusCode': 400,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': str(e)}),
+            'isBase64Encoded': False
+        }
+    
+    try:
+        result = lookup_vehicles_batch(plates, vins)
+    except PoolTimeout as e:
+        return {
+            'statusCode': 503,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': str(e)}),
+            'isBase64Encoded': False
+        }
+    except Exception as e:
+        return {
+            'statusCode': 500,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': str(e)}),
+            'isBase64Encoded': False
+        }
+    
+    return {
+        'statusCode': 200,
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+        'body': json.dumps(result, default=str),
+        'isBase64Encoded': False
+    }
+
+@instrumented('vehicle-check')
+@compressed
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     method: str = event.get('httpMethod', 'GET')
     
@@ -31,15 +188,36 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'isBase64Encoded': False
         }
     
-    if method != 'GET':
+    if method not in ('GET', 'POST'):
         return {
             'statusCode': 405,
             'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'error': 'Только GET метод'}),
+            'body': json.dumps({'error': 'Только GET и POST методы'}),
             'isBase64Encoded': False
         }
     
     params = event.get('queryStringParameters', {}) or {}
+    
+    if method == 'GET' and params.get('action') == 'metrics':
+        if params.get('format') == 'prometheus':
+            return prometheus_response()
+        return {
+            'statusCode': 200,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'caches': cache_stats(), 'pool': pool_stats(), 'handlers': metrics_snapshot(), 'compression': compression_stats()}),
+            'isBase64Encoded': False
+        }
+    
+    if method == 'POST':
+        try:
+            body_data = json.loads(event.get('body') or '{}')
+        except ValueError:
+            body_data = {}
+        return handle_batch(body_data if isinstance(body_data, dict) else {})
+    
+    if params.get('license_plates') or params.get('vins'):
+        return handle_batch(params)
+    
     license_plate = params.get('license_plate')
     vin = params.get('vin')
     
@@ -51,94 +229,81 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'isBase64Encoded': False
         }
     
-    conn = get_db_connection()
-    cur = conn.cursor()
+    plate_key = normalize_plate(license_plate) if license_plate else None
+    cache_parts = []
+    if plate_key:
+        cache_parts.append(f'plate:{plate_key}')
+    if vin:
+        cache_parts.append(f'vin:{vin}')
+    cache_key = ':'.join(cache_parts)
+    result = get_cache('vehicles').get(cache_key)
     
-    try:
-        query = '''
-            SELECT v.id, v.license_plate, v.brand, v.model, v.year, 
-                   v.color, v.vin, v.owner_id, v.created_at,
-                   d.name as owner_name, d.license_number as owner_license,
-                   d.phone as owner_phone,
-                   COUNT(f.id) as fines_count,
-                   COALESCE(SUM(CASE WHEN f.status = 'Не оплачен' THEN f.amount ELSE 0 END), 0) as unpaid_amount
-            FROM vehicles v
-            LEFT JOIN drivers d ON v.owner_id = d.id
-            LEFT JOIN gibdd_fines f ON v.id = f.vehicle_id
-            WHERE 1=1
-        '''
-        query_params = []
-        
-        if license_plate:
-            query += ' AND v.license_plate ILIKE %s'
-            query_params.append(license_plate)
-        
-        if vin:
-            query += ' AND v.vin = %s'
-            query_params.append(vin)
-        
-        query += '''
-            GROUP BY v.id, v.license_plate, v.brand, v.model, v.year, 
-                     v.color, v.vin, v.owner_id, v.created_at,
-                     d.name, d.license_number, d.phone
-        '''
+    if result is MISSING:
+        conn = None
+        cur = None
         
-        cur.execute(query, query_params)
-        vehicle = cur.fetchone()
+        try:
+            conn = get_connection()
+            cur = conn.cursor(cursor_factory=RealDictCursor)
+            query = VEHICLE_QUERY + ' WHERE 1=1'
+            query_params = []
+            
+            if plate_key:
+                query += ' AND v.plate_normalized = %s'
+                query_params.append(plate_key)
+            
+            if vin:
+                query += ' AND v.vin = %s'
+                query_params.append(vin)
+            
+            query += ' LIMIT 1'
+            
+            cur.execute(query, query_params)
+            vehicle = cur.fetchone()
+            result = vehicle_to_dict(vehicle) if vehicle else None
         
-        if not vehicle:
-            mock_data = {
-                'found': False,
-                'message': 'ТС не найдено в базе',
-                'license_plate': license_plate or None,
-                'vin': vin or None,
-                'suggestion': 'Добавьте ТС вручную'
+        except PoolTimeout as e:
+            return {
+                'statusCode': 503,
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                'body': json.dumps({'error': str(e)}),
+                'isBase64Encoded': False
             }
-            
+        
+        except Exception as e:
             return {
-                'statusCode': 200,
+                'statusCode': 500,
                 'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps(mock_data),
+                'body': json.dumps({'error': str(e)}),
                 'isBase64Encoded': False
             }
         
-        result = {
-            'found': True,
-            'id': vehicle['id'],
-            'license_plate': vehicle['license_plate'],
-            'brand': vehicle['brand'],
-            'model': vehicle['model'],
-            'year': vehicle['year'],
-            'color': vehicle['color'],
-            'vin': vehicle['vin'],
-            'owner': {
-                'id': vehicle['owner_id'],
-                'name': vehicle['owner_name'],
-                'license_number': vehicle['owner_license'],
-                'phone': vehicle['owner_phone']
-            } if vehicle['owner_id'] else None,
-            'fines': {
-                'count': int(vehicle['fines_count']),
-                'unpaid_amount': float(vehicle['unpaid_amount'])
-            },
-            'created_at': str(vehicle['created_at'])
+        finally:
+            if cur is not None:
+                cur.close()
+            release_connection(conn)
+        
+        cache_vehicle(cache_key, result, plate_key)
+    
+    if not result:
+        mock_data = {
+            'found': False,
+            'message': 'ТС не найдено в базе',
+            'license_plate': license_plate or None,
+            'vin': vin or None,
+            'suggestion': 'Добавьте ТС вручную'
         }
         
         return {
             'statusCode': 200,
             'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps(result, default=str),
-            'isBase64Encoded': False
-        }
-    
-    except Exception as e:
-        return {
-            'statusCode': 500,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'error': str(e)}),
+            'body': json.dumps(mock_data),
             'isBase64Encoded': False
         }
     
-    finally:
-        cur.close()
-        conn.close()
\ No newline at end of file
+    return {
+        'statusCode': 200,
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+        'body': json.dumps(result, default=str),
+        'isBase64Encoded': False
+    }
\ No newline at end of file
@@ -0,0 +1,4 @@
+CREATE INDEX IF NOT EXISTS idx_fines_violation_date_id ON fines(violation_date DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_fines_status_violation_date_id ON fines(status, violation_date DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_fines_violation_type_violation_date_id ON fines(violation_type, violation_date DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_fines_license_plate ON fines(license_plate);
\ No newline at end of file
@@ -0,0 +1,24 @@
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE OR REPLACE FUNCTION normalize_plate(plate TEXT) RETURNS TEXT AS $$
+    SELECT translate(upper(regexp_replace(plate, '[[:space:]-]+', '', 'g')), 'ABEKMHOPCTYX', 'АВЕКМНОРСТУХ')
+$$ LANGUAGE SQL IMMUTABLE STRICT;
+
+CREATE OR REPLACE FUNCTION gibdd_fines_normalize_plate() RETURNS TRIGGER AS $$
+BEGIN
+    NEW.license_plate := normalize_plate(NEW.license_plate);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_gibdd_fines_normalize_plate
+    BEFORE INSERT OR UPDATE OF license_plate ON gibdd_fines
+    FOR EACH ROW EXECUTE FUNCTION gibdd_fines_normalize_plate();
+
+UPDATE gibdd_fines SET license_plate = normalize_plate(license_plate)
+WHERE license_plate IS DISTINCT FROM normalize_plate(license_plate);
+
+CREATE INDEX IF NOT EXISTS idx_gibdd_fines_license_plate ON gibdd_fines(license_plate);
+CREATE INDEX IF NOT EXISTS idx_gibdd_fines_driver_name_trgm ON gibdd_fines USING GIN (driver_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_gibdd_fines_license_plate_trgm ON gibdd_fines USING GIN (license_plate gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_gibdd_fines_violation_number_trgm ON gibdd_fines USING GIN (violation_number gin_trgm_ops);
\ No newline at end of file
@@ -0,0 +1,94 @@
+CREATE TABLE IF NOT EXISTS fine_stats_daily (
+    source VARCHAR(20) NOT NULL,
+    day DATE NOT NULL,
+    status VARCHAR(50) NOT NULL,
+    violation_type VARCHAR(255) NOT NULL,
+    fines_count BIGINT NOT NULL DEFAULT 0,
+    total_amount NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (source, day, status, violation_type)
+);
+
+CREATE OR REPLACE FUNCTION fine_stats_daily_trigger() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO fine_stats_daily (source, day, status, violation_type, fines_count, total_amount)
+        SELECT TG_ARGV[0], violation_date::date, COALESCE(status, ''), violation_type, COUNT(*), SUM(amount)
+        FROM new_rows
+        GROUP BY 2, 3, 4
+        ORDER BY 2, 3, 4
+        ON CONFLICT (source, day, status, violation_type) DO UPDATE
+        SET fines_count = fine_stats_daily.fines_count + EXCLUDED.fines_count,
+            total_amount = fine_stats_daily.total_amount + EXCLUDED.total_amount;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO fine_stats_daily (source, day, status, violation_type, fines_count, total_amount)
+        SELECT TG_ARGV[0], violation_date::date, COALESCE(status, ''), violation_type, -COUNT(*), -SUM(amount)
+        FROM old_rows
+        GROUP BY 2, 3, 4
+        ORDER BY 2, 3, 4
+        ON CONFLICT (source, day, status, violation_type) DO UPDATE
+        SET fines_count = fine_stats_daily.fines_count + EXCLUDED.fines_count,
+            total_amount = fine_stats_daily.total_amount + EXCLUDED.total_amount;
+    ELSE
+        INSERT INTO fine_stats_daily (source, day, status, violation_type, fines_count, total_amount)
+        SELECT TG_ARGV[0], day, status, violation_type, SUM(delta_count), SUM(delta_amount)
+        FROM (
+            SELECT violation_date::date AS day, COALESCE(status, '') AS status, violation_type,
+                   1 AS delta_count, amount AS delta_amount
+            FROM new_rows
+            UNION ALL
+            SELECT violation_date::date, COALESCE(status, ''), violation_type, -1, -amount
+            FROM old_rows
+        ) deltas
+        GROUP BY day, status, violation_type
+        HAVING SUM(delta_count) <> 0 OR SUM(delta_amount) <> 0
+        ORDER BY day, status, violation_type
+        ON CONFLICT (source, day, status, violation_type) DO UPDATE
+        SET fines_count = fine_stats_daily.fines_count + EXCLUDED.fines_count,
+            total_amount = fine_stats_daily.total_amount + EXCLUDED.total_amount;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_gibdd_fines_stats_insert AFTER INSERT ON gibdd_fines
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fine_stats_daily_trigger('gibdd_fines');
+CREATE TRIGGER trg_gibdd_fines_stats_update AFTER UPDATE ON gibdd_fines
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fine_stats_daily_trigger('gibdd_fines');
+CREATE TRIGGER trg_gibdd_fines_stats_delete AFTER DELETE ON gibdd_fines
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fine_stats_daily_trigger('gibdd_fines');
+
+CREATE TRIGGER trg_fines_stats_insert AFTER INSERT ON fines
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fine_stats_daily_trigger('fines');
+CREATE TRIGGER trg_fines_stats_update AFTER UPDATE ON fines
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fine_stats_daily_trigger('fines');
+CREATE TRIGGER trg_fines_stats_delete AFTER DELETE ON fines
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fine_stats_daily_trigger('fines');
+
+CREATE OR REPLACE FUNCTION rebuild_fine_stats_daily(p_source TEXT) RETURNS BIGINT AS $$
+DECLARE
+    rebuilt BIGINT;
+BEGIN
+    IF p_source NOT IN ('gibdd_fines', 'fines') THEN
+        RAISE EXCEPTION 'Unknown fine_stats_daily source: %', p_source;
+    END IF;
+
+    EXECUTE format('LOCK TABLE %I IN SHARE MODE', p_source);
+    DELETE FROM fine_stats_daily WHERE source = p_source;
+    EXECUTE format('
+        INSERT INTO fine_stats_daily (source, day, status, violation_type, fines_count, total_amount)
+        SELECT %L, violation_date::date, COALESCE(status, ''''), violation_type, COUNT(*), SUM(amount)
+        FROM %I
+        GROUP BY 2, 3, 4', p_source, p_source);
+    GET DIAGNOSTICS rebuilt = ROW_COUNT;
+    RETURN rebuilt;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT rebuild_fine_stats_daily('gibdd_fines');
+SELECT rebuild_fine_stats_daily('fines');
\ No newline at end of file
@@ -0,0 +1,15 @@
+CREATE OR REPLACE FUNCTION import_to_timestamptz(value TEXT) RETURNS TIMESTAMP WITH TIME ZONE AS $$
+BEGIN
+    RETURN NULLIF(trim(value), '')::TIMESTAMP WITH TIME ZONE;
+EXCEPTION WHEN others THEN
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+CREATE OR REPLACE FUNCTION import_to_numeric(value TEXT) RETURNS NUMERIC AS $$
+BEGIN
+    RETURN replace(NULLIF(trim(value), ''), ',', '.')::NUMERIC(10, 2);
+EXCEPTION WHEN others THEN
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
\ No newline at end of file
@@ -0,0 +1,3 @@
+ALTER TABLE vehicles ADD COLUMN IF NOT EXISTS sts_number VARCHAR(20);
+
+CREATE INDEX IF NOT EXISTS idx_vehicles_owner_id ON vehicles(owner_id) WHERE sts_number IS NOT NULL;
\ No newline at end of file
@@ -0,0 +1,125 @@
+ALTER TABLE vehicles ADD COLUMN IF NOT EXISTS plate_normalized VARCHAR(20)
+    GENERATED ALWAYS AS (normalize_plate(license_plate)) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_vehicles_plate_normalized ON vehicles(plate_normalized);
+
+CREATE TABLE IF NOT EXISTS vehicle_fine_summary (
+    vehicle_id INTEGER PRIMARY KEY REFERENCES vehicles(id) ON DELETE CASCADE,
+    fines_count INTEGER NOT NULL DEFAULT 0,
+    unpaid_count INTEGER NOT NULL DEFAULT 0,
+    unpaid_amount NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    last_violation_date TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE OR REPLACE FUNCTION refresh_vehicle_fine_summary(p_vehicle_ids INTEGER[]) RETURNS VOID AS $$
+    INSERT INTO vehicle_fine_summary (vehicle_id, fines_count, unpaid_count, unpaid_amount, last_violation_date, updated_at)
+    SELECT v.id,
+           COUNT(f.id),
+           COUNT(f.id) FILTER (WHERE f.status = 'Не оплачен'),
+           COALESCE(SUM(f.amount) FILTER (WHERE f.status = 'Не оплачен'), 0),
+           MAX(f.violation_date),
+           CURRENT_TIMESTAMP
+    FROM vehicles v
+    LEFT JOIN gibdd_fines f ON f.vehicle_id = v.id
+    WHERE v.id = ANY(p_vehicle_ids)
+    GROUP BY v.id
+    ORDER BY v.id
+    ON CONFLICT (vehicle_id) DO UPDATE SET
+        fines_count = EXCLUDED.fines_count,
+        unpaid_count = EXCLUDED.unpaid_count,
+        unpaid_amount = EXCLUDED.unpaid_amount,
+        last_violation_date = EXCLUDED.last_violation_date,
+        updated_at = EXCLUDED.updated_at
+$$ LANGUAGE SQL;
+
+CREATE OR REPLACE FUNCTION vehicle_fine_summary_trigger() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO vehicle_fine_summary (vehicle_id, fines_count, unpaid_count, unpaid_amount, last_violation_date, updated_at)
+        SELECT r.vehicle_id,
+               COUNT(*),
+               COUNT(*) FILTER (WHERE r.status = 'Не оплачен'),
+               COALESCE(SUM(r.amount) FILTER (WHERE r.status = 'Не оплачен'), 0),
+               MAX(r.violation_date),
+               CURRENT_TIMESTAMP
+        FROM new_rows r
+        JOIN vehicles v ON v.id = r.vehicle_id
+        GROUP BY r.vehicle_id
+        ORDER BY r.vehicle_id
+        ON CONFLICT (vehicle_id) DO UPDATE SET
+            fines_count = vehicle_fine_summary.fines_count + EXCLUDED.fines_count,
+            unpaid_count = vehicle_fine_summary.unpaid_count + EXCLUDED.unpaid_count,
+            unpaid_amount = vehicle_fine_summary.unpaid_amount + EXCLUDED.unpaid_amount,
+            last_violation_date = GREATEST(vehicle_fine_summary.last_violation_date, EXCLUDED.last_violation_date),
+            updated_at = EXCLUDED.updated_at;
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP = 'DELETE' THEN
+        INSERT INTO vehicle_fine_summary (vehicle_id, fines_count, unpaid_count, unpaid_amount, updated_at)
+        SELECT r.vehicle_id,
+               -COUNT(*),
+               -COUNT(*) FILTER (WHERE r.status = 'Не оплачен'),
+               -COALESCE(SUM(r.amount) FILTER (WHERE r.status = 'Не оплачен'), 0),
+               CURRENT_TIMESTAMP
+        FROM old_rows r
+        JOIN vehicles v ON v.id = r.vehicle_id
+        GROUP BY r.vehicle_id
+        ORDER BY r.vehicle_id
+        ON CONFLICT (vehicle_id) DO UPDATE SET
+            fines_count = vehicle_fine_summary.fines_count + EXCLUDED.fines_count,
+            unpaid_count = vehicle_fine_summary.unpaid_count + EXCLUDED.unpaid_count,
+            unpaid_amount = vehicle_fine_summary.unpaid_amount + EXCLUDED.unpaid_amount,
+            updated_at = EXCLUDED.updated_at;
+
+        UPDATE vehicle_fine_summary s
+        SET last_violation_date = (SELECT MAX(f.violation_date) FROM gibdd_fines f WHERE f.vehicle_id = s.vehicle_id)
+        WHERE s.vehicle_id IN (SELECT vehicle_id FROM old_rows);
+    ELSE
+        INSERT INTO vehicle_fine_summary (vehicle_id, fines_count, unpaid_count, unpaid_amount, updated_at)
+        SELECT d.vehicle_id, SUM(d.delta_count), SUM(d.delta_unpaid_count), SUM(d.delta_unpaid_amount), CURRENT_TIMESTAMP
+        FROM (
+            SELECT vehicle_id, 1 AS delta_count,
+                   CASE WHEN status = 'Не оплачен' THEN 1 ELSE 0 END AS delta_unpaid_count,
+                   CASE WHEN status = 'Не оплачен' THEN amount ELSE 0 END AS delta_unpaid_amount
+            FROM new_rows
+            UNION ALL
+            SELECT vehicle_id, -1,
+                   CASE WHEN status = 'Не оплачен' THEN -1 ELSE 0 END,
+                   CASE WHEN status = 'Не оплачен' THEN -amount ELSE 0 END
+            FROM old_rows
+        ) d
+        JOIN vehicles v ON v.id = d.vehicle_id
+        GROUP BY d.vehicle_id
+        ORDER BY d.vehicle_id
+        ON CONFLICT (vehicle_id) DO UPDATE SET
+            fines_count = vehicle_fine_summary.fines_count + EXCLUDED.fines_count,
+            unpaid_count = vehicle_fine_summary.unpaid_count + EXCLUDED.unpaid_count,
+            unpaid_amount = vehicle_fine_summary.unpaid_amount + EXCLUDED.unpaid_amount,
+            updated_at = EXCLUDED.updated_at;
+
+        UPDATE vehicle_fine_summary s
+        SET last_violation_date = (SELECT MAX(f.violation_date) FROM gibdd_fines f WHERE f.vehicle_id = s.vehicle_id)
+        WHERE s.vehicle_id IN (
+            SELECT unnest(ARRAY[o.vehicle_id, n.vehicle_id])
+            FROM old_rows o
+            JOIN new_rows n ON n.id = o.id
+            WHERE o.violation_date IS DISTINCT FROM n.violation_date OR o.vehicle_id IS DISTINCT FROM n.vehicle_id
+        );
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_gibdd_fines_vehicle_summary_insert AFTER INSERT ON gibdd_fines
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION vehicle_fine_summary_trigger();
+CREATE TRIGGER trg_gibdd_fines_vehicle_summary_update AFTER UPDATE ON gibdd_fines
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION vehicle_fine_summary_trigger();
+CREATE TRIGGER trg_gibdd_fines_vehicle_summary_delete AFTER DELETE ON gibdd_fines
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION vehicle_fine_summary_trigger();
+
+SELECT refresh_vehicle_fine_summary(ARRAY(SELECT id FROM vehicles));
\ No newline at end of file
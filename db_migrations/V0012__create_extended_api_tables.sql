@@ -0,0 +1,59 @@
+CREATE TABLE IF NOT EXISTS deleted_fines_history (
+    id SERIAL PRIMARY KEY,
+    fine_id INTEGER,
+    violation_number VARCHAR(50),
+    driver_name VARCHAR(255),
+    license_plate VARCHAR(20),
+    violation_type VARCHAR(100),
+    violation_date TIMESTAMP,
+    amount DECIMAL(10, 2),
+    status VARCHAR(50),
+    location VARCHAR(255),
+    description TEXT,
+    deleted_by VARCHAR(100) DEFAULT 'admin',
+    deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    reason VARCHAR(255) DEFAULT 'Удалено через систему'
+);
+
+CREATE INDEX IF NOT EXISTS idx_deleted_fines_history_deleted_at ON deleted_fines_history(deleted_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_deleted_fines_history_fine_id ON deleted_fines_history(fine_id);
+
+CREATE TABLE IF NOT EXISTS parking_passes (
+    id SERIAL PRIMARY KEY,
+    pass_number VARCHAR(50) UNIQUE NOT NULL,
+    license_plate VARCHAR(20) NOT NULL,
+    driver_name VARCHAR(255) NOT NULL,
+    driver_phone VARCHAR(20),
+    valid_from TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    valid_until TIMESTAMP NOT NULL,
+    parking_zones TEXT,
+    status VARCHAR(50) DEFAULT 'Активен',
+    issued_by VARCHAR(100) DEFAULT 'admin',
+    issued_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    notes TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_parking_passes_issued_at ON parking_passes(issued_at DESC);
+CREATE INDEX IF NOT EXISTS idx_parking_passes_license_plate ON parking_passes(license_plate);
+
+CREATE TABLE IF NOT EXISTS vehicle_info (
+    id SERIAL PRIMARY KEY,
+    vin_code VARCHAR(17) UNIQUE NOT NULL,
+    license_plate VARCHAR(20) NOT NULL,
+    brand VARCHAR(100),
+    model VARCHAR(100),
+    year INTEGER,
+    color VARCHAR(50),
+    owner_name VARCHAR(255),
+    registration_date TIMESTAMP,
+    last_inspection TIMESTAMP,
+    insurance_valid_until TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_vehicle_info_license_plate ON vehicle_info(license_plate);
+
+INSERT INTO vehicle_info (vin_code, license_plate, brand, model, year, color, owner_name, registration_date, last_inspection, insurance_valid_until) VALUES
+('XTA21703050123456', 'А123ВВ777', 'LADA', 'Vesta', 2023, 'Синий', 'Петров Петр Петрович', '2023-03-15', '2024-09-20', '2025-03-15'),
+('Z8T4DNFVC8S123789', 'В456СС199', 'Toyota', 'Camry', 2022, 'Черный', 'Иванов Иван Иванович', '2022-05-20', '2024-08-15', '2025-05-20')
+ON CONFLICT (vin_code) DO NOTHING;
\ No newline at end of file
@@ -0,0 +1,25 @@
+ALTER TABLE deleted_fines_history
+    ALTER COLUMN violation_type TYPE VARCHAR(255),
+    ALTER COLUMN location TYPE TEXT,
+    ALTER COLUMN violation_date TYPE TIMESTAMP WITH TIME ZONE;
+
+ALTER TABLE deleted_fines_history ADD COLUMN IF NOT EXISTS source VARCHAR(20) NOT NULL DEFAULT 'fines';
+ALTER TABLE deleted_fines_history ADD COLUMN IF NOT EXISTS payload JSONB;
+
+DROP INDEX IF EXISTS idx_deleted_fines_history_fine_id;
+CREATE INDEX IF NOT EXISTS idx_deleted_fines_history_source_fine_id ON deleted_fines_history(source, fine_id);
+
+WITH moved AS (
+    DELETE FROM gibdd_fines f
+    WHERE f.status = 'Удален'
+    RETURNING f.*
+)
+INSERT INTO deleted_fines_history (
+    source, fine_id, violation_number, driver_name, license_plate,
+    violation_type, violation_date, amount, status, location,
+    description, deleted_by, deleted_at, reason, payload
+)
+SELECT 'gibdd_fines', m.id, m.violation_number, m.driver_name, m.license_plate,
+       m.violation_type, m.violation_date, m.amount, m.status, m.location,
+       m.description, 'admin', COALESCE(m.updated_at, CURRENT_TIMESTAMP), 'Перенесено из gibdd_fines (статус Удален)', to_jsonb(m)
+FROM moved m;
\ No newline at end of file
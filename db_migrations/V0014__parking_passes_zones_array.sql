@@ -0,0 +1,16 @@
+ALTER TABLE parking_passes ALTER COLUMN parking_zones DROP DEFAULT;
+ALTER TABLE parking_passes ALTER COLUMN parking_zones TYPE TEXT[] USING
+    CASE
+        WHEN NULLIF(trim(parking_zones), '') IS NULL THEN ARRAY['Все зоны']
+        ELSE regexp_split_to_array(trim(parking_zones), '\s*,\s*')
+    END;
+ALTER TABLE parking_passes ALTER COLUMN parking_zones SET DEFAULT ARRAY['Все зоны'];
+ALTER TABLE parking_passes ALTER COLUMN parking_zones SET NOT NULL;
+
+ALTER TABLE parking_passes ADD COLUMN IF NOT EXISTS plate_normalized VARCHAR(20)
+    GENERATED ALWAYS AS (normalize_plate(license_plate)) STORED;
+ALTER TABLE parking_passes ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+UPDATE parking_passes SET updated_at = COALESCE(issued_at, CURRENT_TIMESTAMP) WHERE updated_at IS NULL;
+
+DROP INDEX IF EXISTS idx_parking_passes_license_plate;
+CREATE INDEX IF NOT EXISTS idx_parking_passes_updated_at ON parking_passes(updated_at);
\ No newline at end of file
@@ -0,0 +1,156 @@
+ALTER TABLE gibdd_fines RENAME TO gibdd_fines_legacy;
+ALTER SEQUENCE gibdd_fines_id_seq OWNED BY NONE;
+
+CREATE TABLE gibdd_fines (
+    id INTEGER NOT NULL DEFAULT nextval('gibdd_fines_id_seq'),
+    violation_number VARCHAR(50) NOT NULL,
+    driver_id INTEGER,
+    vehicle_id INTEGER,
+    driver_name VARCHAR(255) NOT NULL,
+    license_plate VARCHAR(20) NOT NULL,
+    violation_type VARCHAR(255) NOT NULL,
+    violation_date TIMESTAMP WITH TIME ZONE NOT NULL,
+    amount DECIMAL(10, 2) NOT NULL,
+    status VARCHAR(50) NOT NULL,
+    location TEXT NOT NULL,
+    description TEXT,
+    payment_date TIMESTAMP WITH TIME ZONE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+) PARTITION BY RANGE (violation_date);
+
+CREATE TABLE gibdd_fines_default PARTITION OF gibdd_fines DEFAULT;
+
+CREATE OR REPLACE FUNCTION ensure_gibdd_fines_partitions(p_from DATE, p_to DATE) RETURNS INTEGER AS $$
+DECLARE
+    month_start DATE := date_trunc('month', p_from)::date;
+    month_end DATE;
+    partition_name TEXT;
+    created INTEGER := 0;
+BEGIN
+    WHILE month_start <= p_to LOOP
+        month_end := (month_start + INTERVAL '1 month')::date;
+        partition_name := format('gibdd_fines_%s', to_char(month_start, 'YYYY_MM'));
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format('CREATE TABLE %I (LIKE gibdd_fines INCLUDING DEFAULTS)', partition_name);
+            EXECUTE format('
+                WITH moved AS (
+                    DELETE FROM gibdd_fines_default
+                    WHERE violation_date >= %L AND violation_date < %L
+                    RETURNING *
+                )
+                INSERT INTO %I SELECT * FROM moved', month_start, month_end, partition_name);
+            EXECUTE format('ALTER TABLE gibdd_fines ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                           partition_name, month_start, month_end);
+            created := created + 1;
+        END IF;
+        month_start := month_end;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT ensure_gibdd_fines_partitions(
+    LEAST(COALESCE((SELECT MIN(violation_date) FROM gibdd_fines_legacy)::date, CURRENT_DATE), CURRENT_DATE),
+    (CURRENT_DATE + INTERVAL '12 months')::date
+);
+
+CREATE TABLE gibdd_fine_numbers (
+    violation_number VARCHAR(50) PRIMARY KEY,
+    fine_id INTEGER NOT NULL UNIQUE,
+    violation_date TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+CREATE OR REPLACE FUNCTION gibdd_fines_claim_number() RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO gibdd_fine_numbers (violation_number, fine_id, violation_date)
+    VALUES (NEW.violation_number, NEW.id, NEW.violation_date)
+    ON CONFLICT (violation_number) DO UPDATE SET violation_date = EXCLUDED.violation_date
+    WHERE gibdd_fine_numbers.fine_id = EXCLUDED.fine_id;
+    IF NOT FOUND THEN
+        RETURN NULL;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_gibdd_fines_claim_number
+    BEFORE INSERT ON gibdd_fines
+    FOR EACH ROW EXECUTE FUNCTION gibdd_fines_claim_number();
+
+INSERT INTO gibdd_fines (
+    id, violation_number, driver_id, vehicle_id, driver_name, license_plate,
+    violation_type, violation_date, amount, status, location, description,
+    payment_date, created_at, updated_at
+)
+SELECT id, violation_number, driver_id, vehicle_id, driver_name, license_plate,
+       violation_type, violation_date, amount, status, location, description,
+       payment_date, created_at, updated_at
+FROM gibdd_fines_legacy
+ORDER BY id;
+
+DROP TABLE gibdd_fines_legacy;
+ALTER SEQUENCE gibdd_fines_id_seq OWNED BY gibdd_fines.id;
+
+ALTER TABLE gibdd_fines ADD PRIMARY KEY (id, violation_date);
+
+CREATE INDEX idx_gibdd_fines_status ON gibdd_fines(status);
+CREATE INDEX idx_gibdd_fines_violation_date ON gibdd_fines(violation_date DESC, id DESC);
+CREATE INDEX idx_gibdd_fines_driver_id ON gibdd_fines(driver_id);
+CREATE INDEX idx_gibdd_fines_vehicle_id ON gibdd_fines(vehicle_id);
+CREATE INDEX idx_gibdd_fines_violation_number ON gibdd_fines(violation_number);
+CREATE INDEX idx_gibdd_fines_license_plate ON gibdd_fines(license_plate);
+CREATE INDEX idx_gibdd_fines_driver_name_trgm ON gibdd_fines USING GIN (driver_name gin_trgm_ops);
+CREATE INDEX idx_gibdd_fines_license_plate_trgm ON gibdd_fines USING GIN (license_plate gin_trgm_ops);
+CREATE INDEX idx_gibdd_fines_violation_number_trgm ON gibdd_fines USING GIN (violation_number gin_trgm_ops);
+
+CREATE OR REPLACE FUNCTION gibdd_fine_numbers_sync() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        DELETE FROM gibdd_fine_numbers n
+        USING old_rows o
+        WHERE n.fine_id = o.id;
+    ELSE
+        UPDATE gibdd_fine_numbers n
+        SET violation_number = nr.violation_number,
+            violation_date = nr.violation_date
+        FROM new_rows nr
+        WHERE n.fine_id = nr.id
+          AND (n.violation_number <> nr.violation_number OR n.violation_date <> nr.violation_date);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_gibdd_fine_numbers_update AFTER UPDATE ON gibdd_fines
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION gibdd_fine_numbers_sync();
+CREATE TRIGGER trg_gibdd_fine_numbers_delete AFTER DELETE ON gibdd_fines
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION gibdd_fine_numbers_sync();
+
+CREATE TRIGGER trg_gibdd_fines_normalize_plate
+    BEFORE INSERT OR UPDATE OF license_plate ON gibdd_fines
+    FOR EACH ROW EXECUTE FUNCTION gibdd_fines_normalize_plate();
+
+CREATE TRIGGER trg_gibdd_fines_stats_insert AFTER INSERT ON gibdd_fines
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fine_stats_daily_trigger('gibdd_fines');
+CREATE TRIGGER trg_gibdd_fines_stats_update AFTER UPDATE ON gibdd_fines
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fine_stats_daily_trigger('gibdd_fines');
+CREATE TRIGGER trg_gibdd_fines_stats_delete AFTER DELETE ON gibdd_fines
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fine_stats_daily_trigger('gibdd_fines');
+
+CREATE TRIGGER trg_gibdd_fines_vehicle_summary_insert AFTER INSERT ON gibdd_fines
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION vehicle_fine_summary_trigger();
+CREATE TRIGGER trg_gibdd_fines_vehicle_summary_update AFTER UPDATE ON gibdd_fines
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION vehicle_fine_summary_trigger();
+CREATE TRIGGER trg_gibdd_fines_vehicle_summary_delete AFTER DELETE ON gibdd_fines
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION vehicle_fine_summary_trigger();
+
+ANALYZE gibdd_fines;
\ No newline at end of file
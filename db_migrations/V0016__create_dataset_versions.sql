@@ -0,0 +1,24 @@
+CREATE TABLE IF NOT EXISTS dataset_versions (
+    dataset VARCHAR(50) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    changed_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO dataset_versions (dataset) VALUES ('fines'), ('deleted_fines_history'), ('parking_passes')
+ON CONFLICT (dataset) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION bump_dataset_version() RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE dataset_versions
+    SET version = version + 1, changed_at = clock_timestamp()
+    WHERE dataset = TG_ARGV[0];
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_fines_dataset_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON fines
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_dataset_version('fines');
+CREATE TRIGGER trg_deleted_fines_history_dataset_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON deleted_fines_history
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_dataset_version('deleted_fines_history');
+CREATE TRIGGER trg_parking_passes_dataset_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON parking_passes
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_dataset_version('parking_passes');
\ No newline at end of file
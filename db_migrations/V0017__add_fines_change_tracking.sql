@@ -0,0 +1,17 @@
+ALTER TABLE fines ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP;
+
+CREATE OR REPLACE FUNCTION touch_updated_at() RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at := CURRENT_TIMESTAMP;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_fines_touch_updated_at BEFORE UPDATE ON fines
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+CREATE TRIGGER trg_gibdd_fines_touch_updated_at BEFORE UPDATE ON gibdd_fines
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+
+CREATE INDEX IF NOT EXISTS idx_fines_updated_at_id ON fines(updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_gibdd_fines_updated_at_id ON gibdd_fines(updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_deleted_fines_history_source_deleted_at ON deleted_fines_history(source, deleted_at, id);
\ No newline at end of file
@@ -0,0 +1,24 @@
+DROP INDEX IF EXISTS idx_gibdd_fines_status;
+CREATE INDEX IF NOT EXISTS idx_gibdd_fines_status_violation_date ON gibdd_fines(status, violation_date, id);
+
+CREATE TABLE IF NOT EXISTS fine_notifications (
+    id BIGSERIAL PRIMARY KEY,
+    fine_id INTEGER NOT NULL,
+    kind VARCHAR(30) NOT NULL,
+    deadline DATE NOT NULL,
+    payload JSONB NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    run_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    last_error TEXT,
+    title VARCHAR(255),
+    message TEXT,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    sent_at TIMESTAMP WITH TIME ZONE,
+    UNIQUE (fine_id, kind)
+);
+
+CREATE INDEX IF NOT EXISTS idx_fine_notifications_queue ON fine_notifications(run_at, id)
+    WHERE status IN ('pending', 'processing');
+CREATE INDEX IF NOT EXISTS idx_fine_notifications_sent ON fine_notifications(sent_at DESC, id DESC)
+    WHERE status = 'sent';
\ No newline at end of file
@@ -0,0 +1,94 @@
+CREATE TABLE IF NOT EXISTS fine_stats_violators (
+    source VARCHAR(20) NOT NULL,
+    status VARCHAR(50) NOT NULL,
+    driver_name VARCHAR(255) NOT NULL,
+    license_plate VARCHAR(20) NOT NULL,
+    fines_count BIGINT NOT NULL DEFAULT 0,
+    total_amount NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (source, status, driver_name, license_plate)
+);
+
+CREATE OR REPLACE FUNCTION fine_stats_violators_trigger() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO fine_stats_violators (source, status, driver_name, license_plate, fines_count, total_amount)
+        SELECT TG_ARGV[0], COALESCE(status, ''), COALESCE(driver_name, ''), COALESCE(license_plate, ''), COUNT(*), COALESCE(SUM(amount), 0)
+        FROM new_rows
+        GROUP BY 2, 3, 4
+        ORDER BY 2, 3, 4
+        ON CONFLICT (source, status, driver_name, license_plate) DO UPDATE
+        SET fines_count = fine_stats_violators.fines_count + EXCLUDED.fines_count,
+            total_amount = fine_stats_violators.total_amount + EXCLUDED.total_amount;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO fine_stats_violators (source, status, driver_name, license_plate, fines_count, total_amount)
+        SELECT TG_ARGV[0], COALESCE(status, ''), COALESCE(driver_name, ''), COALESCE(license_plate, ''), -COUNT(*), -COALESCE(SUM(amount), 0)
+        FROM old_rows
+        GROUP BY 2, 3, 4
+        ORDER BY 2, 3, 4
+        ON CONFLICT (source, status, driver_name, license_plate) DO UPDATE
+        SET fines_count = fine_stats_violators.fines_count + EXCLUDED.fines_count,
+            total_amount = fine_stats_violators.total_amount + EXCLUDED.total_amount;
+    ELSE
+        INSERT INTO fine_stats_violators (source, status, driver_name, license_plate, fines_count, total_amount)
+        SELECT TG_ARGV[0], status, driver_name, license_plate, SUM(delta_count), SUM(delta_amount)
+        FROM (
+            SELECT COALESCE(status, '') AS status, COALESCE(driver_name, '') AS driver_name,
+                   COALESCE(license_plate, '') AS license_plate, 1 AS delta_count, COALESCE(amount, 0) AS delta_amount
+            FROM new_rows
+            UNION ALL
+            SELECT COALESCE(status, ''), COALESCE(driver_name, ''), COALESCE(license_plate, ''), -1, -COALESCE(amount, 0)
+            FROM old_rows
+        ) deltas
+        GROUP BY status, driver_name, license_plate
+        HAVING SUM(delta_count) <> 0 OR SUM(delta_amount) <> 0
+        ORDER BY status, driver_name, license_plate
+        ON CONFLICT (source, status, driver_name, license_plate) DO UPDATE
+        SET fines_count = fine_stats_violators.fines_count + EXCLUDED.fines_count,
+            total_amount = fine_stats_violators.total_amount + EXCLUDED.total_amount;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_gibdd_fines_violators_insert AFTER INSERT ON gibdd_fines
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fine_stats_violators_trigger('gibdd_fines');
+CREATE TRIGGER trg_gibdd_fines_violators_update AFTER UPDATE ON gibdd_fines
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fine_stats_violators_trigger('gibdd_fines');
+CREATE TRIGGER trg_gibdd_fines_violators_delete AFTER DELETE ON gibdd_fines
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fine_stats_violators_trigger('gibdd_fines');
+
+CREATE TRIGGER trg_fines_violators_insert AFTER INSERT ON fines
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fine_stats_violators_trigger('fines');
+CREATE TRIGGER trg_fines_violators_update AFTER UPDATE ON fines
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fine_stats_violators_trigger('fines');
+CREATE TRIGGER trg_fines_violators_delete AFTER DELETE ON fines
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fine_stats_violators_trigger('fines');
+
+CREATE OR REPLACE FUNCTION rebuild_fine_stats_violators(p_source TEXT) RETURNS BIGINT AS $$
+DECLARE
+    rebuilt BIGINT;
+BEGIN
+    IF p_source NOT IN ('gibdd_fines', 'fines') THEN
+        RAISE EXCEPTION 'Unknown fine_stats_violators source: %', p_source;
+    END IF;
+
+    EXECUTE format('LOCK TABLE %I IN SHARE MODE', p_source);
+    DELETE FROM fine_stats_violators WHERE source = p_source;
+    EXECUTE format('
+        INSERT INTO fine_stats_violators (source, status, driver_name, license_plate, fines_count, total_amount)
+        SELECT %L, COALESCE(status, ''''), COALESCE(driver_name, ''''), COALESCE(license_plate, ''''), COUNT(*), COALESCE(SUM(amount), 0)
+        FROM %I
+        GROUP BY 2, 3, 4', p_source, p_source);
+    GET DIAGNOSTICS rebuilt = ROW_COUNT;
+    RETURN rebuilt;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT rebuild_fine_stats_violators('gibdd_fines');
+SELECT rebuild_fine_stats_violators('fines');
\ No newline at end of file
@@ -0,0 +1,5 @@
+UPDATE parking_passes SET issued_at = COALESCE(valid_from, updated_at, CURRENT_TIMESTAMP) WHERE issued_at IS NULL;
+ALTER TABLE parking_passes ALTER COLUMN issued_at SET NOT NULL;
+
+DROP INDEX IF EXISTS idx_parking_passes_issued_at;
+CREATE INDEX IF NOT EXISTS idx_parking_passes_issued_at_id ON parking_passes(issued_at DESC, id DESC);
\ No newline at end of file
@@ -1,66 +1,70 @@
+import { useEffect, useState } from 'react';
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/components/ui/card';
 import { Button } from '@/components/ui/button';
 import Icon from '@/components/ui/icon';
 import DashboardNav from '@/components/dashboard/DashboardNav';
 import { BarChart, Bar, LineChart, Line, PieChart, Pie, Cell, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer } from 'recharts';
-import { format, subDays, startOfMonth, endOfMonth } from 'date-fns';
+import { format, parseISO } from 'date-fns';
 import { ru } from 'date-fns/locale';
 
+interface AnalyticsData {
+  totals: {
+    count: number;
+    amount: number;
+    paidCount: number;
+    paidAmount: number;
+    unpaidCount: number;
+    unpaidAmount: number;
+  };
+  byViolationType: { violationType: string; count: number; amount: number }[];
+  byDay: { day: string; count: number; amount: number; paidAmount: number }[];
+  topViolators: { driverName: string; licensePlate: string; count: number; amount: number }[];
+}
+
+const EXTENDED_API_URL = 'https://functions.poehali.dev/869845df-0ee4-4954-8a12-9b892d8d91df';
+
 export default function Analytics() {
-  const fines = JSON.parse(localStorage.getItem('fines') || '[]');
-
-  const totalFines = fines.length;
-  const totalAmount = fines.reduce((sum: number, f: any) => sum + f.amount, 0);
-  const paidFines = fines.filter((f: any) => f.status === 'Оплачен').length;
-  const unpaidAmount = fines
-    .filter((f: any) => f.status === 'Не оплачен')
-    .reduce((sum: number, f: any) => sum + f.amount, 0);
-
-  const violationStats = fines.reduce((acc: any, f: any) => {
-    acc[f.violationType] = (acc[f.violationType] || 0) + 1;
-    return acc;
-  }, {});
-
-  const pieData = Object.entries(violationStats).map(([name, value]) => ({
-    name,
-    value
+  const [analytics, setAnalytics] = useState<AnalyticsData | null>(null);
+
+  useEffect(() => {
+    const fetchAnalytics = async () => {
+      try {
+        const response = await fetch(`${EXTENDED_API_URL}?action=analytics&days=30&top=5`);
+        const data = await response.json();
+        setAnalytics(data);
+      } catch (error) {
+        console.error('Failed to fetch analytics', error);
+      }
+    };
+    fetchAnalytics();
+  }, []);
+
+  const totalFines = analytics?.totals.count ?? 0;
+  const totalAmount = analytics?.totals.amount ?? 0;
+  const paidFines = analytics?.totals.paidCount ?? 0;
+  const unpaidAmount = analytics?.totals.unpaidAmount ?? 0;
+
+  const pieData = (analytics?.byViolationType || []).map((entry) => ({
+    name: entry.violationType,
+    value: entry.count
   }));
 
   const COLORS = ['#0088FE', '#00C49F', '#FFBB28', '#FF8042', '#8884d8', '#82ca9d'];
 
-  const last30Days = Array.from({ length: 30 }, (_, i) => {
-    const date = subDays(new Date(), 29 - i);
-    return format(date, 'dd.MM', { locale: ru });
-  });
-
-  const dailyFines = last30Days.map(date => {
-    const count = fines.filter((f: any) => {
-      const fineDate = format(new Date(f.violationDate), 'dd.MM', { locale: ru });
-      return fineDate === date;
-    }).length;
-    return { date, count };
-  });
-
-  const monthlyRevenue = last30Days.map(date => {
-    const revenue = fines
-      .filter((f: any) => {
-        const fineDate = format(new Date(f.violationDate), 'dd.MM', { locale: ru });
-        return fineDate === date && f.status === 'Оплачен';
-      })
-      .reduce((sum: number, f: any) => sum + f.amount, 0);
-    return { date, revenue: revenue / 1000 };
-  });
-
-  const topViolators = Object.entries(
-    fines.reduce((acc: any, f: any) => {
-      const key = `${f.driverName} (${f.licensePlate})`;
-      acc[key] = (acc[key] || 0) + 1;
-      return acc;
-    }, {})
-  )
-    .sort(([, a]: any, [, b]: any) => b - a)
-    .slice(0, 5)
-    .map(([name, count]) => ({ name, count }));
+  const dailyFines = (analytics?.byDay || []).map((entry) => ({
+    date: format(parseISO(entry.day), 'dd.MM', { locale: ru }),
+    count: entry.count
+  }));
+
+  const monthlyRevenue = (analytics?.byDay || []).map((entry) => ({
+    date: format(parseISO(entry.day), 'dd.MM', { locale: ru }),
+    revenue: entry.paidAmount / 1000
+  }));
+
+  const topViolators = (analytics?.topViolators || []).map((entry) => ({
+    name: `${entry.driverName} (${entry.licensePlate})`,
+    count: entry.count
+  }));
 
   return (
     <div className="min-h-screen bg-gradient-to-br from-blue-50 via-white to-blue-50">
@@ -108,7 +112,7 @@ export default function Analytics() {
           </CardHeader>
           <CardContent>
             <p className="text-sm text-gray-600">
-              {((paidFines / totalFines) * 100).toFixed(1)}% от всех
+              {totalFines ? ((paidFines / totalFines) * 100).toFixed(1) : '0.0'}% от всех
             </p>
           </CardContent>
         </Card>
@@ -84,6 +84,20 @@ interface ParkingPass {
   notes: string;
 }
 
+interface Analytics {
+  totals: {
+    count: number;
+    amount: number;
+    paidCount: number;
+    paidAmount: number;
+    unpaidCount: number;
+    unpaidAmount: number;
+  };
+  byStatus: { status: string; count: number; amount: number }[];
+  byViolationType: { violationType: string; count: number; amount: number }[];
+  byMonth: { month: string; count: number; amount: number; paidAmount: number }[];
+}
+
 const FINES_API_URL = 'https://functions.poehali.dev/01bce009-aa74-42ea-86d0-482816a6f06f';
 const EXTENDED_API_URL = 'https://functions.poehali.dev/869845df-0ee4-4954-8a12-9b892d8d91df';
 
@@ -93,6 +107,7 @@ export default function Dashboard() {
   const [filteredFines, setFilteredFines] = useState<Fine[]>([]);
   const [deletedHistory, setDeletedHistory] = useState<DeletedFine[]>([]);
   const [parkingPasses, setParkingPasses] = useState<ParkingPass[]>([]);
+  const [analytics, setAnalytics] = useState<Analytics | null>(null);
   const [loading, setLoading] = useState(true);
   const [searchTerm, setSearchTerm] = useState('');
   const [statusFilter, setStatusFilter] = useState('all');
@@ -162,6 +177,7 @@ export default function Dashboard() {
           description: '',
         });
         fetchFines();
+        fetchAnalytics();
       }
     } catch (error) {
       toast({
@@ -220,10 +236,21 @@ export default function Dashboard() {
     }
   };
 
+  const fetchAnalytics = async () => {
+    try {
+      const response = await fetch(`${EXTENDED_API_URL}?action=analytics`);
+      const data = await response.json();
+      setAnalytics(data);
+    } catch (error) {
+      console.error('Failed to fetch analytics', error);
+    }
+  };
+
   useEffect(() => {
     fetchFines();
     fetchDeletedHistory();
     fetchParkingPasses();
+    fetchAnalytics();
   }, []);
 
   useEffect(() => {
@@ -275,6 +302,7 @@ export default function Dashboard() {
           description: 'Штраф помечен как удаленный',
         });
         fetchFines();
+        fetchAnalytics();
         fetchDeletedHistory();
       }
     } catch (error) {
@@ -323,21 +351,22 @@ export default function Dashboard() {
 
   const confirmDeleteMultiple = async () => {
     try {
-      const deletePromises = selectedFineIds.map(id =>
-        fetch(FINES_API_URL, {
-          method: 'PUT',
-          headers: { 'Content-Type': 'application/json' },
-          body: JSON.stringify({ id, status: 'Удален' }),
-        })
-      );
+      const response = await fetch(FINES_API_URL, {
+        method: 'PUT',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ ids: selectedFineIds, status: 'Удален' }),
+      });
 
-      await Promise.all(deletePromises);
+      if (!response.ok) {
+        throw new Error('Batch update failed');
+      }
 
       toast({
         title: 'Успешно',
         description: `Удалено штрафов: ${selectedFineIds.length}`,
       });
       fetchFines();
+      fetchAnalytics();
       fetchDeletedHistory();
     } catch (error) {
       toast({
@@ -407,25 +436,27 @@ export default function Dashboard() {
   };
 
   const stats = {
-    total: fines.filter((f) => f.status !== 'Удален').length,
-    unpaid: fines.filter((f) => f.status === 'Неоплачен').length,
-    paid: fines.filter((f) => f.status === 'Оплачен').length,
-    totalAmount: fines.filter((f) => f.status !== 'Удален').reduce((acc, f) => acc + f.amount, 0),
+    total: analytics?.totals.count ?? 0,
+    unpaid: analytics?.totals.unpaidCount ?? 0,
+    paid: analytics?.totals.paidCount ?? 0,
+    totalAmount: analytics?.totals.amount ?? 0,
   };
 
   const activeFines = fines.filter((f) => f.status !== 'Удален');
   const violationTypes = Array.from(new Set(activeFines.map((f) => f.violationType || f.violation_type)));
   const statusTypes = Array.from(new Set(activeFines.map((f) => f.status)));
 
-  const violationChartData = violationTypes.map((type) => ({
-    name: type,
-    count: activeFines.filter((f) => (f.violationType || f.violation_type) === type).length,
+  const violationChartData = (analytics?.byViolationType || []).map((entry) => ({
+    name: entry.violationType,
+    count: entry.count,
   }));
 
-  const statusChartData = statusTypes.map((status) => ({
-    name: status,
-    value: activeFines.filter((f) => f.status === status).length,
-  }));
+  const statusChartData = (analytics?.byStatus || [])
+    .filter((entry) => entry.status !== 'Удален')
+    .map((entry) => ({
+      name: entry.status,
+      value: entry.count,
+    }));
 
   if (loading) {
     return (
@@ -53,10 +53,14 @@ const API_URL = 'https://functions.poehali.dev/e4da8fe6-8316-4b83-8d3e-1d73beb1a
 
 const COLORS = ['#0056b3', '#dc2626', '#10b981', '#f59e0b'];
 
+const PAGE_SIZE = 100;
+
 export default function Index() {
   const [fines, setFines] = useState<Fine[]>([]);
   const [filteredFines, setFilteredFines] = useState<Fine[]>([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [searchTerm, setSearchTerm] = useState('');
   const [statusFilter, setStatusFilter] = useState('all');
   const [typeFilter, setTypeFilter] = useState('all');
@@ -75,12 +79,19 @@ export default function Index() {
     navigate('/login');
   };
 
+  const fetchPage = async (cursor: string | null) => {
+    const url = cursor
+      ? `${API_URL}?limit=${PAGE_SIZE}&cursor=${encodeURIComponent(cursor)}`
+      : `${API_URL}?limit=${PAGE_SIZE}`;
+    const response = await fetch(url);
+    return response.json();
+  };
+
   const fetchFines = async () => {
     try {
-      const response = await fetch(API_URL);
-      const data = await response.json();
+      const data = await fetchPage(null);
       setFines(data.fines);
-      setFilteredFines(data.fines);
+      setNextCursor(data.nextCursor);
     } catch (error) {
       toast({
         title: 'Ошибка',
@@ -92,6 +103,24 @@ export default function Index() {
     }
   };
 
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const data = await fetchPage(nextCursor);
+      setFines((prev) => [...prev, ...data.fines]);
+      setNextCursor(data.nextCursor);
+    } catch (error) {
+      toast({
+        title: 'Ошибка',
+        description: 'Не удалось загрузить данные',
+        variant: 'destructive',
+      });
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   useEffect(() => {
     fetchFines();
   }, []);
@@ -549,6 +578,15 @@ export default function Index() {
             <div className="mt-4 text-sm text-gray-600">
               Показано записей: {filteredFines.length} из {fines.length}
             </div>
+
+            {nextCursor && (
+              <div className="mt-4 flex justify-center">
+                <Button onClick={loadMore} variant="outline" disabled={loadingMore} className="gap-2">
+                  <Icon name="ChevronDown" size={18} />
+                  {loadingMore ? 'Загрузка...' : 'Загрузить ещё'}
+                </Button>
+              </div>
+            )}
           </CardContent>
         </Card>
       </div>